@@ -1,39 +1,52 @@
-from contextlib import asynccontextmanager
-from fastapi import FastAPI
-from sqlmodel import SQLModel, create_engine, Session
+from typing import Optional
+
+from sqlalchemy.engine import Engine
+from sqlmodel import create_engine, Session
 from utils.logging import logger
 import setting
 
-CONN_STRING: str = str(setting.DATABASE_URL)
+# The schema is managed explicitly (python -m scripts.init_db), never at import or startup
+
+_engine: Optional[Engine] = None
+
+
+def get_engine() -> Engine:
+    """The application engine, created on first use."""
+    global _engine
+    if _engine is None:
+        _engine = create_engine(str(setting.DATABASE_URL), connect_args={}, pool_recycle=300)
+        if setting.SLOW_QUERY_LOG_ENABLED:
+            from utils import slow_queries
+            slow_queries.enable(_engine)
+        logger.info("Engine created successfully")
+    return _engine
+
+
+def __getattr__(name):
+    # `from db import engine` keeps working; the engine is built when first asked for
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def reset_after_fork() -> None:
+    """Drop pooled connections inherited from the parent process without closing them."""
+    if _engine is not None:
+        _engine.dispose(close=False)
+
 
-def get_engine(CONN_STRING):
-    engine = create_engine(CONN_STRING, echo=True, connect_args={}, pool_recycle=300)
-    logger.info("Engine created successfully")
-    return engine
+def dispose_engine() -> None:
+    """Close every pooled connection (shutdown)."""
+    if _engine is not None:
+        _engine.dispose()
 
-engine = get_engine(CONN_STRING=CONN_STRING)
 
 # Add SessionLocal
 SessionLocal = Session
 
-def create_db_and_tables():
-    # SQLModel.metadata.drop_all(engine)  # Drop existing tables
-    SQLModel.metadata.create_all(engine)
-
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    logger.info("Creating database connection")
-    try:
-        create_db_and_tables()
-        logger.info("Database tables created successfully")
-    except Exception as e:
-        logger.error(f"Database initialization error: {str(e)}")
-        raise
-    yield
-    logger.info("Closing database connection")
 
 def get_session():
-    with SessionLocal(engine) as session:
+    with SessionLocal(get_engine()) as session:
         try:
             yield session
         finally:
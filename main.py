@@ -1,13 +1,15 @@
 from fastapi import FastAPI, Depends, HTTPException, Cookie
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlmodel import select, Session, SQLModel
 from typing import Annotated
 from contextlib import asynccontextmanager
-from utils.logging import logger, cleanup_old_logs
-from db import engine, SessionLocal, lifespan
-import asyncio
+from utils.logging import logger, cleanup_old_logs, configure_logging
+from db import dispose_engine
+import setting
 from fastapi.openapi.utils import get_openapi
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
 # Router imports
 from router.attendance_value import attendancevalue_router
@@ -22,23 +24,28 @@ from router.income import income_router
 from router.income_cat_names import income_cat_names_router
 from router.expense_cat_names import expense_cat_names_router
 from router.expense import expense_router
+from router.finance import finance_router
 from router.dashboard import dashboard_router
+from router.diagnostics import diagnostics_router
+from router.health import health_router
 from router.admin_create_user import admin_create_user_router
 
 # User related imports
 from user.user_router import public_router, user_router, admin_router
+from utils.cache import get_cache
+from utils.metrics import MetricsMiddleware, metrics
+from utils.profiler import ProfilingMiddleware
+from utils.query_stats import QueryStatsMiddleware
 
-from db import get_session, create_db_and_tables
+from db import get_session
 
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # 🔹 Startup Tasks
-    print("Starting Application")
-    print("Creating database and tables")
-    create_db_and_tables()
-    print("Database and tables created")
+    # 🔹 Startup Tasks (the schema comes from `python -m scripts.init_db`, not from startup)
+    configure_logging()
+    get_cache()  # subscribe to cross-worker invalidations before serving
 
     logger.info("Starting application...")
     try:
@@ -49,16 +56,12 @@ async def lifespan(app: FastAPI):
 
     yield  # 🔸 Application Runs Here
 
-    # 🔹 Shutdown Tasks
+    # 🔹 Shutdown Tasks: the server has already drained (utils/graceful.py) and
+    # finished in-flight requests; only connections are left to close
     logger.info("Application shutting down...")
     try:
-        await engine.dispose()  # Close database connections
-        
-        # Cancel any pending tasks
-        for task in asyncio.all_tasks():
-            if not task.done():
-                task.cancel()
-
+        get_cache().close()
+        dispose_engine()
         logger.info("Shutdown completed successfully")
     except Exception as e:
         logger.error(f"Shutdown error: {str(e)}")
@@ -82,6 +85,8 @@ app = FastAPI(
 
 logger.info("Starting application...")
 
+# A profiled request (admin, X-Profile header) gets the profile instead of its response
+app.add_middleware(ProfilingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -90,6 +95,12 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
     expose_headers=["*"]  # Expose all headers
 )
+app.add_middleware(QueryStatsMiddleware)
+# Outside CORS, so timings include CORS handling and every response is counted (probes excluded)
+app.add_middleware(MetricsMiddleware, exclude=("/metrics", "/healthz", "/readyz"))
+# request.client is the real client when the peer is a trusted proxy (login throttling keys on it).
+# Same list as the server's forwarded_allow_ips, so applying it twice changes nothing.
+app.add_middleware(ProxyHeadersMiddleware, trusted_hosts=setting.TRUSTED_PROXIES)
 
 # Include routers
 app.include_router(public_router)  # No prefix - routes will be at /login and /signup
@@ -105,12 +116,20 @@ app.include_router(classnames_router)
 app.include_router(dashboard_router, tags=["Dashboard"])
 app.include_router(expense_router)
 app.include_router(fee_router)
+app.include_router(finance_router)
 app.include_router(income_router)
 app.include_router(students_router)
 app.include_router(mark_attendance_router)
 app.include_router(adm_del_router)
+app.include_router(diagnostics_router)
+app.include_router(health_router)
 
 @app.get("/", tags=["MMS Backend"])
 async def root():
     return {"Message": "MMS Backend is running :-}"}
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Request metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
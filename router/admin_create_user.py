@@ -12,6 +12,7 @@ from user.user_models import (
     AdminUserUpdate
 )
 from user.user_crud import check_admin
+from user.services import remember_token_version
 
 admin_create_user_router = APIRouter(
     prefix="/admin",
@@ -90,6 +91,7 @@ def delete_user_by_id(
     try:
         session.delete(user)
         session.commit()
+        remember_token_version(user_id, None)
         return {"message": f"User with ID {user_id} deleted successfully"}
     except Exception as e:
         session.rollback()
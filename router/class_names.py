@@ -1,13 +1,19 @@
 from asyncio.log import logger
 from typing import Annotated, List, Optional
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
 from sqlmodel import Session, select
 from sqlalchemy.exc import IntegrityError  # <-- Add this import
 
+import setting
 from db import get_session
 from schemas.class_names_model import ClassNames, ClassNamesCreate, ClassNamesResponse
 from user.user_crud import check_admin, check_authenticated_user
 from user.user_models import User
+from utils.cache import get_cache
+
+# Shared cache namespace for the class list; invalidated on every write below
+CACHE_NAMESPACE = "class_names"
 
 classnames_router = APIRouter(
     prefix="/class_name",
@@ -47,6 +53,7 @@ def create_classnames(user: Annotated[User, Depends(check_admin)],classnames: Cl
             status_code=500, detail="Internal server error."
         )
 
+    get_cache().invalidate(CACHE_NAMESPACE)
     return db_classnames
 
 # # Returns all placed class names
@@ -54,8 +61,7 @@ def create_classnames(user: Annotated[User, Depends(check_admin)],classnames: Cl
 
 @classnames_router.get("/class-names-all/", response_model=List[ClassNamesResponse])
 def read_classnames(current_user: Annotated[User, Depends(check_authenticated_user)],session: Session = Depends(get_session)):
-    classnames = session.exec(select(ClassNames)).all()
-    return classnames
+    return cached_class_names(session)
 
 # # Returns class name of any specific class-name-id
 
@@ -85,6 +91,7 @@ def delete_classnames(user: Annotated[User, Depends(check_admin)],class_name: st
         )
     session.delete(classnames)
     session.commit()
+    get_cache().invalidate(CACHE_NAMESPACE)
     return {"message": "Class Name deleted successfully"}
 
 @classnames_router.delete("/{class_name_id}", response_model=dict)
@@ -110,6 +117,7 @@ def delete_classnames_by_id(
     try:
         session.delete(classname)
         session.commit()
+        get_cache().invalidate(CACHE_NAMESPACE)
         return {"message": f"Class Name with ID {class_name_id} deleted successfully"}
     except Exception as e:
         session.rollback()
@@ -119,9 +127,22 @@ def delete_classnames_by_id(
             detail="Error deleting class name"
         )
 
+def cached_class_names(session: Session) -> List[dict]:
+    """All classes as JSON-ready dicts, from the shared cache."""
+    def load():
+        rows = session.exec(select(ClassNames).order_by(ClassNames.class_name_id)).all()
+        return [jsonable_encoder(ClassNamesResponse.model_validate(row)) for row in rows]
+
+    return get_cache().get_or_set(CACHE_NAMESPACE, "all", load, ttl=setting.REFERENCE_CACHE_TTL_SECONDS)
+
 def get_class_name(session: Session, class_id: int) -> Optional[str]:
     """Fetch class name by class_id."""
-    class_name_obj = session.exec(select(ClassNames).where(ClassNames.class_name_id == class_id)).first()
-    if class_name_obj:
-        return class_name_obj.class_name
-    return None
\ No newline at end of file
+    for row in cached_class_names(session):
+        if row["class_name_id"] == class_id:
+            return row["class_name"]
+    # Possibly created through another worker since the list was cached
+    classname = session.get(ClassNames, class_id)
+    if classname is None:
+        return None
+    get_cache().invalidate(CACHE_NAMESPACE)
+    return classname.class_name
\ No newline at end of file
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import HTMLResponse
 from sqlmodel import Session, select, func
 from datetime import datetime, date, timedelta
@@ -14,9 +15,16 @@ from schemas.students_model import Students
 from schemas.income_model import Income
 from schemas.expense_model import Expense
 from schemas.fee_model import Fee  
+from schemas.ledger_model import LedgerResponse, MonthlyLedger
 from user.user_crud import check_admin, check_authenticated_user
 from user.user_models import User
 from typing import Annotated, List
+from utils.academic_year import academic_year_bounds, current_academic_year
+from utils import cold_storage, ledger
+from utils.cache import MISSING, get_cache
+from utils.logging import logger
+from utils.metrics import metrics
+from utils.single_flight import SingleFlight
 
 dashboard_router = APIRouter(
     prefix="/dashboard",
@@ -25,6 +33,39 @@ dashboard_router = APIRouter(
 )
 
 
+# Identical summaries requested at the same time (e.g. everyone opening the
+# dashboard at 8 a.m.) share one computation
+dashboard_flights = SingleFlight()
+
+
+def _coalescing_metrics() -> List[str]:
+    stats = sorted(dashboard_flights.stats().items())
+    lines = []
+    for metric, counter, help_text in (
+        ("dashboard_summary_executions_total", "executions", "Dashboard summaries computed."),
+        ("dashboard_summary_coalesced_total", "coalesced", "Dashboard summary requests served by an in-flight computation."),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        lines += [f'{metric}{{summary="{name}"}} {counters[counter]}' for name, counters in stats]
+    return lines
+
+
+metrics.add_collector(_coalescing_metrics)
+
+# Shared cache namespace for /fee-summary, keyed by year; router/fee.py
+# invalidates the affected year whenever fee rows change
+FEE_SUMMARY_CACHE = "fee_summary"
+
+
+def _period_bounds(year: int, month: int = None):
+    """[start, end) dates of a calendar year, or of one month in it."""
+    if not month:
+        return date(year, 1, 1), date(year + 1, 1, 1)
+    if month == 12:
+        return date(year, 12, 1), date(year + 1, 1, 1)
+    return date(year, month, 1), date(year, month + 1, 1)
+
+
 @dashboard_router.get("/user-roles", response_model=LoginGraphData)
 def get_user_role_summary(user: Annotated[User, Depends(check_admin)], session: Session = Depends(get_session)):
     """Fetch user role distribution summary (dynamic role mapping from DB, zero-fill using UserRole enum)."""
@@ -92,13 +133,13 @@ def get_user_role_summary(user: Annotated[User, Depends(check_admin)], session:
 @dashboard_router.get("/attendance-summary", response_model=AttendanceGraphData)
 def get_attendance_summary(user: Annotated[User, Depends(check_admin)],session: Session = Depends(get_session)):
     """Fetch today's attendance summary with graph visualization."""
+    # Get today's date at start and end of day to ensure we catch all records
+    today = datetime.utcnow().date()
+    return dashboard_flights.do(("attendance-summary", today), lambda: _attendance_summary(session, today))
+
+
+def _attendance_summary(session: Session, today: date) -> AttendanceGraphData:
     try:
-        # Get today's date at start and end of day to ensure we catch all records
-        today = datetime.utcnow().date()
-        
-        # Debug: Print the date we're querying for
-        print(f"Querying attendance for date: {today}")
-        
         # Modified query to ensure we get results
         stmt = (
             select(
@@ -113,15 +154,17 @@ def get_attendance_summary(user: Annotated[User, Depends(check_admin)],session:
         
         result = session.exec(stmt).all()
         
-        # Debug: Print the number of results
-        print(f"Found {len(result)} attendance records")
-        
+        logger.debug(f"Found {len(result)} attendance groups for {today}")
+
         # If no results, create empty dataset with default values
         if not result:
-            print("No attendance data found for today")
             # Create default empty data for all classes
+            # Bounded to the current academic year so only its partition is scanned
+            year_start, year_end = academic_year_bounds(current_academic_year())
             class_ids = session.exec(
-                select(Attendance.class_name_id).distinct()
+                select(Attendance.class_name_id)
+                .where(Attendance.attendance_date >= year_start, Attendance.attendance_date < year_end)
+                .distinct()
             ).all()
             
             class_data = {
@@ -215,6 +258,13 @@ def get_student_summary(
             select(func.count(func.distinct(Attendance.student_id)))
             .where(Attendance.attendance_date == selected_date)
         ).first() or 0
+
+        # Archived years live in cold storage, not in the attendance table
+        day_start, day_end = selected_date, selected_date + timedelta(days=1)
+        for row in cold_storage.aggregate(
+            "attendance", day_start, day_end, [("student_id", "count_distinct")]
+        ):
+            marked_count += row["student_id_count_distinct"]
         
         unmarked_count = total_students - marked_count
 
@@ -231,7 +281,10 @@ def get_student_summary(
                 func.count(Attendance.attendance_id).label("count")
             )
             .join(Attendance)
-            .where(func.date(Attendance.attendance_date) == selected_date)
+            .where(
+                Attendance.attendance_date >= selected_date,
+                Attendance.attendance_date < selected_date + timedelta(days=1)
+            )
             .group_by(AttendanceValue.attendance_value)
         ).all()
         
@@ -240,6 +293,18 @@ def get_student_summary(
                 if value in summary_data:
                     summary_data[value] = count
 
+        cold_counts = cold_storage.aggregate(
+            "attendance", day_start, day_end, [("attendance_id", "count")], group_by=["attendance_value_id"]
+        )
+        if cold_counts:
+            value_names = {
+                v.attendance_value_id: v.attendance_value for v in session.exec(select(AttendanceValue)).all()
+            }
+            for row in cold_counts:
+                value = value_names.get(row["attendance_value_id"])
+                if value in summary_data:
+                    summary_data[value] += row["attendance_id_count"]
+
         summary = StudentSummary(
             total_students=total_students,
             present=summary_data["Present"],
@@ -277,7 +342,7 @@ def get_student_summary(
         return StudentGraphData(summary=summary, graph=graph_data)
         
     except Exception as e:
-        print(f"Error processing date {date}: {str(e)}")  # Debug log
+        logger.error(f"Error processing date {date}: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Error fetching student summary: {str(e)}"
@@ -314,6 +379,12 @@ def get_income_summary(
         for row in result:
             cat_name = cat_id_to_name.get(row.category_id, f"Unknown-{row.category_id}")
             category_summary[cat_name] = float(row.total_amount or 0)
+        period_start, period_end = _period_bounds(year, month)
+        for row in cold_storage.aggregate(
+            "income", period_start, period_end, [("amount", "sum")], group_by=["category_id"]
+        ):
+            cat_name = cat_id_to_name.get(row["category_id"], f"Unknown-{row['category_id']}")
+            category_summary[cat_name] = category_summary.get(cat_name, 0.0) + float(row["amount_sum"] or 0)
         amounts = [category_summary[cat] for cat in categories]
 
         # Graph data
@@ -386,6 +457,12 @@ def get_expense_summary(
         for row in result:
             cat_name = cat_id_to_name.get(row.category_id, f"Unknown-{row.category_id}")
             category_summary[cat_name] = float(row.total_amount or 0)
+        period_start, period_end = _period_bounds(year, month)
+        for row in cold_storage.aggregate(
+            "expense", period_start, period_end, [("amount", "sum")], group_by=["category_id"]
+        ):
+            cat_name = cat_id_to_name.get(row["category_id"], f"Unknown-{row['category_id']}")
+            category_summary[cat_name] = category_summary.get(cat_name, 0.0) + float(row["amount_sum"] or 0)
         amounts = [category_summary[cat] for cat in categories]
 
         # Graph data
@@ -485,37 +562,23 @@ def get_income_expense_summary(
     user: Annotated[User, Depends(check_admin)],
     year: int = datetime.now().year, session: Session = Depends(get_session)):
     """Get combined income and expense summary for comparison."""
+    return dashboard_flights.do(("income-expense-summary", year), lambda: _income_expense_summary(session, year))
+
+
+def _income_expense_summary(session: Session, year: int) -> dict:
     try:
-        # Get income by month
-        income_stmt = (
-            select(
-                func.extract('month', Income.date).label('month'),
-                func.sum(Income.amount).label("total_amount")
-            )
-            .where(func.extract("year", Income.date) == year)
-            .group_by(func.extract('month', Income.date))
-            .order_by('month')
-        )
-        income_result = session.exec(income_stmt).all()
-        
-        # Get expenses by month
-        expense_stmt = (
-            select(
-                func.extract('month', Expense.date).label('month'),
-                func.sum(Expense.amount).label("total_amount")
-            )
-            .where(func.extract("year", Expense.date) == year)
-            .group_by(func.extract('month', Expense.date))
-            .order_by('month')
+        # Monthly totals come from the maintained ledger (archived years included)
+        ledger_stmt = (
+            select(MonthlyLedger.month, MonthlyLedger.kind, func.sum(MonthlyLedger.amount).label("total_amount"))
+            .where(MonthlyLedger.year == year)
+            .group_by(MonthlyLedger.month, MonthlyLedger.kind)
         )
-        expense_result = session.exec(expense_stmt).all()
-        
+        ledger_result = session.exec(ledger_stmt).all()
+
         # Initialize monthly summaries
         month_summary = {i: {"income": 0, "expense": 0, "profit": 0} for i in range(1, 13)}
-        for row in income_result:
-            month_summary[row.month]["income"] = row.total_amount
-        for row in expense_result:
-            month_summary[row.month]["expense"] = row.total_amount
+        for row in ledger_result:
+            month_summary[row.month][row.kind] = row.total_amount
         for month in month_summary:
             month_summary[month]["profit"] = month_summary[month]["income"] - month_summary[month]["expense"]
 
@@ -590,6 +653,27 @@ def get_income_expense_summary(
             detail=f"Error fetching financial summary: {str(e)}"
         )
 
+@dashboard_router.get("/coalescing-stats", response_model=dict)
+def get_coalescing_stats(user: Annotated[User, Depends(check_admin)]):
+    """How many dashboard summary requests ran their query and how many shared an in-flight one."""
+    return dashboard_flights.stats()
+
+@dashboard_router.get("/ledger", response_model=LedgerResponse)
+def get_monthly_ledger(
+    user: Annotated[User, Depends(check_admin)],
+    start_year: int = Query(default=datetime.now().year),
+    start_month: int = Query(default=1, ge=1, le=12),
+    end_year: int = Query(default=datetime.now().year),
+    end_month: int = Query(default=12, ge=1, le=12),
+    by_category: bool = Query(default=False),
+    session: Session = Depends(get_session)
+):
+    """Monthly income, expense, net and running balance for any month range, optionally per category."""
+    try:
+        return ledger.monthly_ledger(session, start_year, start_month, end_year, end_month, by_category)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @dashboard_router.get("/fee-summary")
 def get_fee_summary(
     user: Annotated[User, Depends(check_admin)],
@@ -603,6 +687,11 @@ def get_fee_summary(
                 detail=f"Invalid year: {year}. Year must be between 2000 and {current_year + 5}"
             )
 
+        cache = get_cache()
+        cached = cache.get(FEE_SUMMARY_CACHE, str(year))
+        if cached is not MISSING:
+            return cached
+
         stmt = (
             select(
                 func.extract('month', Fee.created_at).label('month'),
@@ -616,7 +705,7 @@ def get_fee_summary(
         try:
             result = session.exec(stmt).all()
         except Exception as db_error:
-            print(f"Database error fetching fee data: {str(db_error)}")
+            logger.error(f"Database error fetching fee data: {str(db_error)}")
             raise HTTPException(
                 status_code=500,
                 detail=f"Database error: {str(db_error)}"
@@ -626,6 +715,9 @@ def get_fee_summary(
         for row in result:
             if row.month is not None and 1 <= row.month <= 12:
                 month_summary[row.month] = float(row.total_amount or 0)
+        year_start, year_end = _period_bounds(year)
+        for row in cold_storage.aggregate("fee", year_start, year_end, [("fee_amount", "sum")], by_month=True):
+            month_summary[row["month"]] += float(row["fee_amount_sum"] or 0)
 
         month_names = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", 
                       "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
@@ -660,12 +752,14 @@ def get_fee_summary(
             )
         }
 
+        response = jsonable_encoder(response)
+        cache.set(FEE_SUMMARY_CACHE, str(year), response)
         return response
 
     except HTTPException as he:
         raise he
     except Exception as e:
-        print(f"Error in fee summary: {str(e)}")
+        logger.error(f"Error in fee summary: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Error fetching fee summary: {str(e)}"
@@ -0,0 +1,61 @@
+import asyncio
+from typing import Annotated, Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from schemas.diagnostics_model import SlowQueryLogResponse
+from user.user_crud import check_admin
+from user.user_models import User
+from utils import slow_queries
+from utils.profiler import Sampler, profile_lock
+
+diagnostics_router = APIRouter(
+    prefix="/admin/diagnostics",
+    tags=["Diagnostics"],
+    responses={404: {"Description": "Not found"}}
+)
+
+
+@diagnostics_router.get("/slow-queries", response_model=SlowQueryLogResponse)
+def get_slow_queries(
+    user: Annotated[User, Depends(check_admin)],
+    limit: int = Query(default=50, ge=1, le=1000),
+):
+    """Most recent slow statements, newest first (Admin only). Enable with SLOW_QUERY_LOG_ENABLED."""
+    log = slow_queries.slow_query_log
+    if log is None:
+        return SlowQueryLogResponse(enabled=False, entries=[])
+    return SlowQueryLogResponse(enabled=True, threshold_ms=log.threshold * 1000, entries=log.entries(limit))
+
+
+@diagnostics_router.delete("/slow-queries", response_model=dict)
+def clear_slow_queries(user: Annotated[User, Depends(check_admin)]):
+    """Empty the slow query log (Admin only)."""
+    if slow_queries.slow_query_log is not None:
+        slow_queries.slow_query_log.clear()
+    return {"message": "Slow query log cleared"}
+
+
+@diagnostics_router.post("/profile")
+async def profile_worker(
+    user: Annotated[User, Depends(check_admin)],
+    seconds: float = Query(default=10, gt=0, le=120),
+    interval_ms: float = Query(default=5, ge=1, le=100),
+    file_format: Literal["speedscope", "collapsed"] = Query(default="speedscope", alias="format"),
+    include_idle: bool = Query(default=False),
+):
+    """
+    Sample every thread of the worker that serves this call for `seconds` and
+    return speedscope JSON or collapsed stacks (Admin only). Other workers
+    are not affected; repeat the call to profile them.
+    """
+    if not profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already running in this worker")
+    try:
+        sampler = Sampler(interval_ms / 1000, include_idle=include_idle).start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop()
+    finally:
+        profile_lock.release()
+    return sampler.response(file_format, f"worker-{seconds:g}s")
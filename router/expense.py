@@ -1,6 +1,6 @@
-from typing import List, Annotated, Optional
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Annotated, Literal, Optional
+from datetime import date, datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 from sqlmodel import Session, select
 
@@ -9,6 +9,8 @@ from schemas.expense_model import Expense, ExpenseCreate, ExpenseResponse, Expen
 from schemas.expense_cat_names_model import ExpenseCatNames  # Import ExpenseCatNames
 from user.user_crud import check_admin, check_authenticated_user
 from user.user_models import User, UserRole
+from utils import cold_storage, ledger
+from utils.ledger_export import export_ledger
 
 expense_router = APIRouter(
     prefix="/expenses",
@@ -42,6 +44,7 @@ def create_expense(
     session.add(db_expense)
 
     try:
+        ledger.record_change(session, "expense", None, ledger.entry_of(db_expense))
         session.commit()
         session.refresh(db_expense)
     except Exception as e:
@@ -65,7 +68,8 @@ def create_expense(
 
 @expense_router.get("/expenses-all/", response_model=List[ExpenseResponse])
 def read_expenses(user: Annotated[User, Depends(check_admin)], session: Session = Depends(get_session)):
-    expenses = session.exec(select(Expense)).all()
+    expenses = session.exec(select(Expense)).all() + [Expense(**row) for row in cold_storage.scan("expense")]
+    categories = dict(session.exec(select(ExpenseCatNames.expense_cat_name_id, ExpenseCatNames.expense_cat_name)).all())
     # Map category to its string representation
     return [
         ExpenseResponse(
@@ -73,7 +77,7 @@ def read_expenses(user: Annotated[User, Depends(check_admin)], session: Session
             created_at=expense.created_at,
             recipt_number=expense.recipt_number,
             date=expense.date,
-            category=expense.category.expense_cat_name if expense.category else None,
+            category=categories.get(expense.category_id),
             to_whom=expense.to_whom,
             description=expense.description,
             amount=expense.amount,
@@ -81,6 +85,40 @@ def read_expenses(user: Annotated[User, Depends(check_admin)], session: Session
         for expense in expenses
     ]
 
+@expense_router.get("/export")
+def export_expenses(
+    user: Annotated[User, Depends(check_admin)],
+    session: Annotated[Session, Depends(get_session)],
+    start_date: Optional[date] = Query(None, description="First expense date to include"),
+    end_date: Optional[date] = Query(None, description="Last expense date to include"),
+    file_format: Literal["csv", "xlsx"] = Query("csv", alias="format"),
+):
+    """Stream the expense ledger as CSV or XLSX, optionally limited to a date range."""
+    stmt = (
+        select(
+            Expense.id, Expense.date, Expense.recipt_number, ExpenseCatNames.expense_cat_name,
+            Expense.to_whom, Expense.description, Expense.amount, Expense.created_at
+        )
+        .join(ExpenseCatNames, ExpenseCatNames.expense_cat_name_id == Expense.category_id, isouter=True)
+        .order_by(Expense.date.asc().nulls_last(), Expense.id)
+    )
+    end = end_date + timedelta(days=1) if end_date else None
+    if start_date:
+        stmt = stmt.where(Expense.date >= start_date)
+    if end:
+        stmt = stmt.where(Expense.date < end)
+    archived = cold_storage.scan("expense", start_date, end)
+    categories = dict(session.exec(
+        select(ExpenseCatNames.expense_cat_name_id, ExpenseCatNames.expense_cat_name)
+    ).all()) if archived else {}
+    archived_rows = [
+        (row["id"], row["date"], row["recipt_number"], categories.get(row["category_id"]), row["to_whom"],
+         row["description"], row["amount"], row["created_at"])
+        for row in archived
+    ]
+    headers = ["id", "date", "recipt_number", "category", "to_whom", "description", "amount", "created_at"]
+    return export_ledger(session, stmt, headers, "expense", file_format, start_date, end_date, archived_rows)
+
 @expense_router.get("/{expense_id}", response_model=ExpenseResponse)
 def read_expense(user: Annotated[User, Depends(check_admin)],expense_id: int, session: Session = Depends(get_session)):
     expense = session.get(Expense, expense_id)
@@ -106,11 +144,13 @@ def update_expense(user: Annotated[User, Depends(check_admin)],
     if not db_expense:
         raise HTTPException(
             status_code=404, detail="Expense not found")
+    old_entry = ledger.entry_of(db_expense)
 
     for key, value in expense_update.dict(exclude_unset=True).items():
         setattr(db_expense, key, value)
 
     try:
+        ledger.record_change(session, "expense", old_entry, ledger.entry_of(db_expense))
         session.commit()
         session.refresh(db_expense)
     except Exception as e:
@@ -137,8 +177,15 @@ def delete_expense(user: Annotated[User, Depends(check_admin)],expense_id: int,
     if not expense:
         raise HTTPException(
             status_code=404, detail="Expense not found")
-    session.delete(expense)
-    session.commit()
+    try:
+        ledger.record_change(session, "expense", ledger.entry_of(expense), None)
+        session.delete(expense)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise HTTPException(
+            status_code=500, detail="Error deleting expense."
+        )
     return {"message": "Expense deleted successfully"}
 
 @expense_router.get("/filter-by-category/{category_id}", response_model=List[ExpenseResponse])
@@ -149,19 +196,15 @@ def filter_expense_by_category(
 ):
     """Compatibility endpoint for older frontend callers (/filter-by-category/{id})."""
     try:
-        if category_id == 0:
-            expenses = session.exec(select(Expense)).all()
-        else:
-            expenses = session.exec(
-                select(Expense).where(Expense.category_id == category_id)
-            ).all()
-
-        if not expenses:
-            return []
+        # Resolve category names with one join instead of a lookup per row
+        stmt = select(Expense, ExpenseCatNames).join(
+            ExpenseCatNames, ExpenseCatNames.expense_cat_name_id == Expense.category_id, isouter=True
+        )
+        if category_id != 0:
+            stmt = stmt.where(Expense.category_id == category_id)
 
         result = []
-        for expense in expenses:
-            category = session.get(ExpenseCatNames, expense.category_id)
+        for expense, category in session.exec(stmt).all():
             result.append(
                 ExpenseResponse(
                     id=expense.id,
@@ -5,13 +5,21 @@ from sqlmodel import Session, select
 from router.class_names import get_class_name
 from schemas.students_model import Students
 from schemas.class_names_model import ClassNames
-from router.students import get_student_by_id, get_student_details
-from sqlalchemy import func
-from datetime import datetime
+from router.students import get_student_details
+from sqlalchemy import exists, func, insert, literal, text
+from datetime import date, datetime, timedelta
+from typing import Literal
 from schemas.fee_model import MONTHS
+from router.dashboard import FEE_SUMMARY_CACHE
+from utils import cold_storage, finance_analytics
+from utils.cache import get_cache
+from utils.ledger_export import export_ledger
 
 from db import get_session
-from schemas.fee_model import Fee, FeeCreate, FeeResponse, FeeStatus, FeeUpdateRequest, FeeFilter, FilterPaidUnpaid
+from schemas.fee_model import (
+    Fee, FeeCreate, FeeGenerate, FeeGenerateResponse, FeeResponse, FeeStatus,
+    FeeUpdateRequest, FeeFilter, FilterPaidUnpaid
+)
 from user.user_crud import check_admin, check_authenticated_user
 from user.user_models import User
 
@@ -30,31 +38,101 @@ async def get_all_fees(
     db: Annotated[Session, Depends(get_session)],
     current_user: Annotated[User, Depends(check_authenticated_user)]
 ):
-    """Retrieve all student fee records (Authenticated users)."""
-    fees = db.exec(select(Fee)).all()
-    
-    response_list = []
-    for fee in fees:
-        student = await get_student_by_id(db, fee.student_id)
-        class_name = db.exec(
-            select(ClassNames)
-            .where(ClassNames.class_name_id == fee.class_id)
-        ).first()
-        
-        response = FeeResponse(
-            fee_id=fee.fee_id,
-            created_at=fee.created_at,
-            student_name=student.student_name if student else None,
-            father_name=student.father_name if student else None,
-            class_name=class_name.class_name if class_name else None,
-            fee_amount=fee.fee_amount,
-            fee_month=fee.fee_month,
-            fee_year=str(fee.fee_year),
-            fee_status=fee.fee_status
+    """Retrieve all student fee records, archived years included (Authenticated users)."""
+    return _fee_responses(db, select(Fee)) + _loaded_fee_responses(db, _archived_fees())
+
+def _fee_response(fee: Fee, student_name, father_name, class_name) -> FeeResponse:
+    return FeeResponse(
+        fee_id=fee.fee_id,
+        created_at=fee.created_at,
+        student_name=student_name,
+        father_name=father_name,
+        class_name=class_name,
+        fee_amount=fee.fee_amount,
+        fee_month=fee.fee_month,
+        fee_year=str(fee.fee_year),
+        fee_status=fee.fee_status
+    )
+
+def _fee_responses(db: Session, query) -> List[FeeResponse]:
+    """Run a `select(Fee)` query with student and class names joined in, one statement in total."""
+    # execute, not exec: exec would return only the Fee column of each row
+    rows = db.execute(
+        query.add_columns(Students.student_name, Students.father_name, ClassNames.class_name)
+        .outerjoin(Students, Students.student_id == Fee.student_id)
+        .outerjoin(ClassNames, ClassNames.class_name_id == Fee.class_id)
+    ).all()
+    return [_fee_response(*row) for row in rows]
+
+def _archived_fees(**equals) -> List[Fee]:
+    """Fee rows of archived years (utils/cold_storage.py) matching `equals`, as detached Fee objects."""
+    return [
+        Fee(**{**row, "fee_status": FeeStatus(row["fee_status"])})
+        for row in cold_storage.scan("fee", equals=equals)
+    ]
+
+def _nulls_last(value):
+    return (value is None, value if value is not None else 0)
+
+def _loaded_fee_responses(db: Session, fees: List[Fee]) -> List[FeeResponse]:
+    """Like `_fee_responses` for Fee objects already in hand (e.g. archived): names are looked up in bulk."""
+    if not fees:
+        return []
+    students = {
+        student_id: (student_name, father_name)
+        for student_id, student_name, father_name in db.execute(
+            select(Students.student_id, Students.student_name, Students.father_name)
+            .where(Students.student_id.in_({fee.student_id for fee in fees}))
+        ).all()
+    }
+    classes = dict(db.execute(select(ClassNames.class_name_id, ClassNames.class_name)).all())
+    return [
+        _fee_response(fee, *students.get(fee.student_id, (None, None)), classes.get(fee.class_id))
+        for fee in fees
+    ]
+
+@fee_router.get("/export")
+async def export_fees(
+    current_user: Annotated[User, Depends(check_admin)],
+    db: Annotated[Session, Depends(get_session)],
+    start_date: Optional[date] = Query(None, description="First fee record date to include"),
+    end_date: Optional[date] = Query(None, description="Last fee record date to include"),
+    file_format: Literal["csv", "xlsx"] = Query("csv", alias="format"),
+):
+    """Stream the fee ledger as CSV or XLSX, optionally limited to a created_at date range (Admin only)."""
+    stmt = (
+        select(
+            Fee.fee_id, Fee.created_at, Students.student_id, Students.student_name, Students.father_name,
+            ClassNames.class_name, Fee.fee_month, Fee.fee_year, Fee.fee_status, Fee.fee_amount
         )
-        response_list.append(response)
-    
-    return response_list
+        .join(Students, Students.student_id == Fee.student_id, isouter=True)
+        .join(ClassNames, ClassNames.class_name_id == Fee.class_id, isouter=True)
+        .order_by(Fee.created_at, Fee.fee_id)
+    )
+    end = end_date + timedelta(days=1) if end_date else None
+    if start_date:
+        stmt = stmt.where(Fee.created_at >= start_date)
+    if end:
+        stmt = stmt.where(Fee.created_at < end)
+    archived = cold_storage.scan("fee", start_date, end)
+    students = {
+        student_id: (student_name, father_name)
+        for student_id, student_name, father_name in db.execute(
+            select(Students.student_id, Students.student_name, Students.father_name)
+            .where(Students.student_id.in_({row["student_id"] for row in archived}))
+        ).all()
+    } if archived else {}
+    classes = dict(db.execute(select(ClassNames.class_name_id, ClassNames.class_name)).all()) if archived else {}
+    archived_rows = [
+        (row["fee_id"], row["created_at"], row["student_id"], *students.get(row["student_id"], (None, None)),
+         classes.get(row["class_id"]), row["fee_month"], row["fee_year"], row["fee_status"], row["fee_amount"])
+        for row in archived
+    ]
+    headers = [
+        "fee_id", "created_at", "student_id", "student_name", "father_name",
+        "class_name", "fee_month", "fee_year", "fee_status", "fee_amount"
+    ]
+    return export_ledger(db, stmt, headers, "fee", file_format, start_date, end_date, archived_rows)
 
 @fee_router.post("/add_fee", response_model=FeeResponse, status_code=status.HTTP_201_CREATED)
 async def create_fee(
@@ -90,6 +168,7 @@ async def create_fee(
         db.add(new_fee)
         db.commit()
         db.refresh(new_fee)
+        get_cache().invalidate(FEE_SUMMARY_CACHE, str(new_fee.created_at.year))
 
         response = FeeResponse(
             fee_id=new_fee.fee_id,
@@ -114,6 +193,85 @@ async def create_fee(
             detail=f"Error creating fee record: {str(e)}"
         )
 
+@fee_router.post("/generate", response_model=FeeGenerateResponse, status_code=status.HTTP_201_CREATED)
+async def generate_fees(
+    request: FeeGenerate,
+    db: Annotated[Session, Depends(get_session)],
+    current_user: Annotated[User, Depends(check_admin)]
+):
+    """Create fee rows for every student of a class (or the whole school) for one month,
+    skipping students who already have a fee row for that month (Admin only)."""
+    if request.fee_month not in MONTHS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid month. Must be one of {MONTHS}"
+        )
+    fee_year = str(request.fee_year)
+
+    try:
+        if request.class_id is not None:
+            if not get_class_name(db, request.class_id):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Class with ID {request.class_id} not found"
+                )
+
+        if db.connection().dialect.name == "postgresql":
+            # Serialize concurrent generate calls so the NOT EXISTS check can't race
+            db.execute(text("SELECT pg_advisory_xact_lock(hashtext('fee_generate'))"))
+
+        already_billed = exists().where(
+            Fee.student_id == Students.student_id,
+            Fee.fee_month == request.fee_month,
+            Fee.fee_year == fee_year
+        )
+        students_in_scope = (
+            select(Students.student_id, ClassNames.class_name_id)
+            .join(ClassNames, ClassNames.class_name == Students.class_name)
+        )
+        if request.class_id is not None:
+            students_in_scope = students_in_scope.where(ClassNames.class_name_id == request.class_id)
+
+        fee_table = Fee.__table__
+        created_at = datetime.now()
+        source = students_in_scope.where(~already_billed).add_columns(
+            literal(request.fee_amount, fee_table.c.fee_amount.type),
+            literal(request.fee_month, fee_table.c.fee_month.type),
+            literal(fee_year, fee_table.c.fee_year.type),
+            literal(request.fee_status, fee_table.c.fee_status.type),
+            literal(created_at, fee_table.c.created_at.type),
+        )
+        stmt = insert(fee_table).from_select(
+            ["student_id", "class_id", "fee_amount", "fee_month", "fee_year", "fee_status", "created_at"],
+            source
+        ).returning(fee_table.c.fee_id)
+
+        skipped = db.exec(
+            select(func.count()).select_from(students_in_scope.where(already_billed).subquery())
+        ).one()
+        fee_ids = list(db.execute(stmt).scalars().all())
+        db.commit()
+        if fee_ids:
+            get_cache().invalidate(FEE_SUMMARY_CACHE, str(created_at.year))
+
+        return FeeGenerateResponse(
+            class_id=request.class_id,
+            fee_month=request.fee_month,
+            fee_year=fee_year,
+            created=len(fee_ids),
+            skipped=skipped,
+            fee_ids=fee_ids
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error generating fee records: {str(e)}"
+        )
+
 @fee_router.delete("/delete_fee/{fee_id}", response_model=dict, status_code=status.HTTP_200_OK)
 async def delete_fee(
     fee_id: int,
@@ -131,6 +289,8 @@ async def delete_fee(
 
         db.delete(fee)
         db.commit()
+        finance_analytics.invalidate(fee.created_at)
+        get_cache().invalidate(FEE_SUMMARY_CACHE, str(fee.created_at.year))
         return {"message": "Fee deleted successfully"}
        
     except Exception as e:
@@ -170,31 +330,19 @@ async def filter_fees(
         if sort_by:
             if hasattr(Fee, sort_by):
                 query = query.order_by(getattr(Fee, sort_by))
-                
-        query = query.offset(skip).limit(limit)
 
-        fees = db.exec(query).all()
-
-        filtered_response = []
-        for fee in fees:
-            student_details = get_student_details(db, fee.student_id)
-            class_name = get_class_name(db, fee.class_id)
+        archived = _archived_fees(
+            student_id=student_id, class_id=class_id, fee_month=fee_month,
+            fee_year=str(fee_year) if fee_year else None, fee_status=fee_status,
+        )
+        if not archived:
+            return _fee_responses(db, query.offset(skip).limit(limit))
 
-            filtered_response.append(
-                FeeResponse(
-                    fee_id=fee.fee_id,
-                    created_at=fee.created_at,
-                    student_name=student_details["student_name"] if student_details else None,
-                    father_name=student_details["father_name"] if student_details else None,
-                    class_name=class_name,
-                    fee_amount=fee.fee_amount,
-                    fee_month=fee.fee_month,
-                    fee_year=str(fee.fee_year),
-                    fee_status=fee.fee_status
-                )
-            )
-        
-        return filtered_response
+        # Archived rows follow the hot ones, or are merged in when sorting by a column
+        fees = db.exec(query.limit(skip + limit)).all() + archived
+        if sort_by and sort_by in Fee.__table__.columns:
+            fees.sort(key=lambda fee: _nulls_last(getattr(fee, sort_by)))
+        return _loaded_fee_responses(db, fees[skip:skip + limit])
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -225,7 +373,10 @@ async def get_paid_students(
         if fee_year:
             query = query.where(Fee.fee_year == str(fee_year))
         
-        fees = db.exec(query).all()
+        fees = db.exec(query).all() + _archived_fees(
+            fee_status=FeeStatus.PAID, class_id=class_id, fee_month=fee_month,
+            fee_year=str(fee_year) if fee_year else None,
+        )
         students_list = []
 
         for fee in fees:
@@ -265,7 +416,8 @@ async def get_unpaid_students(
 ):
     """Get students who haven't paid fees for the specified month/year/class."""
     try:
-        paid_students_subquery = select(Fee.student_id)
+        # Only paid rows count: generated (unpaid) fee rows must not hide a student
+        paid_students_subquery = select(Fee.student_id).where(Fee.fee_status == FeeStatus.PAID)
         
         if class_id:
             paid_students_subquery = paid_students_subquery.where(Fee.class_id == class_id)
@@ -277,6 +429,12 @@ async def get_unpaid_students(
         unpaid_students_query = select(Students).where(
             Students.student_id.not_in(paid_students_subquery)
         )
+        paid_archived = {fee.student_id for fee in _archived_fees(
+            fee_status=FeeStatus.PAID, class_id=class_id, fee_month=fee_month,
+            fee_year=str(fee_year) if fee_year else None,
+        )}
+        if paid_archived:
+            unpaid_students_query = unpaid_students_query.where(Students.student_id.not_in(paid_archived))
         
         if class_id:
             class_name = get_class_name(db, class_id)
@@ -346,7 +504,9 @@ async def get_class_fee_status(
         if fee_year:
             fee_query = fee_query.where(Fee.fee_year == str(fee_year))
             
-        all_fees = db.exec(fee_query).all()
+        all_fees = db.exec(fee_query).all() + _archived_fees(
+            class_id=class_id, fee_month=fee_month, fee_year=str(fee_year) if fee_year else None,
+        )
         
         student_fee_status = {}
         for fee in all_fees:
@@ -0,0 +1,241 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime, timedelta
+from typing import Annotated, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, false, literal, or_, true, tuple_, union_all
+from sqlmodel import Session, select
+
+from db import get_session
+from schemas.expense_cat_names_model import ExpenseCatNames
+from schemas.expense_model import Expense
+from schemas.finance_model import FinanceEntry, FinancePage, PeriodComparison
+from schemas.income_cat_names_model import IncomeCatNames
+from schemas.income_model import Income
+from user.user_crud import check_admin
+from user.user_models import User
+from utils import cold_storage, finance_analytics
+
+finance_router = APIRouter(
+    prefix="/finance",
+    tags=["Finance"],
+    responses={404: {"Description": "Not found"}}
+)
+
+# kind -> (model, category model, category id column, category name column, party column)
+SOURCES = {
+    "income": (Income, IncomeCatNames, IncomeCatNames.income_cat_name_id, IncomeCatNames.income_cat_name, Income.source),
+    "expense": (Expense, ExpenseCatNames, ExpenseCatNames.expense_cat_name_id, ExpenseCatNames.expense_cat_name, Expense.to_whom),
+}
+
+
+def _encode_cursor(sort_value, kind: str, row_id: int) -> str:
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, kind, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: str, sort: str):
+    try:
+        sort_value, kind, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if sort == "date":
+            # null: the page ended among the rows without a date
+            sort_value = None if sort_value is None else datetime.fromisoformat(sort_value)
+        else:
+            sort_value = float(sort_value)
+        if kind not in SOURCES:
+            raise ValueError(kind)
+        return sort_value, kind, int(row_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+
+def _after(kind: str, sort_column, id_column, cursor, descending: bool):
+    """
+    Keyset condition "(sort, kind, id) comes after cursor" for one source.
+    `kind` is a constant within a branch, so the tuple comparison reduces to
+    a condition on (sort, id) that an index on the sort column can serve.
+    Rows whose sort value is NULL (undated entries) come last in either order.
+    """
+    value, cursor_kind, cursor_id = cursor
+    if value is None:
+        if kind == cursor_kind:
+            after = id_column < cursor_id if descending else id_column > cursor_id
+        else:
+            after = true() if (kind < cursor_kind if descending else kind > cursor_kind) else false()
+        return and_(sort_column.is_(None), after)
+    if descending:
+        strictly_after, after_or_equal = sort_column < value, sort_column <= value
+        kind_after = kind < cursor_kind
+        id_after = tuple_(sort_column, id_column) < tuple_(value, cursor_id)
+    else:
+        strictly_after, after_or_equal = sort_column > value, sort_column >= value
+        kind_after = kind > cursor_kind
+        id_after = tuple_(sort_column, id_column) > tuple_(value, cursor_id)
+    if kind == cursor_kind:
+        return or_(id_after, sort_column.is_(None))
+    return or_(after_or_equal if kind_after else strictly_after, sort_column.is_(None))
+
+
+def _order_key(row: dict, sort: str, descending: bool):
+    # Same order as the SQL, for sorted(reverse=descending): NULLs last either way
+    return ((row[sort] is None) != descending, row[sort] or 0), row["kind"], row["id"]
+
+
+def _archived_entries(
+    session: Session, kind, start_date, end_date, min_amount, max_amount, category_id, search, sort, position, descending
+) -> List[dict]:
+    """
+    Rows of archived years (utils/cold_storage.py) matching the filters and
+    coming after the cursor, shaped like the SQL rows. Empty without touching
+    disk when the date range has no archived year.
+    """
+    end = end_date + timedelta(days=1) if end_date else None
+    entries = []
+    for source_kind, (model, cat_model, cat_id, cat_name, party) in SOURCES.items():
+        if kind not in ("all", source_kind):
+            continue
+        rows = cold_storage.scan(source_kind, start_date, end, equals={"category_id": category_id})
+        if not rows:
+            continue
+        names = dict(session.execute(select(cat_id, cat_name)).all())
+        needle = search.lower() if search else None
+        for row in rows:
+            if min_amount is not None and row["amount"] < min_amount:
+                continue
+            if max_amount is not None and row["amount"] > max_amount:
+                continue
+            if needle and not any(needle in (row[column] or "").lower() for column in (party.key, "description")):
+                continue
+            entry = {
+                "kind": source_kind,
+                "id": row["id"],
+                "date": row["date"],
+                "recipt_number": row["recipt_number"],
+                "category_id": row["category_id"],
+                "category": names.get(row["category_id"]),
+                "party": row[party.key],
+                "description": row["description"],
+                "amount": row["amount"],
+                "created_at": row["created_at"],
+            }
+            if position:
+                key = _order_key(entry, sort, descending)
+                cursor_key = _order_key(dict(zip((sort, "kind", "id"), position)), sort, descending)
+                if (key <= cursor_key) if not descending else (key >= cursor_key):
+                    continue
+            entries.append(entry)
+    return entries
+
+
+@finance_router.get("/query", response_model=FinancePage)
+def query_finance(
+    user: Annotated[User, Depends(check_admin)],
+    kind: Literal["all", "income", "expense"] = Query("all"),
+    start_date: Optional[date] = Query(None, description="First date to include"),
+    end_date: Optional[date] = Query(None, description="Last date to include"),
+    min_amount: Optional[float] = Query(None),
+    max_amount: Optional[float] = Query(None),
+    category_id: Optional[int] = Query(None, description="Requires kind=income or kind=expense"),
+    search: Optional[str] = Query(None, description="Matched against source/to_whom and description"),
+    sort: Literal["date", "amount"] = Query("date"),
+    order: Literal["asc", "desc"] = Query("desc"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    session: Session = Depends(get_session)
+):
+    """
+    Search income and expense records together with date, amount, category
+    and text filters. Results are ordered by `sort` and paginated with an
+    opaque keyset cursor, so deep pages cost the same as the first one.
+    """
+    if category_id and kind == "all":
+        raise HTTPException(status_code=400, detail="category_id requires kind=income or kind=expense")
+    descending = order == "desc"
+    position = _decode_cursor(cursor, sort) if cursor else None
+
+    branches = []
+    for source_kind, (model, cat_model, cat_id, cat_name, party) in SOURCES.items():
+        if kind not in ("all", source_kind):
+            continue
+        sort_column = model.date if sort == "date" else model.amount
+        stmt = (
+            select(
+                literal(source_kind).label("kind"),
+                model.id.label("id"),
+                model.date.label("date"),
+                model.recipt_number.label("recipt_number"),
+                model.category_id.label("category_id"),
+                cat_name.label("category"),
+                party.label("party"),
+                model.description.label("description"),
+                model.amount.label("amount"),
+                model.created_at.label("created_at"),
+            )
+            .join(cat_model, cat_id == model.category_id, isouter=True)
+        )
+        # Filters go on each branch so they are applied against the base tables' indexes
+        if start_date:
+            stmt = stmt.where(model.date >= start_date)
+        if end_date:
+            stmt = stmt.where(model.date < end_date + timedelta(days=1))
+        if min_amount is not None:
+            stmt = stmt.where(model.amount >= min_amount)
+        if max_amount is not None:
+            stmt = stmt.where(model.amount <= max_amount)
+        if category_id:
+            stmt = stmt.where(model.category_id == category_id)
+        if search:
+            stmt = stmt.where(or_(
+                party.icontains(search, autoescape=True),
+                model.description.icontains(search, autoescape=True),
+            ))
+        if position:
+            stmt = stmt.where(_after(source_kind, sort_column, model.id, position, descending))
+        branches.append(stmt)
+
+    combined = (union_all(*branches) if len(branches) > 1 else branches[0]).subquery()
+    direction = (lambda c: c.desc()) if descending else (lambda c: c.asc())
+    rows = [dict(row._mapping) for row in session.execute(
+        select(combined)
+        .order_by(direction(combined.c[sort]).nulls_last(), direction(combined.c.kind), direction(combined.c.id))
+        .limit(limit + 1)
+    ).all()]
+
+    archived = _archived_entries(
+        session, kind, start_date, end_date, min_amount, max_amount, category_id, search, sort, position, descending
+    )
+    if archived:
+        rows = sorted(
+            rows + archived, key=lambda row: _order_key(row, sort, descending), reverse=descending
+        )[:limit + 1]
+
+    items = [FinanceEntry(**row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = _encode_cursor(getattr(last, sort), last.kind, last.id)
+    return FinancePage(items=items, limit=limit, next_cursor=next_cursor)
+
+
+@finance_router.get("/analytics", response_model=PeriodComparison)
+def compare_periods(
+    user: Annotated[User, Depends(check_admin)],
+    granularity: Literal["month", "quarter", "academic_year"] = Query("month"),
+    periods: List[str] = Query(..., description="e.g. 2025-03 (month), 2025-Q2 (quarter), 2024 (academic year)"),
+    session: Session = Depends(get_session)
+):
+    """
+    Income, expense, net and fee collection for several periods side by side,
+    e.g. the same month across years or consecutive academic years.
+    """
+    try:
+        return PeriodComparison(
+            granularity=granularity,
+            periods=finance_analytics.compare_periods(session, granularity, periods),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
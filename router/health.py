@@ -0,0 +1,31 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from sqlalchemy.engine import Engine
+
+from db import get_engine
+from utils.health import readiness
+
+health_router = APIRouter(tags=["Health"])
+
+
+def probe_engine() -> Engine:
+    return get_engine()
+
+
+@health_router.get("/healthz")
+async def healthz():
+    """Liveness: the worker answers. Touches nothing else, so a database outage never restarts workers."""
+    return {"status": "ok"}
+
+
+@health_router.get("/readyz")
+def readyz(engine: Annotated[Engine, Depends(probe_engine)]):
+    """
+    Readiness: database round trip, pool saturation and cache reachability
+    (see utils/health.py). 503 while the worker should get no traffic:
+    database down or slow, pool exhausted, or shutting down.
+    """
+    report = readiness.check(engine)
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
@@ -1,13 +1,15 @@
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
-from typing import List, Optional  # Import List and Optional for response model
+from datetime import date, datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlmodel import Session, select
+from typing import List, Literal, Optional  # Import List and Optional for response model
 
 from db import get_session
 from schemas.income_model import Income, IncomeCreate, IncomeResponse, IncomeUpdate
 from user.user_crud import check_admin
 from user.user_models import User
 from schemas.income_cat_names_model import IncomeCatNames  # Import IncomeCatNames
+from utils import cold_storage, ledger
+from utils.ledger_export import export_ledger
 
 income_router = APIRouter(
     prefix="/income",
@@ -26,8 +28,8 @@ def get_all_incomes(
 ):
     """Get all income records."""
     try:
-        # Query to get all income records
-        incomes = session.query(Income).all()
+        # Query to get all income records, archived years included
+        incomes = session.query(Income).all() + [Income(**row) for row in cold_storage.scan("income")]
 
         # Prepare the response
         response = []
@@ -54,6 +56,40 @@ def get_all_incomes(
             detail=f"Error fetching income records: {str(e)}"
         )
 
+@income_router.get("/export")
+def export_incomes(
+    user: User = Depends(check_admin),
+    session: Session = Depends(get_session),
+    start_date: Optional[date] = Query(None, description="First income date to include"),
+    end_date: Optional[date] = Query(None, description="Last income date to include"),
+    file_format: Literal["csv", "xlsx"] = Query("csv", alias="format"),
+):
+    """Stream the income ledger as CSV or XLSX, optionally limited to a date range."""
+    stmt = (
+        select(
+            Income.id, Income.date, Income.recipt_number, IncomeCatNames.income_cat_name,
+            Income.source, Income.description, Income.contact, Income.amount, Income.created_at
+        )
+        .join(IncomeCatNames, IncomeCatNames.income_cat_name_id == Income.category_id, isouter=True)
+        .order_by(Income.date.asc().nulls_last(), Income.id)
+    )
+    end = end_date + timedelta(days=1) if end_date else None
+    if start_date:
+        stmt = stmt.where(Income.date >= start_date)
+    if end:
+        stmt = stmt.where(Income.date < end)
+    archived = cold_storage.scan("income", start_date, end)
+    categories = dict(session.execute(
+        select(IncomeCatNames.income_cat_name_id, IncomeCatNames.income_cat_name)
+    ).all()) if archived else {}
+    archived_rows = [
+        (row["id"], row["date"], row["recipt_number"], categories.get(row["category_id"]), row["source"],
+         row["description"], row["contact"], row["amount"], row["created_at"])
+        for row in archived
+    ]
+    headers = ["id", "date", "recipt_number", "category", "source", "description", "contact", "amount", "created_at"]
+    return export_ledger(session, stmt, headers, "income", file_format, start_date, end_date, archived_rows)
+
 @income_router.post("/", response_model=IncomeResponse, status_code=status.HTTP_201_CREATED)
 def create_income(
     income: IncomeCreate,
@@ -89,8 +125,16 @@ def create_income(
         created_at=datetime.now()  # Set created_at to current datetime
     )
     session.add(db_income)
-    session.commit()
-    session.refresh(db_income)
+    try:
+        ledger.record_change(session, "income", None, ledger.entry_of(db_income))
+        session.commit()
+        session.refresh(db_income)
+    except Exception as e:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error creating income: {str(e)}"
+        )
     
     # Return the response with the category name
     return IncomeResponse(
@@ -118,6 +162,7 @@ def update_income(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Income not found"
         )
+    old_entry = ledger.entry_of(db_income)
     
     # Update the fields if they are provided
     if income.recipt_number is not None:
@@ -145,8 +190,16 @@ def update_income(
     if db_income.created_at is None:
         db_income.created_at = datetime.utcnow()
 
-    session.commit()
-    session.refresh(db_income)
+    try:
+        ledger.record_change(session, "income", old_entry, ledger.entry_of(db_income))
+        session.commit()
+        session.refresh(db_income)
+    except Exception:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error updating income."
+        )
     
     # Get the updated category name
     category = session.get(IncomeCatNames, db_income.category_id)
@@ -176,8 +229,16 @@ def delete_income(
             detail="Income not found"
         )
     
-    session.delete(db_income)
-    session.commit()
+    try:
+        ledger.record_change(session, "income", ledger.entry_of(db_income), None)
+        session.delete(db_income)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error deleting income."
+        )
 
 @income_router.get("/filter_income", response_model=List[IncomeResponse])
 def filter_income(
@@ -187,16 +248,17 @@ def filter_income(
 ):
     """Filter income records by category_id, or return all if None or 0."""
     try:
+        # Resolve category names with one join instead of a lookup per row
+        stmt = select(Income, IncomeCatNames).join(
+            IncomeCatNames, IncomeCatNames.income_cat_name_id == Income.category_id, isouter=True
+        )
         # Return all when category_id is omitted or 0 (frontend uses 0 for "All")
-        if category_id is None or category_id == 0:
-            incomes = session.query(Income).all()
-        else:
-            incomes = session.query(Income).filter(Income.category_id == category_id).all()
+        if category_id:
+            stmt = stmt.where(Income.category_id == category_id)
 
         # Prepare the response
         filtered_response = []
-        for income in incomes:
-            category = session.get(IncomeCatNames, income.category_id)
+        for income, category in session.exec(stmt).all():
             filtered_response.append(
                 IncomeResponse(
                     id=income.id,  # type: ignore
@@ -10,7 +10,8 @@ from schemas.attendance_model import (
     Students,
     AttendanceValue,
 )
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import date, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlmodel import Session, select
 from typing import Annotated, List, Optional
 from user.user_models import User, UserRole
@@ -19,6 +20,7 @@ from sqlalchemy.exc import IntegrityError
 
 from db import get_session
 from user.user_models import User
+from utils import cold_storage
 
 mark_attendance_router = APIRouter(
     prefix="/mark_attendance",
@@ -26,12 +28,37 @@ mark_attendance_router = APIRouter(
     responses={404: {"description": "Marking Attendance of Students"}}
 )
 
+
+def _flag_archived(response: Response, attendance_date: Optional[str] = None) -> dict:
+    """
+    Attendance lists read only the live table; archived years are too large to
+    scan row by row. A date inside an archived year is rejected with 410, and
+    otherwise the archived years left out are listed in X-Archived-Years.
+    Returns that header so a 404 can carry it as well.
+    """
+    if attendance_date:
+        try:
+            day = date.fromisoformat(attendance_date[:10])
+        except ValueError:
+            day = None
+        if day and cold_storage.archived_years("attendance", day, day + timedelta(days=1)):
+            raise HTTPException(
+                status_code=410,
+                detail=f"Attendance for {day} is archived; see /dashboard/attendance-summary"
+            )
+    years = cold_storage.archived_years("attendance")
+    headers = {"X-Archived-Years": ",".join(str(year) for year in years)} if years else {}
+    response.headers.update(headers)
+    return headers
+
 @mark_attendance_router.get("/show_all_attendance", response_model=List[FilteredAttendanceResponse])
 def get_filtered_attendance(
     current_user: Annotated[User, Depends(get_current_user)],
+    response: Response,
     session: Session = Depends(get_session)
 ):
     """View attendance with role-based access"""
+    archived = _flag_archived(response)
     stmt = (
         select(
             Attendance.attendance_id,
@@ -59,7 +86,7 @@ def get_filtered_attendance(
 
     result = session.exec(stmt).all()
     if not result:
-        raise HTTPException(status_code=404, detail="No attendance records found")
+        raise HTTPException(status_code=404, detail="No attendance records found", headers=archived)
 
     return [
         {
@@ -143,7 +170,7 @@ def add_bulk_attendance(
 
     for attendance in bulk.attendances:
         # ✅ 1. Prevent marking attendance for future dates
-        if attendance.attendance_date > today:
+        if attendance.attendance_date.date() > today:
             skipped.append({
                 "student_id": attendance.student_id,
                 "reason": f"Future date {attendance.attendance_date} not allowed"
@@ -258,6 +285,7 @@ def update_attendance(
 @mark_attendance_router.get("/filter_attendance_by_ids", response_model=List[FilteredAttendanceResponse])
 def filter_attendance_by_ids(
     current_user: Annotated[User, Depends(get_current_user)],
+    response: Response,
     session: Session = Depends(get_session),
     attendance_date: Optional[str] = Query(None, description="Filter by Attendance date"),
     attendance_time_id: Optional[int] = Query(None, description="Filter by Attendance Time ID"),
@@ -287,6 +315,7 @@ def filter_attendance_by_ids(
         query = query.where(Attendance.teacher_name_id == teacher.teacher_name_id)
 
     # Apply the rest of the filters
+    archived = _flag_archived(response, attendance_date)
     if attendance_date:
         query = query.where(Attendance.attendance_date == attendance_date)
     if attendance_time_id:
@@ -308,7 +337,8 @@ def filter_attendance_by_ids(
     if not filtered_attendance:
         raise HTTPException(
             status_code=404,
-            detail="No attendance records found matching the criteria"
+            detail="No attendance records found matching the criteria",
+            headers=archived
         )
 
     # Rest of the function remains the same
@@ -388,6 +418,7 @@ def filter_attendance_by_ids(
 @mark_attendance_router.get("/filtered_attendance_by_name", response_model=List[FilteredAttendanceResponse])
 def get_filtered_attendance(
     current_user: Annotated[User, Depends(get_current_user)],
+    response: Response,
     session: Session = Depends(get_session),
     class_name: Optional[str] = Query(None, description="Filter by Class name"),
     teacher_name: Optional[str] = Query(None, description="Filter by Teacher name"),
@@ -405,6 +436,8 @@ def get_filtered_attendance(
             detail="Users cannot view attendance records"
         )
     
+    archived = _flag_archived(response, attendance_date)
+
     # Start with a base select statement
     query = select(Attendance)
 
@@ -429,8 +462,9 @@ def get_filtered_attendance(
 
     if not filtered_attendance:
         raise HTTPException(
-            status_code=404, 
-            detail="No attendance records found matching the criteria"
+            status_code=404,
+            detail="No attendance records found matching the criteria",
+            headers=archived
         )
 
     # Convert to response model
@@ -1,4 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import csv
+import io
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile
+from pydantic import ValidationError
+from sqlalchemy import insert
 from router.class_names import read_classname
 from schemas.class_names_model import ClassNames
 from sqlmodel import Session, select
@@ -8,9 +12,20 @@ from user.user_models import User, UserRole
 from user.user_crud import get_current_user
 
 from db import get_session
-from schemas.students_model import Students, StudentsCreate, StudentsResponse, StudentsUpdate
+from schemas.students_model import (
+    StudentImportError,
+    StudentImportResponse,
+    Students,
+    StudentsCreate,
+    StudentsResponse,
+    StudentsUpdate,
+)
 from user.user_crud import check_admin
 from user.user_models import User
+from utils.bulk_load import executemany_insert, insert_rows
+
+IMPORT_CHUNK_SIZE = 1000
+STUDENT_COLUMNS = list(StudentsCreate.model_fields)
 
 students_router = APIRouter(
     prefix="/students",
@@ -36,18 +51,118 @@ def create_student(user: Annotated[User, Depends(check_admin)],student: Students
 
 @students_router.post("/add_bulk/", response_model=List[StudentsResponse])
 def create_bulk_students(user: Annotated[User, Depends(check_admin)],students: List[StudentsCreate], session: Annotated[Session, Depends(get_session)]):
-    db_students = [Students(**student.model_dump()) for student in students]
-    session.add_all(db_students)
-
+    if not students:
+        return []
     try:
+        # One INSERT ... RETURNING for the whole list instead of a refresh per student
+        db_students = session.scalars(
+            insert(Students).returning(Students, sort_by_parameter_order=True),
+            [student.model_dump() for student in students]
+        ).all()
+        response = [StudentsResponse.model_validate(student) for student in db_students]
         session.commit()
-        for student in db_students:
-            session.refresh(student)
     except Exception as e:
         session.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
-    return db_students
+    return response
+
+
+def _iter_csv_records(upload: UploadFile):
+    stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    for record in csv.DictReader(stream):
+        yield {key.strip(): value for key, value in record.items() if key}
+
+
+def _iter_xlsx_records(upload: UploadFile):
+    from openpyxl import load_workbook  # only imported by the XLSX paths
+
+    workbook = load_workbook(upload.file, read_only=True, data_only=True)
+    rows = workbook.active.iter_rows(values_only=True)
+    header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+    for values in rows:
+        if all(value is None for value in values):
+            continue
+        yield {
+            key: value if value is None or hasattr(value, "isoformat") else str(value)
+            for key, value in zip(header, values) if key
+        }
+
+
+def _load_student_chunk(session: Session, chunk: List[tuple]):
+    """Insert a validated chunk; if the fast path fails, retry row by row to isolate bad rows."""
+    try:
+        with session.begin_nested():
+            return insert_rows(session, Students, STUDENT_COLUMNS, [row for _, row in chunk]), []
+    except Exception:
+        ids, errors = [], []
+        for row_no, row in chunk:
+            try:
+                with session.begin_nested():
+                    ids += executemany_insert(session, Students, [row])
+            except Exception as e:
+                errors.append(StudentImportError(row=row_no, errors=[str(getattr(e, "orig", e))]))
+        return ids, errors
+
+
+@students_router.post("/import/", response_model=StudentImportResponse)
+def import_students(
+    user: Annotated[User, Depends(check_admin)],
+    file: UploadFile,
+    session: Annotated[Session, Depends(get_session)]
+):
+    """Import students from a CSV or XLSX file whose header row uses the StudentsCreate field names.
+    Invalid rows are reported and skipped; valid rows are loaded in chunks."""
+    filename = (file.filename or "").lower()
+    if filename.endswith(".xlsx"):
+        records = _iter_xlsx_records(file)
+    elif filename.endswith(".csv") or file.content_type in ("text/csv", "application/vnd.ms-excel"):
+        records = _iter_csv_records(file)
+    else:
+        raise HTTPException(status_code=400, detail="Unsupported file type, expected .csv or .xlsx")
+
+    total = 0
+    student_ids: List[int] = []
+    errors: List[StudentImportError] = []
+    chunk: List[tuple] = []
+
+    def flush():
+        ids, chunk_errors = _load_student_chunk(session, chunk)
+        student_ids.extend(ids)
+        errors.extend(chunk_errors)
+        chunk.clear()
+
+    try:
+        for row_no, record in enumerate(records, start=1):
+            total += 1
+            try:
+                student = StudentsCreate.model_validate(record)
+            except ValidationError as e:
+                errors.append(StudentImportError(
+                    row=row_no,
+                    errors=[f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()]
+                ))
+                continue
+            chunk.append((row_no, student.model_dump()))
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                flush()
+        if chunk:
+            flush()
+        session.commit()
+    except HTTPException:
+        session.rollback()
+        raise
+    except Exception as e:
+        session.rollback()
+        raise HTTPException(status_code=400, detail=f"Error importing students: {str(e)}")
+
+    return StudentImportResponse(
+        total_rows=total,
+        imported=len(student_ids),
+        failed=len(errors),
+        student_ids=student_ids,
+        errors=sorted(errors, key=lambda err: err.row)
+    )
 
 
 @students_router.patch("/{student_id}", response_model=StudentsResponse)
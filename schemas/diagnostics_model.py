@@ -0,0 +1,19 @@
+from datetime import datetime
+from sqlmodel import SQLModel
+from typing import List, Optional
+
+
+class SlowQueryEntry(SQLModel):
+    id: int
+    recorded_at: datetime
+    duration_ms: float
+    statement: str
+    parameters: str
+    route: Optional[str] = None  # "METHOD /route/{template}", None outside a request
+    plan: Optional[str] = None  # EXPLAIN (ANALYZE, BUFFERS) output, filled in asynchronously
+    plan_error: Optional[str] = None
+
+class SlowQueryLogResponse(SQLModel):
+    enabled: bool
+    threshold_ms: Optional[float] = None
+    entries: List[SlowQueryEntry]
@@ -12,8 +12,8 @@ class Expense(ExpenseBase, table=True):
     recipt_number: Optional[int] = None
     created_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime))  # Default to current datetime
     date: Optional[datetime] = Field(
-        default=None, sa_column=Column(DateTime))  # Updated to use datetime.now() as default
-    category_id: int = Field(foreign_key="expensecatnames.expense_cat_name_id")  # Foreign key for category
+        default=None, sa_column=Column(DateTime, index=True))  # Updated to use datetime.now() as default
+    category_id: int = Field(foreign_key="expensecatnames.expense_cat_name_id", index=True)  # Foreign key for category
     category: Optional[ExpenseCatNames] = Relationship(back_populates="expenses")  # Define as a relationship
     to_whom: str
     description: Optional[str] = None
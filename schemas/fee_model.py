@@ -1,5 +1,6 @@
 from datetime import datetime
 from sqlmodel import  Relationship, SQLModel, Field
+from sqlalchemy import Index
 from typing import List, Optional
 import enum
 
@@ -16,6 +17,9 @@ class FeeBase(SQLModel):
     created_at: datetime = Field(default_factory=datetime.now, nullable=False)
 
 class Fee(FeeBase, table=True):
+    # Serves the "does this student already have a fee for the period" lookups
+    __table_args__ = (Index("ix_fee_student_period", "student_id", "fee_year", "fee_month"),)
+
     student_id: int = Field(foreign_key="students.student_id", nullable=False)
     class_id: int = Field(foreign_key="classnames.class_name_id", nullable=False)
     fee_amount: float = Field(nullable=False)
@@ -58,6 +62,21 @@ class FeeFilter(SQLModel):
     fee_year: Optional[str] = None  # Changed from Optional[int] to Optional[str]
     fee_status: Optional[FeeStatus] = None
 
+class FeeGenerate(SQLModel):
+    class_id: Optional[int] = None  # None generates for the whole school
+    fee_month: str
+    fee_year: str
+    fee_amount: float
+    fee_status: FeeStatus = FeeStatus.UNPAID
+
+class FeeGenerateResponse(SQLModel):
+    class_id: Optional[int] = None
+    fee_month: str
+    fee_year: str
+    created: int
+    skipped: int
+    fee_ids: List[int]
+
 class FeeDelete(SQLModel):
     fee_id: int
     message: str = "Fee deleted successfully"
@@ -0,0 +1,35 @@
+from datetime import date, datetime
+from sqlmodel import SQLModel
+from typing import List, Optional
+
+
+class FinanceEntry(SQLModel):
+    kind: str  # "income" or "expense"
+    id: int
+    date: Optional[datetime] = None
+    recipt_number: Optional[int] = None
+    category_id: int
+    category: Optional[str] = None
+    party: str  # Income.source or Expense.to_whom
+    description: Optional[str] = None
+    amount: float
+    created_at: Optional[datetime] = None
+
+class FinancePage(SQLModel):
+    items: List[FinanceEntry]
+    limit: int
+    next_cursor: Optional[str] = None  # Pass back as `cursor` to fetch the next page
+
+class PeriodTotals(SQLModel):
+    period: str
+    start: date
+    end: date  # exclusive
+    income: float
+    expense: float
+    net: float
+    fee_collected: float
+    closed: bool  # closed periods are served from cache
+
+class PeriodComparison(SQLModel):
+    granularity: str
+    periods: List[PeriodTotals]
@@ -11,8 +11,8 @@ class IncomeBase(SQLModel):
 class Income(IncomeBase, table=True):
     recipt_number: Optional[int] = None
     date: Optional[datetime] = Field(
-        default=None, sa_column=Column(DateTime))  # Updated to use datetime.now() as default
-    category_id: int = Field(foreign_key="incomecatnames.income_cat_name_id")  # Add foreign key
+        default=None, sa_column=Column(DateTime, index=True))  # Updated to use datetime.now() as default
+    category_id: int = Field(foreign_key="incomecatnames.income_cat_name_id", index=True)  # Add foreign key
     category: Optional["IncomeCatNames"] = Relationship(back_populates="incomes")  # Define relationship
     source: str
     description: Optional[str] = None
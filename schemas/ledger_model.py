@@ -0,0 +1,37 @@
+from sqlalchemy import UniqueConstraint
+from sqlmodel import SQLModel, Field
+from typing import Dict, List, Optional
+
+LEDGER_KINDS = ("income", "expense")
+
+
+class MonthlyLedger(SQLModel, table=True):
+    """Running per-month, per-category totals of Income and Expense rows."""
+    __table_args__ = (
+        UniqueConstraint("year", "month", "kind", "category_id", name="uq_monthlyledger_period"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    year: int = Field(index=True)
+    month: int
+    kind: str  # "income" or "expense"
+    category_id: int
+    amount: float = 0.0
+    entries: int = 0
+
+class LedgerMonth(SQLModel):
+    year: int
+    month: int
+    income: float
+    expense: float
+    net: float
+    running_balance: float
+    income_by_category: Optional[Dict[str, float]] = None
+    expense_by_category: Optional[Dict[str, float]] = None
+
+class LedgerResponse(SQLModel):
+    opening_balance: float
+    closing_balance: float
+    total_income: float
+    total_expense: float
+    months: List[LedgerMonth]
@@ -91,3 +91,16 @@ class StudentsUpdate(SQLModel):
     father_cnic: Optional[str] = None
     father_cast_name: Optional[str] = None
     father_contact: Optional[str] = None
+
+
+class StudentImportError(SQLModel):
+    row: int  # 1-based data row number in the uploaded file (header excluded)
+    errors: List[str]
+
+
+class StudentImportResponse(SQLModel):
+    total_rows: int
+    imported: int
+    failed: int
+    student_ids: List[int]
+    errors: List[StudentImportError]
@@ -0,0 +1,246 @@
+"""
+Manage year-partitioned storage for the Attendance table (PostgreSQL only).
+
+Usage:
+    python -m scripts.attendance_partitions migrate
+    python -m scripts.attendance_partitions ensure [--ahead 1]
+    python -m scripts.attendance_partitions archive <academic_year>
+    python -m scripts.attendance_partitions restore <academic_year>
+    python -m scripts.attendance_partitions list
+
+Partitions are ranged on `attendance_date` by academic year, so queries that
+filter on a date (mark_attendance filters, dashboard summaries) only touch the
+partition(s) covering that date. Closed years can be detached into the
+`attendance_archive` schema, where they stay queryable but drop out of every
+query on the live `attendance` table.
+
+Rows dated outside every attached year (a backdated entry for a detached
+year, a date beyond the partitions created ahead) go to the DEFAULT
+partition, so writes never fail. Creating or restoring the partition for such
+a year moves its rows out of the default partition first; PostgreSQL refuses
+a partition whose range still has rows in the default one.
+
+A year is either detached here or moved to Parquet by scripts/cold_storage.py,
+never both: each command refuses a year the other one already holds.
+"""
+import argparse
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from schemas.attendance_model import Attendance
+from utils.academic_year import academic_year_bounds, academic_year_of, current_academic_year
+from utils.logging import configure_logging, logger
+
+TABLE = Attendance.__tablename__
+LEGACY_TABLE = f"{TABLE}_unpartitioned"
+ARCHIVE_SCHEMA = "attendance_archive"
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+
+def partition_name(year: int) -> str:
+    """Name of the partition holding the academic year starting in `year`."""
+    return f"{TABLE}_ay{year}"
+
+
+def _require_postgres(conn: Connection) -> None:
+    if conn.dialect.name != "postgresql":
+        raise RuntimeError("Attendance partitioning requires PostgreSQL")
+
+
+def is_partitioned(conn: Connection) -> bool:
+    """Return True if the live attendance table is already partitioned."""
+    return conn.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = :table AND c.relnamespace = 'public'::regnamespace"
+        ),
+        {"table": TABLE},
+    ).first() is not None
+
+
+def list_partitions(conn: Connection) -> List[str]:
+    """Names of the partitions currently attached to the attendance table."""
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table AND p.relnamespace = 'public'::regnamespace "
+            "ORDER BY c.relname"
+        ),
+        {"table": TABLE},
+    ).all()
+    return [row[0] for row in rows]
+
+
+def _attach(conn: Connection, table: str, year: int) -> int:
+    """
+    Attach `table` as the partition for `year`, first moving that year's rows
+    out of the default partition into it. Returns the number of rows moved.
+    """
+    start, end = academic_year_bounds(year)
+    moved = 0
+    if DEFAULT_PARTITION in list_partitions(conn):
+        moved = conn.execute(text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE attendance_date >= :start AND attendance_date < :end RETURNING *) "
+            f"INSERT INTO {table} SELECT * FROM moved"
+        ), {"start": start, "end": end}).rowcount
+    conn.execute(text(
+        f"ALTER TABLE {TABLE} ATTACH PARTITION {table} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    return moved
+
+
+def create_year_partition(conn: Connection, year: int) -> bool:
+    """Create the partition for academic year `year` if missing. Returns True if created."""
+    name = partition_name(year)
+    if name in list_partitions(conn):
+        return False
+    # Created detached, so rows already in the default partition can be moved in before attaching
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = _attach(conn, name, year)
+    start, end = academic_year_bounds(year)
+    logger.info(f"Created attendance partition {name} [{start}, {end}), moved {moved} rows from the default partition")
+    return True
+
+
+def _require_not_in_cold_storage(year: int) -> None:
+    from utils import cold_storage
+
+    if str(year) in cold_storage.load_manifest().get(TABLE, {}):
+        raise ValueError(f"Attendance for academic year {year} is in cold storage (scripts/cold_storage.py)")
+
+
+def ensure_partitions(engine: Engine, ahead: int = 1) -> List[str]:
+    """Make sure partitions exist from the current academic year up to `ahead` years later."""
+    created = []
+    with engine.begin() as conn:
+        _require_postgres(conn)
+        if not is_partitioned(conn):
+            raise RuntimeError("Attendance table is not partitioned; run `migrate` first")
+        current = current_academic_year()
+        for year in range(current, current + ahead + 1):
+            if create_year_partition(conn, year):
+                created.append(partition_name(year))
+    return created
+
+
+def migrate_to_partitioned(engine: Engine) -> None:
+    """
+    Convert the plain attendance table into a table partitioned by academic year.
+    Existing rows are copied into their partitions in a single transaction.
+    """
+    with engine.begin() as conn:
+        _require_postgres(conn)
+        if is_partitioned(conn):
+            logger.info("Attendance table is already partitioned")
+            return
+
+        seq = conn.execute(
+            text("SELECT pg_get_serial_sequence(:table, 'attendance_id')"), {"table": TABLE}
+        ).scalar()
+
+        conn.execute(text(f"ALTER TABLE {TABLE} RENAME TO {LEGACY_TABLE}"))
+        if seq:
+            # Keep the id sequence alive when the legacy table is dropped
+            conn.execute(text(f"ALTER SEQUENCE {seq} OWNED BY NONE"))
+        for index in Attendance.__table__.indexes:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+
+        conn.execute(text(
+            f"CREATE TABLE {TABLE} (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE (attendance_date)"
+        ))
+        # The partition key must be part of the primary key
+        conn.execute(text(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (attendance_id, attendance_date)"))
+        for fk in Attendance.__table__.foreign_keys:
+            conn.execute(text(
+                f"ALTER TABLE {TABLE} ADD FOREIGN KEY ({fk.parent.name}) "
+                f"REFERENCES {fk.column.table.name} ({fk.column.name})"
+            ))
+        conn.execute(text(f"CREATE INDEX ix_{TABLE}_date ON {TABLE} (attendance_date)"))
+        conn.execute(text(
+            f"CREATE INDEX ix_{TABLE}_student_date ON {TABLE} (student_id, attendance_date)"
+        ))
+        conn.execute(text(
+            f"CREATE INDEX ix_{TABLE}_class_date ON {TABLE} (class_name_id, attendance_date)"
+        ))
+
+        first_date = conn.execute(text(f"SELECT MIN(attendance_date) FROM {LEGACY_TABLE}")).scalar()
+        current = current_academic_year()
+        first_year = academic_year_of(first_date) if first_date else current
+        for year in range(min(first_year, current), current + 2):
+            create_year_partition(conn, year)
+        conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+
+        moved = conn.execute(text(f"INSERT INTO {TABLE} SELECT * FROM {LEGACY_TABLE}")).rowcount
+        conn.execute(text(f"DROP TABLE {LEGACY_TABLE}"))
+        if seq:
+            conn.execute(text(f"ALTER SEQUENCE {seq} OWNED BY {TABLE}.attendance_id"))
+        logger.info(f"Migrated {moved} attendance rows into partitioned table")
+
+
+def archive_year(engine: Engine, year: int) -> None:
+    """Detach a closed academic year's partition and move it to the archive schema."""
+    if year >= current_academic_year():
+        raise ValueError(f"Academic year {year} is not closed yet")
+    _require_not_in_cold_storage(year)
+    name = partition_name(year)
+    with engine.begin() as conn:
+        _require_postgres(conn)
+        if name not in list_partitions(conn):
+            raise ValueError(f"Partition {name} is not attached")
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+        conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+        conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+    logger.info(f"Archived attendance partition {name} to {ARCHIVE_SCHEMA}")
+
+
+def restore_year(engine: Engine, year: int) -> None:
+    """Re-attach an archived academic year, with rows written for it since it was detached."""
+    name = partition_name(year)
+    with engine.begin() as conn:
+        _require_postgres(conn)
+        conn.execute(text(f"ALTER TABLE {ARCHIVE_SCHEMA}.{name} SET SCHEMA public"))
+        moved = _attach(conn, name, year)
+    logger.info(f"Restored attendance partition {name}, moved {moved} rows from the default partition")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Attendance partition management")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("migrate", help="Convert attendance into a partitioned table")
+    ensure = sub.add_parser("ensure", help="Create upcoming academic year partitions")
+    ensure.add_argument("--ahead", type=int, default=1)
+    archive = sub.add_parser("archive", help="Detach a closed academic year")
+    archive.add_argument("year", type=int)
+    restore = sub.add_parser("restore", help="Re-attach an archived academic year")
+    restore.add_argument("year", type=int)
+    sub.add_parser("list", help="List attached partitions")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    from db import engine
+
+    if args.command == "migrate":
+        migrate_to_partitioned(engine)
+    elif args.command == "ensure":
+        print(ensure_partitions(engine, ahead=args.ahead))
+    elif args.command == "archive":
+        archive_year(engine, args.year)
+    elif args.command == "restore":
+        restore_year(engine, args.year)
+    elif args.command == "list":
+        with engine.connect() as conn:
+            _require_postgres(conn)
+            for name in list_partitions(conn):
+                print(name)
+
+
+if __name__ == "__main__":
+    main()
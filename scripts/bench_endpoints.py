@@ -0,0 +1,320 @@
+"""
+Latency and SQL statement counts of the hot endpoints, against a stored baseline.
+
+The benchmark seeds its own database (BENCH_DATABASE_URL, default
+TEST_DATABASE_URL) with `utils.synthetic_data` and reuses it while the
+student count still matches the preset; --reseed forces a fresh load. The
+dataset ends on a pinned date (--today, default BENCH_TODAY) rather than
+the current one, so a reseed reproduces the data the baseline was recorded
+on; reseed after changing --today. Every
+request goes through the full app (TestClient) with real bearer tokens, so
+auth, middlewares and serialization are included. Local caches are cleared
+before each request: the numbers are for the uncached path.
+
+For every case the p50/p95/mean latency and the number of SQL statements
+(X-DB-Queries) are recorded. Compared with the baseline file, a case
+regresses when it runs more statements than before, or when its p50 grew by
+more than the tolerance (BENCH_TOLERANCE, --tolerance) and by at least
+--min-delta-ms. The exit status is 1 when anything regressed, so the run can
+gate CI.
+
+Usage:
+    python -m scripts.bench_endpoints [--preset medium] [--seed 42] [--today 2026-10-19] [--reseed]
+                                      [--repeat 15] [--only fee attendance ...]
+                                      [--baseline scripts/bench_baseline.json]
+                                      [--update-baseline] [--output results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlmodel import Session, SQLModel, create_engine
+
+import setting
+from schemas.attendance_model import Attendance
+from schemas.attendance_time_model import AttendanceTime
+from schemas.attendance_value_model import AttendanceValue
+from schemas.class_names_model import ClassNames
+from schemas.fee_model import MONTHS
+from schemas.students_model import Students
+from utils import synthetic_data
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+# Last day of the benchmark dataset, the one the stored baseline was recorded on
+BENCH_TODAY = date(2026, 10, 19)
+USERS = {
+    "admin": ("bench-admin", "bench-admin-pass", "ADMIN"),
+    "teacher": ("bench-teacher", "bench-teacher-pass", "TEACHER"),
+}
+
+
+class Case:
+    """One benchmarked request. `params` is called with the fixtures and returns request kwargs."""
+
+    def __init__(self, name: str, method: str, path: str, params: Callable[[dict], dict], user: Optional[str] = "admin"):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.params = params
+        self.user = user
+
+
+def _bulk_attendance(fx: dict) -> dict:
+    # A Saturday nobody was marked on yet, one further back per iteration
+    fx["saturdays"].append(fx["last_saturday"] - timedelta(weeks=len(fx["saturdays"])))
+    day = fx["saturdays"][-1].isoformat()
+    return {"json": {"attendances": [
+        {
+            "attendance_date": day,
+            "attendance_time_id": fx["time_id"],
+            "class_name_id": fx["class_id"],
+            "teacher_name_id": fx["teacher_id"],
+            "student_id": student_id,
+            "attendance_value_id": fx["present_id"],
+        }
+        for student_id in fx["class_students"]
+    ]}}
+
+
+CASES = [
+    Case("login", "POST", "/login", lambda fx: {"json": {"username": USERS["admin"][0], "password": USERS["admin"][1]}}, user=None),
+    Case("attendance.bulk_add", "POST", "/mark_attendance/add_bulk_attendance/", _bulk_attendance),
+    Case("attendance.filter_by_ids", "GET", "/mark_attendance/filter_attendance_by_ids",
+         lambda fx: {"params": {"attendance_date": fx["school_day"], "class_name_id": fx["class_id"]}}),
+    Case("attendance.filter_by_name", "GET", "/mark_attendance/filtered_attendance_by_name",
+         lambda fx: {"params": {"attendance_date": fx["school_day"], "class_name": fx["class_name"]}}),
+    Case("fee.filter", "POST", "/fee/filter/",
+         lambda fx: {"params": {"fee_year": fx["fee_year"], "fee_month": fx["fee_month"], "limit": 500}}),
+    Case("fee.paid_students", "GET", "/fee/paid-students/",
+         lambda fx: {"params": {"fee_year": fx["fee_year"], "fee_month": fx["fee_month"], "class_id": fx["class_id"]}}),
+    Case("fee.unpaid_students", "GET", "/fee/unpaid_students/",
+         lambda fx: {"params": {"fee_year": fx["fee_year"], "fee_month": fx["fee_month"], "class_id": fx["class_id"]}}),
+    Case("dashboard.attendance_summary", "GET", "/dashboard/attendance-summary", lambda fx: {}),
+    Case("dashboard.student_summary", "GET", "/dashboard/student-summary", lambda fx: {"params": {"date": fx["school_day"]}}),
+    Case("dashboard.income_expense_summary", "GET", "/dashboard/income-expense-summary", lambda fx: {"params": {"year": fx["fee_year"]}}),
+    Case("dashboard.fee_summary", "GET", "/dashboard/fee-summary", lambda fx: {"params": {"year": fx["fee_year"]}}),
+    Case("students.all", "GET", "/students/all_students/", lambda fx: {}, user="teacher"),
+]
+
+
+# -- dataset -------------------------------------------------------------------
+
+def seed(engine, options: dict, seed_value: int, today: date, reseed: bool) -> None:
+    """Load the synthetic school unless the database already holds it."""
+    from user.services import get_password_hash
+    from user.user_models import User, UserRole
+
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        students = session.execute(select(func.count()).select_from(Students)).scalar()
+        if reseed or students != options["students"]:
+            print(f"seeding {options} (seed {seed_value}, up to {today})...")
+            started = time.perf_counter()
+            synthetic_data.reset(session)
+            session.commit()
+            synthetic_data.generate(session, seed=seed_value, today=today, progress=lambda message: None, **options)
+            print(f"seeded in {time.perf_counter() - started:.1f}s")
+        for username, password, role in USERS.values():
+            if session.exec(select(User).where(User.username == username)).first() is None:
+                session.add(User(username=username, email=f"{username}@example.com",
+                                 password=get_password_hash(password), role=UserRole[role]))
+        session.commit()
+
+
+def fixtures(session: Session, today: date) -> dict:
+    """Request parameters that hit realistic amounts of data."""
+    # The largest class, on the most recent day it was marked
+    class_name, size = session.execute(
+        select(Students.class_name, func.count()).group_by(Students.class_name).order_by(func.count().desc())
+    ).first()
+    class_id = session.execute(select(ClassNames.class_name_id).where(ClassNames.class_name == class_name)).scalar()
+    school_day, teacher_id = session.execute(
+        select(Attendance.attendance_date, Attendance.teacher_name_id)
+        .where(Attendance.class_name_id == class_id)
+        .order_by(Attendance.attendance_date.desc())
+        .limit(1)
+    ).first()
+    last_month = today.replace(day=1) - timedelta(days=1)
+    return {
+        "class_name": class_name,
+        "class_id": class_id,
+        "teacher_id": teacher_id,
+        "school_day": school_day.date().isoformat(),
+        "class_students": session.execute(
+            select(Students.student_id).where(Students.class_name == class_name)
+        ).scalars().all(),
+        "time_id": session.execute(select(AttendanceTime.attendance_time_id)).scalar(),
+        "present_id": session.execute(
+            select(AttendanceValue.attendance_value_id).where(AttendanceValue.attendance_value == "Present")
+        ).scalar(),
+        "fee_year": str(last_month.year),
+        "fee_month": MONTHS[last_month.month - 1],
+        "last_saturday": today - timedelta(days=(today.weekday() - 5) % 7 or 7),
+        "saturdays": [],
+        "class_size": size,
+    }
+
+
+def cleanup(session: Session, fx: dict) -> None:
+    """Remove the attendance the bulk-add case wrote."""
+    if fx["saturdays"]:
+        session.execute(delete(Attendance).where(
+            Attendance.class_name_id == fx["class_id"],
+            Attendance.attendance_date.in_([datetime.combine(day, datetime.min.time()) for day in fx["saturdays"]]),
+        ))
+        session.commit()
+
+
+# -- measuring -----------------------------------------------------------------
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(client, case: Case, fx: dict, tokens: Dict[str, str], repeat: int, warmup: int) -> dict:
+    from utils.cache import get_cache
+    from utils.rate_limit import get_backend
+
+    headers = {"Authorization": f"Bearer {tokens[case.user]}"} if case.user else {}
+    timings, queries, errors = [], [], 0
+    for i in range(warmup + repeat):
+        get_cache().local.clear()
+        get_backend().reset()  # repeated logins would otherwise be throttled
+        kwargs = case.params(fx)
+        started = time.perf_counter()
+        response = client.request(case.method, case.path, headers=headers, **kwargs)
+        elapsed = time.perf_counter() - started
+        if i < warmup:
+            continue
+        if response.status_code >= 400:
+            errors += 1
+        timings.append(elapsed * 1000)
+        queries.append(int(response.headers.get("X-DB-Queries", 0)))
+    return {
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(_percentile(timings, 0.95), 2),
+        "mean_ms": round(statistics.fmean(timings), 2),
+        "queries": max(queries),
+        "errors": errors,
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float, min_delta_ms: float) -> List[str]:
+    """Human-readable regressions of `results` against `baseline`."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if result["errors"]:
+            regressions.append(f"{name}: {result['errors']} error responses")
+        if base is None:
+            continue
+        if result["queries"] > base["queries"]:
+            regressions.append(f"{name}: {result['queries']} SQL statements, baseline {base['queries']}")
+        limit = base["p50_ms"] * (1 + tolerance)
+        if result["p50_ms"] > limit and result["p50_ms"] - base["p50_ms"] >= min_delta_ms:
+            regressions.append(
+                f"{name}: p50 {result['p50_ms']:.2f} ms, baseline {base['p50_ms']:.2f} ms (+{tolerance:.0%} allowed)"
+            )
+    return regressions
+
+
+def run(engine, cases: List[Case], today: date, repeat: int, warmup: int) -> Dict[str, dict]:
+    from fastapi.testclient import TestClient
+
+    from db import get_session
+    from main import app
+
+    def bench_session():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = bench_session
+    try:
+        with TestClient(app) as client, Session(engine) as session:
+            tokens = {}
+            for key, (username, password, _) in USERS.items():
+                response = client.post("/login", json={"username": username, "password": password})
+                response.raise_for_status()
+                tokens[key] = response.json()["access_token"]
+            fx = fixtures(session, today)
+            results = {}
+            try:
+                for case in cases:
+                    results[case.name] = measure(client, case, fx, tokens, repeat, warmup)
+                    result = results[case.name]
+                    print(f"{case.name:<36} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['queries']:>8}"
+                          + (f"  {result['errors']} errors" if result["errors"] else ""))
+            finally:
+                cleanup(session, fx)
+            return results
+    finally:
+        app.dependency_overrides.pop(get_session, None)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Hot endpoint benchmarks with regression thresholds")
+    parser.add_argument("--preset", choices=sorted(synthetic_data.PRESETS), default="medium")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--today", type=date.fromisoformat, default=BENCH_TODAY,
+                        help="Last day of the generated dataset")
+    parser.add_argument("--reseed", action="store_true", help="Reload the dataset even if it looks current")
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--only", nargs="+", help="Run cases whose name starts with one of these prefixes")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=setting.BENCH_TOLERANCE)
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="Ignore p50 slowdowns smaller than this, whatever the ratio")
+    parser.add_argument("--output", help="Also write this run's results to a JSON file")
+    args = parser.parse_args(argv)
+
+    import logging
+    logging.getLogger().setLevel(logging.ERROR)  # N+1 warnings would repeat what the table shows
+
+    options = synthetic_data.PRESETS[args.preset]
+    engine = create_engine(str(setting.BENCH_DATABASE_URL))
+    seed(engine, options, args.seed, args.today, args.reseed)
+
+    cases = [c for c in CASES if not args.only or c.name.startswith(tuple(args.only))]
+    print(f"{'case':<36} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8}")
+    results = run(engine, cases, args.today, args.repeat, args.warmup)
+    report = {
+        "dataset": {"preset": args.preset, "seed": args.seed, "today": args.today.isoformat(), **options},
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print("no baseline to compare with; run with --update-baseline to create one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["dataset"] != report["dataset"]:
+        print(f"warning: baseline was recorded on {baseline['dataset']}")
+    regressions = compare(results, baseline["results"], args.tolerance, args.min_delta_ms)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+    print(f"no regressions (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
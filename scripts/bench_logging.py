@@ -0,0 +1,145 @@
+"""
+Request latency with synchronous handlers vs the queue logging pipeline.
+
+Serves a small FastAPI endpoint that logs like a typical request (a few
+INFO lines and a DEBUG line) and times requests through TestClient with:
+
+- sync:  RotatingFileHandler + StreamHandler on the root logger, as before
+- queue: the QueueHandler/QueueListener pipeline from utils/logging.py
+
+`--write-delay-ms` adds a sleep to every handler write to stand in for a
+slow disk or a blocked stderr pipe, which is where the two differ most.
+Log output goes to a temporary directory and /dev/null.
+
+Usage:
+    python -m scripts.bench_logging [--requests 2000] [--write-delay-ms 0 1]
+"""
+import argparse
+import logging
+import os
+import queue
+import statistics
+import tempfile
+import time
+from logging.handlers import QueueListener, RotatingFileHandler
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from utils.logging import TEXT_FORMAT, DebugSampler, JsonFormatter, _QueueHandler, stop_logging
+
+LINES_PER_REQUEST = 4
+
+
+class _SlowWrites:
+    """Handler mixin sleeping before each write."""
+
+    delay = 0.0
+
+    def emit(self, record):
+        if self.delay:
+            time.sleep(self.delay)
+        super().emit(record)
+
+
+class SlowFileHandler(_SlowWrites, RotatingFileHandler):
+    pass
+
+
+class SlowStreamHandler(_SlowWrites, logging.StreamHandler):
+    pass
+
+
+def _handlers(directory: str, delay: float, json_format: bool):
+    file_handler = SlowFileHandler(os.path.join(directory, "bench.log"), maxBytes=10 * 1024 * 1024, backupCount=1)
+    stream_handler = SlowStreamHandler(open(os.devnull, "w"))
+    for handler in (file_handler, stream_handler):
+        handler.delay = delay
+        handler.setFormatter(JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT))
+    return [file_handler, stream_handler]
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    log = logging.getLogger("bench.request")
+
+    @app.get("/work/{item_id}")
+    def work(item_id: int):
+        log.info(f"Loading item {item_id}", extra={"item_id": item_id})
+        log.debug(f"Cache miss for item {item_id}")
+        log.info("Computed totals", extra={"db_queries": 3, "db_time_ms": 1.2})
+        log.info(f"Returning item {item_id}")
+        return {"item_id": item_id}
+
+    return app
+
+
+def _run(client: TestClient, requests: int):
+    for i in range(50):  # warm up
+        client.get(f"/work/{i}")
+    timings = []
+    for i in range(requests):
+        start = time.perf_counter()
+        client.get(f"/work/{i}")
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "p50_ms": statistics.median(timings) * 1000,
+        "p99_ms": timings[int(len(timings) * 0.99) - 1] * 1000,
+        "mean_ms": statistics.fmean(timings) * 1000,
+    }
+
+
+def bench(mode: str, requests: int, delay_ms: float, json_format: bool, directory: str):
+    root = logging.getLogger()
+    previous = list(root.handlers)
+    for handler in previous:
+        root.removeHandler(handler)
+    logging.getLogger("bench.request").setLevel(logging.DEBUG)
+
+    handlers = _handlers(directory, delay_ms / 1000, json_format)
+    listener = None
+    if mode == "sync":
+        for handler in handlers:
+            handler.addFilter(DebugSampler(0.1))
+            root.addHandler(handler)
+    else:
+        log_queue = queue.SimpleQueue()
+        queue_handler = _QueueHandler(log_queue)
+        queue_handler.addFilter(DebugSampler(0.1))
+        root.addHandler(queue_handler)
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+
+    try:
+        with TestClient(_app()) as client:
+            return _run(client, requests)
+    finally:
+        if listener is not None:
+            listener.stop()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler in handlers:
+            handler.close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Logging pipeline latency benchmark")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--write-delay-ms", type=float, nargs="+", default=[0, 1])
+    parser.add_argument("--text", action="store_true", help="Plain text records instead of JSON")
+    args = parser.parse_args(argv)
+
+    stop_logging()  # the app's own pipeline would otherwise receive the benchmark records
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    print(f"{args.requests} requests, {LINES_PER_REQUEST} log calls each")
+    print(f"{'write delay':>12} {'mode':>6} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for delay in args.write_delay_ms:
+            for mode in ("sync", "queue"):
+                result = bench(mode, args.requests, delay, not args.text, directory)
+                print(f"{delay:>10.1f}ms {mode:>6} {result['p50_ms']:>8.3f} {result['p99_ms']:>8.3f} {result['mean_ms']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Throughput of single-process uvicorn vs gunicorn with N uvicorn workers.
+
+Each configuration is started as a subprocess (`python -m server ...`) on
+--port, then --concurrency closed-loop clients send authenticated requests
+round-robin over a read-mostly endpoint mix for --duration seconds. Prints
+requests/s, p50/p99 latency and errors per configuration. The server uses
+the normal settings (DATABASE_URL etc.) from the environment.
+
+Usage:
+    python -m scripts.bench_server --user admin --password ... [--workers 1 2 3]
+                                   [--concurrency 32] [--duration 20] [--port 8077]
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from scripts.load_test import Stats
+
+ENDPOINTS = [
+    "/class_name/class-names-all/",
+    "/dashboard/total-students",
+    "/students/by_class_id/?class_id=1",
+    "/dashboard/income-expense-summary",
+    "/attendance_value/attendance-values-all/",
+]
+
+
+def start(workers: int, port: int) -> subprocess.Popen:
+    """workers=0 starts single-process uvicorn."""
+    command = [sys.executable, "-m", "server"] + (["--single"] if workers == 0 else ["--workers", str(workers)])
+    env = dict(os.environ, WEB_PORT=str(port), WEB_HOST="127.0.0.1", LOG_LEVEL="WARNING")
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(base_url: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(base_url + "/", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not start")
+
+
+async def hammer(base_url: str, token: str, concurrency: int, duration: float) -> dict:
+    stats = Stats()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=30) as client:
+        stop = time.perf_counter() + duration
+
+        async def worker(offset: int):
+            i = offset
+            while time.perf_counter() < stop:
+                path = ENDPOINTS[i % len(ENDPOINTS)]
+                started = time.perf_counter()
+                try:
+                    status = (await client.get(path)).status_code
+                except httpx.HTTPError:
+                    status = None
+                stats.record(path.split("?")[0], time.perf_counter() - started, status)
+                i += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        return stats.report(time.perf_counter() - started)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="uvicorn vs gunicorn+uvicorn workers throughput")
+    parser.add_argument("--user", required=True, help="Admin account")
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 3],
+                        help="gunicorn worker counts to compare with single uvicorn")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--port", type=int, default=8077)
+    args = parser.parse_args(argv)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    print(f"{'server':<24} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for workers in [0] + args.workers:
+        process = start(workers, args.port)
+        try:
+            wait_ready(base_url)
+            response = httpx.post(base_url + "/login", json={"username": args.user, "password": args.password})
+            response.raise_for_status()
+            report = asyncio.run(hammer(base_url, response.json()["access_token"], args.concurrency, args.duration))
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=60)
+        name = "uvicorn (single)" if workers == 0 else f"gunicorn x{workers}"
+        print(f"{name:<24} {report['rps']:>8.1f} {report['p50_ms']:>8.1f} {report['p99_ms']:>8.1f} {report['error_rate']:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
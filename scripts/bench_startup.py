@@ -0,0 +1,77 @@
+"""
+Startup time: how long until a fresh server answers its first request.
+
+For each run a new process is started and timed until GET / returns 200:
+
+- import:   `import main` in a bare interpreter (no server)
+- uvicorn:  `python -m server --single`
+- gunicorn: `python -m server --workers N` (preloaded master + N workers)
+
+Prints the median and worst of --runs runs. The servers use the normal
+settings (DATABASE_URL etc.) from the environment.
+
+Usage:
+    python -m scripts.bench_startup [--runs 5] [--workers 3] [--port 8079]
+"""
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+IMPORT_MAIN = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+
+
+def time_import() -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_MAIN], capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def time_first_request(command: list, port: int, timeout: float = 60) -> float:
+    env = dict(os.environ, WEB_PORT=str(port), WEB_HOST="127.0.0.1", LOG_LEVEL="WARNING")
+    # One client for all polls: a new client per poll costs more CPU than the server's own startup steps
+    client = httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1, trust_env=False)
+    started = time.perf_counter()
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                if client.get("/").status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            if process.poll() is not None:
+                raise RuntimeError(f"{' '.join(command)} exited with status {process.returncode}")
+            time.sleep(0.01)
+        raise RuntimeError(f"{' '.join(command)} did not answer within {timeout}s")
+    finally:
+        client.close()
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=60)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Time to first request")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=3, help="gunicorn workers")
+    parser.add_argument("--port", type=int, default=8079)
+    args = parser.parse_args(argv)
+
+    server = [sys.executable, "-m", "server"]
+    cases = {
+        "import main": time_import,
+        "uvicorn (single)": lambda: time_first_request(server + ["--single"], args.port),
+        f"gunicorn x{args.workers}": lambda: time_first_request(server + ["--workers", str(args.workers)], args.port),
+    }
+    print(f"{'startup':<20} {'median s':>9} {'max s':>9}")
+    for name, measure in cases.items():
+        timings = [measure() for _ in range(args.runs)]
+        print(f"{name:<20} {statistics.median(timings):>9.3f} {max(timings):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Move closed academic years of attendance and finance data to Parquet files.
+
+Usage:
+    python -m scripts.cold_storage export <academic_year> [--tables fee income ...]
+    python -m scripts.cold_storage list
+"""
+import argparse
+
+from sqlmodel import Session
+
+from utils import cold_storage
+from utils.logging import configure_logging
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Cold storage archival")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Archive a closed academic year")
+    export.add_argument("year", type=int)
+    export.add_argument(
+        "--tables", nargs="+", choices=sorted(cold_storage.ARCHIVABLE), default=sorted(cold_storage.ARCHIVABLE)
+    )
+    sub.add_parser("list", help="Show archived years and hot table ranges")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    from db import engine
+
+    if args.command == "export":
+        with Session(engine) as session:
+            for table in args.tables:
+                rows = cold_storage.export_year(session, table, args.year)
+                print(f"{table}: archived {rows} rows")
+    elif args.command == "list":
+        manifest = cold_storage.load_manifest()
+        with Session(engine) as session:
+            for table in sorted(cold_storage.ARCHIVABLE):
+                archived = ", ".join(sorted(manifest.get(table, {}))) or "none"
+                print(f"{table}: archived years [{archived}], hot range {cold_storage.hot_date_range(table, session)}")
+
+
+if __name__ == "__main__":
+    main()
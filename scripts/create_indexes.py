@@ -0,0 +1,43 @@
+"""
+Create indexes declared on the models that are missing from an existing database.
+
+`create_all` only creates indexes together with new tables, so indexes added
+to models later (e.g. on income/expense date and category_id) have to be
+created separately on databases that already have those tables.
+
+Usage:
+    python -m scripts.create_indexes
+"""
+from typing import List
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlmodel import SQLModel
+
+from utils.logging import configure_logging
+
+
+def create_missing_indexes(engine: Engine) -> List[str]:
+    """Create every model index whose table exists. Returns the index names checked."""
+    inspector = inspect(engine)
+    checked = []
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+            checked.append(index.name)
+    return checked
+
+
+def main() -> None:
+    configure_logging()
+    import main as app_module  # noqa: F401  (importing the app registers every model)
+    from db import engine
+
+    for name in create_missing_indexes(engine):
+        print(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Fill a database with seeded synthetic school data (see utils/synthetic_data.py).
+
+Usage:
+    python -m scripts.generate_data [--preset small|medium|large] [--students N] [--years N]
+                                    [--grades N] [--sections N] [--seed N] [--today YYYY-MM-DD]
+                                    [--reset]
+
+--seed and --today together determine the data; without --today the
+generated period ends on the current date.
+
+The target tables must be empty unless --reset is given, which truncates
+every table the generator writes to. On a partitioned attendance table the
+partitions for the generated years are created first.
+"""
+import argparse
+import time
+from datetime import date
+
+from sqlmodel import Session
+
+from utils import synthetic_data
+from utils.academic_year import academic_year_of
+from utils.logging import configure_logging
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic school data")
+    parser.add_argument("--preset", choices=sorted(synthetic_data.PRESETS), default="small")
+    parser.add_argument("--students", type=int, help="Override the preset's number of students")
+    parser.add_argument("--years", type=int, help="Override the preset's number of academic years")
+    parser.add_argument("--grades", type=int)
+    parser.add_argument("--sections", type=int, help="Sections (classes) per grade")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--today", type=date.fromisoformat, default=date.today(),
+                        help="Last day of the generated period (default: the current date)")
+    parser.add_argument("--reset", action="store_true", help="Empty the generated tables first")
+    args = parser.parse_args(argv)
+
+    options = dict(synthetic_data.PRESETS[args.preset])
+    for name in ("students", "years", "grades", "sections"):
+        if getattr(args, name) is not None:
+            options[name] = getattr(args, name)
+
+    configure_logging()
+    from db import engine
+    from scripts.attendance_partitions import create_year_partition, is_partitioned
+
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            if is_partitioned(conn):
+                last_year = academic_year_of(args.today)
+                for year in range(last_year - options["years"] + 1, last_year + 1):
+                    create_year_partition(conn, year)
+
+    started = time.perf_counter()
+    with Session(engine) as session:
+        if args.reset:
+            synthetic_data.reset(session)
+            session.commit()
+        synthetic_data.generate(session, seed=args.seed, today=args.today, progress=print, **options)
+    print(f"done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Create the database schema: missing tables, then missing indexes.
+
+The app no longer creates tables when it starts; run this once per deploy
+(or after adding a model) before starting the server. Existing tables are
+left as they are, so column changes still need a manual migration.
+
+Usage:
+    python -m scripts.init_db
+"""
+from sqlalchemy import inspect
+from sqlmodel import SQLModel
+
+from scripts.create_indexes import create_missing_indexes
+from utils.logging import configure_logging
+
+
+def main() -> None:
+    configure_logging()
+    import main as app_module  # noqa: F401  (importing the app registers every model)
+    from db import engine
+
+    existing = set(inspect(engine).get_table_names())
+    SQLModel.metadata.create_all(engine)
+    created = [table.name for table in SQLModel.metadata.sorted_tables if table.name not in existing]
+    print(f"created tables: {', '.join(created) or 'none'}")
+    print(f"indexes checked: {len(create_missing_indexes(engine))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Maintain the precomputed monthly income/expense ledger.
+
+Usage:
+    python -m scripts.ledger rebuild
+    python -m scripts.ledger show <start_year> <end_year>
+"""
+import argparse
+
+from sqlmodel import SQLModel, Session
+
+from utils import ledger
+from utils.logging import configure_logging
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Monthly ledger maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="Recompute the ledger from income, expense and archived years")
+    show = sub.add_parser("show", help="Print monthly totals and running balance")
+    show.add_argument("start_year", type=int)
+    show.add_argument("end_year", type=int)
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    from db import engine
+
+    with Session(engine) as session:
+        if args.command == "rebuild":
+            SQLModel.metadata.tables["monthlyledger"].create(engine, checkfirst=True)
+            print(f"ledger rows: {ledger.rebuild(session)}")
+        elif args.command == "show":
+            result = ledger.monthly_ledger(session, args.start_year, 1, args.end_year, 12)
+            print(f"opening balance: {result.opening_balance:.2f}")
+            for month in result.months:
+                print(
+                    f"{month.year}-{month.month:02d} income {month.income:.2f} "
+                    f"expense {month.expense:.2f} net {month.net:.2f} balance {month.running_balance:.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+HTTP load test replaying a school-day traffic mix against a running instance.
+
+Virtual users share one httpx.AsyncClient and act out three personas:
+
+- teacher:  loads their class list, posts today's attendance for the whole
+            class in one bulk request, then checks what was recorded
+- admin:    polls the dashboard summaries every few seconds
+- fee_desk: looks up paid/unpaid students and fee records per class and month
+
+A profile is a sequence of phases; each phase runs for a share of
+--duration with its own persona mix, e.g. "school-day" starts with the
+morning attendance rush, settles into dashboard polling and ends with the
+fee desk. Users start over --ramp-up seconds and switch persona when the
+phase changes.
+
+At the end, per route: requests, throughput, p50/p95/p99 latency and error
+rate, plus totals (--json writes the same as JSON). Run it against a
+database filled by `python -m scripts.generate_data` and an admin account.
+Note that the teacher persona writes attendance for today.
+
+Usage:
+    python -m scripts.load_test --user admin --password ... [--base-url http://127.0.0.1:8000]
+                                [--profile school-day] [--users 50] [--duration 120]
+                                [--ramp-up 10] [--json results.json]
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import httpx
+
+from schemas.fee_model import MONTHS
+
+# phase name, share of the duration, persona weights
+PROFILES = {
+    "school-day": [
+        ("morning attendance", 0.3, {"teacher": 0.8, "admin": 0.15, "fee_desk": 0.05}),
+        ("midday", 0.4, {"teacher": 0.2, "admin": 0.5, "fee_desk": 0.3}),
+        ("afternoon fee desk", 0.3, {"teacher": 0.05, "admin": 0.35, "fee_desk": 0.6}),
+    ],
+    "morning": [("morning attendance", 1.0, {"teacher": 0.85, "admin": 0.15})],
+    "dashboard": [("dashboard polling", 1.0, {"admin": 1.0})],
+    "month-start": [("month start fee desk", 1.0, {"fee_desk": 0.8, "admin": 0.2})],
+}
+
+# Seconds a persona waits between actions (uniform range)
+THINK_TIME = {"teacher": (1.0, 4.0), "admin": (2.0, 5.0), "fee_desk": (0.5, 2.0)}
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, route: str, elapsed: float, status: Optional[int]) -> None:
+        self.latencies[route].append(elapsed * 1000)
+        if status is None or status >= 400:
+            self.errors[route] += 1
+        # Timeouts and connection failures have no status
+        self.statuses[route][str(status) if status is not None else "no response"] += 1
+
+    def report(self, duration: float) -> dict:
+        routes = {}
+        for route, values in sorted(self.latencies.items()):
+            values.sort()
+            routes[route] = {
+                "requests": len(values),
+                "rps": round(len(values) / duration, 2),
+                "p50_ms": round(_percentile(values, 0.50), 1),
+                "p95_ms": round(_percentile(values, 0.95), 1),
+                "p99_ms": round(_percentile(values, 0.99), 1),
+                "mean_ms": round(statistics.fmean(values), 1),
+                "error_rate": round(self.errors[route] / len(values), 4),
+                "statuses": dict(self.statuses[route]),
+            }
+        every = sorted(v for values in self.latencies.values() for v in values)
+        total = len(every)
+        return {
+            "duration_s": round(duration, 1),
+            "requests": total,
+            "rps": round(total / duration, 2) if duration else 0,
+            "p50_ms": round(_percentile(every, 0.50), 1) if every else None,
+            "p95_ms": round(_percentile(every, 0.95), 1) if every else None,
+            "p99_ms": round(_percentile(every, 0.99), 1) if every else None,
+            "error_rate": round(sum(self.errors.values()) / total, 4) if total else 0,
+            "routes": routes,
+        }
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, phases: list, users: int, duration: float, ramp_up: float, seed: int):
+        self.client = client
+        self.phases = phases
+        self.users = users
+        self.duration = duration
+        self.ramp_up = ramp_up
+        self.stats = Stats()
+        self.rng = random.Random(seed)
+        self.started = 0.0
+        self.reference: dict = {}
+
+    async def call(self, route: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        """Send one request, recording it under `route` (the path template)."""
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.stats.record(route, time.perf_counter() - started, None)
+            return None
+        self.stats.record(route, time.perf_counter() - started, response.status_code)
+        return response
+
+    async def login(self, username: str, password: str) -> None:
+        response = await self.client.post("/login", json={"username": username, "password": password})
+        response.raise_for_status()
+        self.client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+    async def load_reference(self) -> None:
+        """Classes, teachers and attendance ids the personas pick from."""
+        get = self.client.get
+        classes, teachers, values, times = [
+            (await get(url)).json() for url in (
+                "/class_name/class-names-all/",
+                "/teacher_name/teacher-names-all/",
+                "/attendance_value/attendance-values-all/",
+                "/attendance_time/attendance-values-all/",
+            )
+        ]
+        if not classes or not teachers or not values or not times:
+            raise SystemExit("No reference data found; load some with `python -m scripts.generate_data` first")
+        present = [v["attendance_value_id"] for v in values if v["attendance_value"] == "Present"]
+        self.reference = {
+            "class_ids": [c["class_name_id"] for c in classes],
+            "teacher_ids": [t["teacher_name_id"] for t in teachers],
+            "value_ids": [v["attendance_value_id"] for v in values],
+            "present_id": present[0] if present else values[0]["attendance_value_id"],
+            "time_id": times[0]["attendance_time_id"],
+        }
+
+    # -- personas -------------------------------------------------------------
+
+    async def teacher(self, rng: random.Random) -> None:
+        ref = self.reference
+        index = rng.randrange(len(ref["class_ids"]))
+        class_id = ref["class_ids"][index]
+        teacher_id = ref["teacher_ids"][index % len(ref["teacher_ids"])]
+        response = await self.call("GET /students/by_class_id/", "GET", "/students/by_class_id/", params={"class_id": class_id})
+        if response is None or response.status_code != 200:
+            return
+        today = date.today().isoformat()
+        attendances = [
+            {
+                "attendance_date": today,
+                "attendance_time_id": ref["time_id"],
+                "class_name_id": class_id,
+                "teacher_name_id": teacher_id,
+                "student_id": student["student_id"],
+                "attendance_value_id": ref["present_id"] if rng.random() > 0.07 else rng.choice(ref["value_ids"]),
+            }
+            for student in response.json()
+        ]
+        await self.call("POST /mark_attendance/add_bulk_attendance/", "POST",
+                        "/mark_attendance/add_bulk_attendance/", json={"attendances": attendances})
+        await self.call("GET /mark_attendance/filter_attendance_by_ids", "GET",
+                        "/mark_attendance/filter_attendance_by_ids",
+                        params={"attendance_date": today, "class_name_id": class_id})
+
+    async def admin(self, rng: random.Random) -> None:
+        year = date.today().year
+        for path, params in (
+            ("/dashboard/attendance-summary", {}),
+            ("/dashboard/income-expense-summary", {"year": year}),
+            ("/dashboard/fee-summary", {"year": year}),
+            ("/dashboard/total-students", {}),
+        ):
+            await self.call(f"GET {path}", "GET", path, params=params)
+
+    async def fee_desk(self, rng: random.Random) -> None:
+        # Around the start of the month the desk mostly works on the month just begun and the one before
+        month = date.today().replace(day=1) - timedelta(days=rng.choice([0, 0, 1]) * 28)
+        params = {
+            "class_id": rng.choice(self.reference["class_ids"]),
+            "fee_month": MONTHS[month.month - 1],
+            "fee_year": str(month.year),
+        }
+        action = rng.random()
+        if action < 0.4:
+            await self.call("GET /fee/unpaid_students/", "GET", "/fee/unpaid_students/", params=params)
+        elif action < 0.7:
+            await self.call("GET /fee/paid-students/", "GET", "/fee/paid-students/", params=params)
+        else:
+            await self.call("POST /fee/filter/", "POST", "/fee/filter/", params=params)
+
+    # -- scheduling -------------------------------------------------------------
+
+    def phase_at(self, elapsed: float):
+        boundary = 0.0
+        for phase in self.phases:
+            boundary += phase[1] * self.duration
+            if elapsed < boundary:
+                return phase
+        return self.phases[-1]
+
+    async def user(self, number: int) -> None:
+        rng = random.Random(self.rng.random())
+        # A fixed quantile per user, so the persona split follows the phase weights
+        quantile = (number + 0.5) / self.users
+        await asyncio.sleep(self.ramp_up * number / self.users)
+        while (elapsed := time.perf_counter() - self.started) < self.duration:
+            weights = self.phase_at(elapsed)[2]
+            cumulative, persona = 0.0, next(iter(weights))
+            for name, weight in weights.items():
+                cumulative += weight / sum(weights.values())
+                if quantile < cumulative:
+                    persona = name
+                    break
+            await getattr(self, persona)(rng)
+            await asyncio.sleep(rng.uniform(*THINK_TIME[persona]))
+
+    async def run(self) -> dict:
+        self.started = time.perf_counter()
+        await asyncio.gather(*(self.user(n) for n in range(self.users)))
+        return self.stats.report(time.perf_counter() - self.started)
+
+
+def print_report(report: dict) -> None:
+    print(f"{'route':<52} {'reqs':>6} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7}")
+    for route, r in report["routes"].items():
+        print(f"{route:<52} {r['requests']:>6} {r['rps']:>7.2f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+              f"{r['p99_ms']:>8.1f} {r['error_rate']:>7.1%}")
+    if report["requests"]:
+        print(f"{'total':<52} {report['requests']:>6} {report['rps']:>7.2f} {report['p50_ms']:>8.1f} "
+              f"{report['p95_ms']:>8.1f} {report['p99_ms']:>8.1f} {report['error_rate']:>7.1%}")
+
+
+async def _main(args) -> dict:
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        test = LoadTest(client, PROFILES[args.profile], args.users, args.duration, args.ramp_up, args.seed)
+        await test.login(args.user, args.password)
+        await test.load_reference()
+        return await test.run()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="School-day HTTP load test")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--user", required=True, help="Admin account used by every virtual user")
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="school-day")
+    parser.add_argument("--users", type=int, default=50, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=120, help="Seconds")
+    parser.add_argument("--ramp-up", type=float, default=10, help="Seconds until every user has started")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args(argv)
+
+    phases = ", ".join(f"{name} {share:.0%}" for name, share, _ in PROFILES[args.profile])
+    print(f"{args.users} users for {args.duration:.0f}s against {args.base_url} ({phases})")
+    report = asyncio.run(_main(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"profile": args.profile, "users": args.users, **report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
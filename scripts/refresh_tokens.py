@@ -0,0 +1,33 @@
+"""
+Refresh token maintenance.
+
+Expired tokens are rejected by their JWT expiry alone, so their rows only
+take space. Run from cron, not at startup (every worker would race to
+delete the same rows):
+
+    python -m scripts.refresh_tokens purge
+"""
+import argparse
+
+from sqlmodel import Session
+
+from user.services import purge_expired_refresh_tokens
+from utils.logging import configure_logging
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Refresh token maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("purge", help="Delete expired refresh tokens")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    from db import engine
+
+    with Session(engine) as session:
+        if args.command == "purge":
+            print(f"deleted {purge_expired_refresh_tokens(session)} expired refresh tokens")
+
+
+if __name__ == "__main__":
+    main()
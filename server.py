@@ -0,0 +1,109 @@
+"""
+Production entry point: `main.app` under gunicorn with uvicorn workers.
+
+    python -m server              # gunicorn, configured from the WEB_* settings
+    python -m server --single     # one uvicorn process (development, Windows, comparisons)
+    python -m server --print-config
+
+The app is imported once in the gunicorn master (WEB_PRELOAD) and forked
+into the workers, so workers start fast and share the imported code pages.
+Threads and pooled connections do not survive fork: `post_fork` restarts
+the log writer and drops inherited database connections in each worker.
+Worker recycling (WEB_MAX_REQUESTS) and graceful shutdown
+(WEB_GRACEFUL_TIMEOUT) let in-flight requests finish; on SIGTERM a worker
+first reports not ready for WEB_DRAIN_SECONDS (utils/graceful.py).
+
+In-process state stays per worker: the "memory" cache and rate limit
+backends and /metrics only cover the worker that answered. Use
+CACHE_BACKEND=redis and RATE_LIMIT_BACKEND=redis with more than one worker.
+"""
+import argparse
+import multiprocessing
+
+import setting
+
+
+def default_workers(cpus: int = 0) -> int:
+    """2 x CPUs + 1 (room for workers waiting on the database), capped at WEB_MAX_WORKERS."""
+    cpus = cpus or multiprocessing.cpu_count()
+    return max(1, min(2 * cpus + 1, setting.WEB_MAX_WORKERS))
+
+
+def post_fork(server, worker) -> None:
+    from utils import logging as app_logging
+    app_logging.reset_after_fork()
+
+    import db
+    # Connections opened by the master belong to it; the worker opens its own
+    db.reset_after_fork()
+
+
+def gunicorn_options(workers: int = 0) -> dict:
+    return {
+        "bind": f"{setting.WEB_HOST}:{setting.WEB_PORT}",
+        "workers": workers or setting.WEB_WORKERS or default_workers(),
+        "worker_class": "utils.gunicorn_worker.DrainingUvicornWorker",
+        "preload_app": setting.WEB_PRELOAD,
+        "keepalive": setting.WEB_KEEPALIVE,  # uvicorn's timeout_keep_alive
+        "max_requests": setting.WEB_MAX_REQUESTS,
+        "max_requests_jitter": setting.WEB_MAX_REQUESTS_JITTER,
+        "timeout": setting.WEB_TIMEOUT,
+        "graceful_timeout": setting.WEB_GRACEFUL_TIMEOUT,  # uvicorn's timeout_graceful_shutdown
+        "forwarded_allow_ips": setting.TRUSTED_PROXIES,
+        "post_fork": post_fork,
+    }
+
+
+def run_gunicorn(options: dict) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+            import db
+            # Build the engine (driver, dialect) before forking; it opens no connection yet
+            db.get_engine()
+            return app
+
+    Server().run()
+
+
+def run_single() -> None:
+    import uvicorn
+
+    from utils.graceful import DrainingServer
+
+    DrainingServer(uvicorn.Config(
+        "main:app",
+        host=setting.WEB_HOST,
+        port=setting.WEB_PORT,
+        timeout_keep_alive=setting.WEB_KEEPALIVE,
+        timeout_graceful_shutdown=setting.WEB_GRACEFUL_TIMEOUT,
+        forwarded_allow_ips=setting.TRUSTED_PROXIES,
+    )).run()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run the API server")
+    parser.add_argument("--single", action="store_true", help="One uvicorn process instead of gunicorn")
+    parser.add_argument("--workers", type=int, default=0, help="Override WEB_WORKERS")
+    parser.add_argument("--print-config", action="store_true", help="Show the gunicorn options and exit")
+    args = parser.parse_args(argv)
+
+    if args.single:
+        run_single()
+        return
+    options = gunicorn_options(args.workers)
+    if args.print_config:
+        for key, value in options.items():
+            print(f"{key} = {getattr(value, '__name__', value)}")
+        return
+    run_gunicorn(options)
+
+
+if __name__ == "__main__":
+    main()
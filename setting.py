@@ -1,3 +1,4 @@
+import os
 from starlette.config import Config
 from starlette.datastructures import Secret
 
@@ -15,3 +16,93 @@ ALGORITHM = config("ALGORITHM", cast=str)
 ACCESS_TOKEN_EXPIRE_MINUTES = config("ACCESS_TOKEN_EXPIRE_MINUTES", cast=int)
 REFRESH_TOKEN_EXPIRE_MINUTES = config("REFRESH_TOKEN_EXPIRE_MINUTES", cast=int)
 JWT_REFRESH_SECRET_KEY = config("JWT_REFRESH_SECRET_KEY", cast=str)
+
+# Academic year (used for attendance partitioning and archival)
+ACADEMIC_YEAR_START_MONTH = config("ACADEMIC_YEAR_START_MONTH", cast=int, default=4)
+
+# Cold storage for closed academic years (Parquet files)
+COLD_STORAGE_DIR = config(
+    "COLD_STORAGE_DIR",
+    cast=str,
+    default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive"),
+)
+
+# Shared state backend for rate limiting ("memory" or "redis")
+RATE_LIMIT_BACKEND = config("RATE_LIMIT_BACKEND", cast=str, default="memory")
+REDIS_URL = config("REDIS_URL", cast=str, default="redis://localhost:6379/0")
+
+# Login throttling: burst size and sustained attempts per minute
+LOGIN_USER_BURST = config("LOGIN_USER_BURST", cast=int, default=5)
+LOGIN_USER_PER_MINUTE = config("LOGIN_USER_PER_MINUTE", cast=float, default=5)
+LOGIN_IP_BURST = config("LOGIN_IP_BURST", cast=int, default=20)
+LOGIN_IP_PER_MINUTE = config("LOGIN_IP_PER_MINUTE", cast=float, default=30)
+# Comma-separated proxy addresses (or "*") whose X-Forwarded-For names the real
+# client; the login IP bucket is keyed on that client instead of the proxy
+TRUSTED_PROXIES = config("TRUSTED_PROXIES", cast=str, default="127.0.0.1")
+
+# Shared cache ("memory" keeps everything per worker, "redis" shares values
+# and invalidations between workers through REDIS_URL)
+CACHE_BACKEND = config("CACHE_BACKEND", cast=str, default="memory")
+CACHE_CHANNEL = config("CACHE_CHANNEL", cast=str, default="mms:cache-invalidate")
+CACHE_LOCAL_SIZE = config("CACHE_LOCAL_SIZE", cast=int, default=4096)
+# Upper bound on how long a worker keeps a local copy of a shared value
+CACHE_LOCAL_TTL_SECONDS = config("CACHE_LOCAL_TTL_SECONDS", cast=float, default=60)
+# Reference data (class names, categories) rarely changes and is invalidated on write
+REFERENCE_CACHE_TTL_SECONDS = config("REFERENCE_CACHE_TTL_SECONDS", cast=int, default=3600)
+
+# A statement shape repeated this many times in one request is logged as a suspected N+1
+N_PLUS_ONE_THRESHOLD = config("N_PLUS_ONE_THRESHOLD", cast=int, default=5)
+
+# Slow query log (opt-in): statements slower than the threshold are kept with
+# their parameters, route and an EXPLAIN (ANALYZE, BUFFERS) plan
+SLOW_QUERY_LOG_ENABLED = config("SLOW_QUERY_LOG_ENABLED", cast=bool, default=False)
+SLOW_QUERY_THRESHOLD_MS = config("SLOW_QUERY_THRESHOLD_MS", cast=float, default=500)
+SLOW_QUERY_BUFFER_SIZE = config("SLOW_QUERY_BUFFER_SIZE", cast=int, default=200)
+SLOW_QUERY_EXPLAIN = config("SLOW_QUERY_EXPLAIN", cast=bool, default=True)
+SLOW_QUERY_EXPLAIN_INTERVAL = config("SLOW_QUERY_EXPLAIN_INTERVAL", cast=float, default=300)
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = config("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", cast=int, default=10000)
+
+# Logging (see utils/logging.py). SQL statements can be logged with
+# LOG_LEVELS="sqlalchemy.engine=INFO" instead of engine echo.
+LOG_LEVEL = config("LOG_LEVEL", cast=str, default="INFO")
+LOG_LEVELS = config("LOG_LEVELS", cast=str, default="")
+LOG_FORMAT = config("LOG_FORMAT", cast=str, default="json")
+LOG_DEBUG_SAMPLE_RATE = config("LOG_DEBUG_SAMPLE_RATE", cast=float, default=0.1)
+
+# Endpoint benchmarks (scripts/bench_endpoints.py) seed and use their own
+# database; it is emptied on every reseed, so never point it at real data
+BENCH_DATABASE_URL = config("BENCH_DATABASE_URL", cast=Secret, default=TEST_DATABASE_URL)
+# Allowed p50 slowdown against the stored baseline (0.5 = 50%); SQL statement
+# counts are deterministic and must never grow
+BENCH_TOLERANCE = config("BENCH_TOLERANCE", cast=float, default=0.5)
+
+# Production server (server.py): gunicorn with uvicorn workers.
+# WEB_WORKERS=0 picks 2 x CPUs + 1, capped at WEB_MAX_WORKERS; every worker
+# has its own database pool, so keep workers x pool size under max_connections.
+WEB_HOST = config("WEB_HOST", cast=str, default="0.0.0.0")
+WEB_PORT = config("WEB_PORT", cast=int, default=8000)
+WEB_WORKERS = config("WEB_WORKERS", cast=int, default=0)
+WEB_MAX_WORKERS = config("WEB_MAX_WORKERS", cast=int, default=8)
+WEB_PRELOAD = config("WEB_PRELOAD", cast=bool, default=True)
+# Idle seconds a client connection is kept open between requests
+WEB_KEEPALIVE = config("WEB_KEEPALIVE", cast=int, default=5)
+# Restart a worker after this many requests (plus up to the jitter) to cap slow leaks; 0 disables
+WEB_MAX_REQUESTS = config("WEB_MAX_REQUESTS", cast=int, default=2000)
+WEB_MAX_REQUESTS_JITTER = config("WEB_MAX_REQUESTS_JITTER", cast=int, default=200)
+# Seconds a silent worker may take before it is killed, and seconds in-flight
+# requests get to finish on shutdown or restart
+WEB_TIMEOUT = config("WEB_TIMEOUT", cast=int, default=60)
+WEB_GRACEFUL_TIMEOUT = config("WEB_GRACEFUL_TIMEOUT", cast=int, default=30)
+# After SIGTERM a worker keeps serving but answers /readyz with 503 for this
+# many seconds, so load balancers stop routing to it before it stops
+# accepting. Counts against WEB_GRACEFUL_TIMEOUT under gunicorn.
+WEB_DRAIN_SECONDS = config("WEB_DRAIN_SECONDS", cast=float, default=5)
+
+# Health probes: /healthz (liveness) and /readyz (database, pool, cache).
+# A readiness result is reused for READY_CACHE_SECONDS so polling every second
+# costs at most one SELECT 1 per worker and interval. A worker is not ready
+# when the round trip is slower than READY_DB_MAX_LATENCY_MS or this share of
+# its pool is checked out (1.0 = no free connection)
+READY_CACHE_SECONDS = config("READY_CACHE_SECONDS", cast=float, default=1.0)
+READY_DB_MAX_LATENCY_MS = config("READY_DB_MAX_LATENCY_MS", cast=float, default=500)
+READY_MAX_POOL_SATURATION = config("READY_MAX_POOL_SATURATION", cast=float, default=1.0)
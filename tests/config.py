@@ -1,28 +1,156 @@
+"""
+Test database.
+
+The schema is built once and every test runs inside a transaction that is
+rolled back afterwards (see `test_session` in conftest.py), so tests never
+recreate tables or reseed users.
+
+TEST_DATABASE_URL picks the backend:
+
+- "sqlite://": one in-memory SQLite database shared by all threads. Fastest,
+  but PostgreSQL-only tests are skipped.
+- a PostgreSQL URL: `<name>_template` is built from the models and seeded
+  once, and rebuilt only when the models change. Each pytest-xdist worker
+  (or the single process) then gets its own `<name>_<worker>` copy via
+  CREATE DATABASE ... TEMPLATE, which takes well under a second, and drops
+  it at the end of the session.
+"""
+import hashlib
 import os
-from sqlalchemy.orm import Session
+from contextlib import contextmanager
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateIndex, CreateTable
 from sqlmodel import SQLModel, create_engine
-from typing import Generator
+
+import main  # noqa: F401  (registers every table on SQLModel.metadata)
 import setting
 
 # Use test database URL from environment
 TEST_DATABASE_URL: str = str(setting.TEST_DATABASE_URL)
+WORKER = os.environ.get("PYTEST_XDIST_WORKER", "main")
 
-# Create test engine
-engine = create_engine(
-    TEST_DATABASE_URL,
-    echo=True,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    pool_size=5,
-    max_overflow=10
-)
+TEST_USERS = [
+    ("admin", "admin@example.com", "adminpass123", "ADMIN"),
+    ("teacher1", "teacher1@example.com", "teacherpass123", "TEACHER"),
+    ("user1", "user1@example.com", "userpass123", "USER"),
+]
 
-def init_test_db() -> None:
-    """Initialize test database"""
-    SQLModel.metadata.create_all(engine)
 
-def override_get_session() -> Generator[Session, None, None]:
-    """Override database session for testing."""
+def seed_users(engine) -> None:
     from sqlmodel import Session
+
+    from user.services import get_password_hash
+    from user.user_models import User, UserRole
+
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        session.add_all(
+            User(username=username, email=email, password=get_password_hash(password), role=UserRole[role])
+            for username, email, password, role in TEST_USERS
+        )
+        session.commit()
+
+
+def init_test_db() -> None:
+    """Create the schema and seed users on `engine`."""
+    SQLModel.metadata.create_all(engine)
+    seed_users(engine)
+
+
+def _schema_fingerprint(dialect) -> str:
+    ddl = []
+    for table in SQLModel.metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=dialect)))
+        ddl.extend(str(CreateIndex(index).compile(dialect=dialect)) for index in table.indexes)
+    ddl += [f"{username}:{role}" for username, _, _, role in TEST_USERS]
+    return hashlib.sha1("\n".join(ddl).encode()).hexdigest()[:16]
+
+
+def _sqlite_engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+    # pysqlite's own transaction handling breaks SAVEPOINTs; let SQLAlchemy emit BEGIN
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    return engine
+
+
+def _postgres_engine():
+    url = make_url(TEST_DATABASE_URL)
+    template, database = f"{url.database}_template", f"{url.database}_{WORKER}"
+    admin = create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT", poolclass=StaticPool)
+    fingerprint = _schema_fingerprint(admin.dialect)
+    try:
+        with admin.connect() as conn:
+            # Workers starting together build the template only once
+            conn.execute(text("SELECT pg_advisory_lock(hashtext(:name))"), {"name": template})
+            current = conn.execute(
+                text("SELECT shobj_description(oid, 'pg_database') FROM pg_database WHERE datname = :name"),
+                {"name": template},
+            ).scalar()
+            if current != fingerprint:
+                conn.execute(text(f'DROP DATABASE IF EXISTS "{template}" WITH (FORCE)'))
+                conn.execute(text(f'CREATE DATABASE "{template}"'))
+                template_engine = create_engine(url.set(database=template))
+                SQLModel.metadata.create_all(template_engine)
+                seed_users(template_engine)
+                template_engine.dispose()
+                conn.execute(text(f"COMMENT ON DATABASE \"{template}\" IS '{fingerprint}'"))
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{database}" WITH (FORCE)'))
+            conn.execute(text(f'CREATE DATABASE "{database}" TEMPLATE "{template}"'))
+            conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": template})
+    finally:
+        admin.dispose()
+    return create_engine(url.set(database=database), pool_pre_ping=True, pool_size=5, max_overflow=10)
+
+
+def drop_test_db() -> None:
+    """Drop this worker's copy of the template (PostgreSQL only)."""
+    engine.dispose()
+    if engine.dialect.name != "postgresql":
+        return
+    admin = create_engine(engine.url.set(database="postgres"), isolation_level="AUTOCOMMIT", poolclass=StaticPool)
+    with admin.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{engine.url.database}" WITH (FORCE)'))
+    admin.dispose()
+
+
+@contextmanager
+def scratch_engine(suffix: str):
+    """
+    Engine on a throwaway PostgreSQL copy of the template, for tests that
+    change the schema itself (and so cannot run inside a rolled-back transaction).
+    """
+    url = make_url(TEST_DATABASE_URL)
+    database = f"{url.database}_{WORKER}_{suffix}"
+    admin = create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT", poolclass=StaticPool)
+    with admin.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{database}" WITH (FORCE)'))
+        conn.execute(text(f'CREATE DATABASE "{database}" TEMPLATE "{url.database}_template"'))
+    scratch = create_engine(url.set(database=database))
+    try:
+        yield scratch
+    finally:
+        scratch.dispose()
+        with admin.connect() as conn:
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{database}" WITH (FORCE)'))
+        admin.dispose()
+
+
+if TEST_DATABASE_URL.startswith("sqlite"):
+    engine = _sqlite_engine()
+    init_test_db()
+else:
+    engine = _postgres_engine()
@@ -1,26 +1,35 @@
 import pytest
-from sqlmodel import SQLModel, Session
+from sqlmodel import Session
 from fastapi.testclient import TestClient
-from .config import engine, init_test_db
+from .config import drop_test_db, engine
 from main import app
 from db import get_session
 
+
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_db():
-    """Setup test database"""
-    init_test_db()
+    """The schema and seed users are built once (see tests/config.py)."""
     yield
-    SQLModel.metadata.drop_all(engine)
+    drop_test_db()
+
 
 @pytest.fixture
 def test_session():
-    """Provide test database session"""
-    with Session(engine) as session:
-        try:
-            yield session
-        finally:
-            session.rollback()
-            session.close()
+    """
+    Session on a connection whose outer transaction is rolled back after the
+    test. Commits made by the test or by endpoints only release a SAVEPOINT,
+    so nothing outlives the test.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
 
 @pytest.fixture
 def test_client(test_session):
@@ -32,44 +41,24 @@ def test_client(test_session):
             test_session.rollback()
     
     app.dependency_overrides[get_session] = override_get_session
+    # Login throttling and cached data must not leak between tests
+    from utils.cache import get_cache
+    from utils.health import readiness
+    from utils.metrics import metrics
+    from utils.rate_limit import get_backend
+    get_backend().reset()
+    get_cache().local.clear()
+    metrics.reset()
+    readiness.reset()  # a previous test may have left it draining
     with TestClient(app) as client:
         yield client
     app.dependency_overrides.clear()
 
-@pytest.fixture(autouse=True)
-def setup_db():
-    """Setup and teardown the database for each test."""
-    from sqlmodel import SQLModel
-    from user.user_models import UserRole, User
-    from sqlmodel import Session
-
-    SQLModel.metadata.create_all(engine)  # Create tables
 
-    # Seed the database with test users
-    with Session(engine) as session:
-        admin_user = User(
-            username="admin",
-            email="admin@example.com",
-            hashed_password="adminpass123",  # Ensure this matches your hashing logic
-            role=UserRole.ADMIN
-        )
-        teacher_user = User(
-            username="teacher1",
-            email="teacher1@example.com",
-            hashed_password="teacherpass123",  # Ensure this matches your hashing logic
-            role=UserRole.TEACHER
-        )
-        regular_user = User(
-            username="user1",
-            email="user1@example.com",
-            hashed_password="userpass123",  # Ensure this matches your hashing logic
-            role=UserRole.USER
-        )
-        session.add_all([admin_user, teacher_user, regular_user])
-        session.commit()
-
-    yield
-    SQLModel.metadata.drop_all(engine)  # Drop tables after the test
+@pytest.fixture
+def postgres_only():
+    if engine.dialect.name != "postgresql":
+        pytest.skip("needs PostgreSQL")
 
 @pytest.fixture
 def admin_token(test_client):
@@ -89,4 +78,16 @@ def teacher_token(test_client):
         "password": "teacherpass123"
     })
     assert response.status_code == 200, f"Login failed: {response.json()}"
-    return response.json()["access_token"]
\ No newline at end of file
+    return response.json()["access_token"]
+@pytest.fixture
+def query_budget():
+    """
+    Fail the test when a response ran more SQL statements than allowed:
+    query_budget(response, 2). Counts come from the X-DB-Queries header.
+    """
+    def check(response, budget: int):
+        used = int(response.headers["X-DB-Queries"])
+        assert used <= budget, (
+            f"{response.request.method} {response.request.url.path} ran {used} SQL statements, budget is {budget}"
+        )
+    return check
@@ -0,0 +1,104 @@
+"""
+In-process stand-in for a Redis server, for tests of the shared backends.
+
+Speaks RESP2 over a real TCP socket and implements only the commands the
+app uses: PING, GET, SET (with EX), DEL, SADD, SMEMBERS, EXPIRE, PUBLISH
+and SUBSCRIBE. Expiry is not enforced.
+"""
+import socketserver
+import threading
+
+
+def _encode(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode()
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    if isinstance(value, (list, set)):
+        return b"*%d\r\n" % len(value) + b"".join(_encode(v) for v in value)
+    raise TypeError(value)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        server = self.server
+        while True:
+            args = self._read_command()
+            if args is None:
+                break
+            name, args = args[0].upper(), args[1:]
+            with server.lock:
+                server.commands.append(name.decode())
+                if name == b"SUBSCRIBE":
+                    for i, channel in enumerate(args, 1):
+                        server.subscribers.setdefault(channel, []).append(self.wfile)
+                        self.wfile.write(_encode([b"subscribe", channel, i]))
+                    continue
+                reply = self._execute(server, name, args)
+            self.wfile.write(_encode(reply))
+
+    @staticmethod
+    def _execute(server, name, args):
+        data = server.data
+        if name == b"PING":
+            return "PONG"
+        if name == b"GET":
+            return data.get(args[0])
+        if name == b"SET":
+            data[args[0]] = args[1]
+            return "OK"
+        if name == b"DEL":
+            return sum(data.pop(key, None) is not None for key in args)
+        if name == b"SADD":
+            members = data.setdefault(args[0], set())
+            before = len(members)
+            members.update(args[1:])
+            return len(members) - before
+        if name == b"SMEMBERS":
+            return sorted(data.get(args[0], set()))
+        if name == b"EXPIRE":
+            return 1
+        if name == b"PUBLISH":
+            receivers = server.subscribers.get(args[0], [])
+            for wfile in receivers:
+                wfile.write(_encode([b"message", args[0], args[1]]))
+            return len(receivers)
+        raise NotImplementedError(name)
+
+
+class FakeRedis(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.lock = threading.Lock()
+        self.data = {}
+        self.subscribers = {}
+        self.commands = []
+
+    @property
+    def url(self) -> str:
+        return "redis://%s:%d/0" % self.server_address
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
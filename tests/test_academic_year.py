@@ -0,0 +1,17 @@
+from datetime import date
+
+import setting
+from utils.academic_year import academic_year_bounds, academic_year_of
+from scripts.attendance_partitions import partition_name
+
+
+def test_academic_year_of(monkeypatch):
+    monkeypatch.setattr(setting, "ACADEMIC_YEAR_START_MONTH", 4)
+    assert academic_year_of(date(2024, 3, 31)) == 2023
+    assert academic_year_of(date(2024, 4, 1)) == 2024
+
+
+def test_academic_year_bounds(monkeypatch):
+    monkeypatch.setattr(setting, "ACADEMIC_YEAR_START_MONTH", 8)
+    assert academic_year_bounds(2024) == (date(2024, 8, 1), date(2025, 8, 1))
+    assert partition_name(2024) == "attendance_ay2024"
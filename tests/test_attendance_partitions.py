@@ -0,0 +1,69 @@
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session
+
+import setting
+from scripts import attendance_partitions as partitions
+from tests.config import scratch_engine
+from utils import cold_storage
+from utils.academic_year import current_academic_year
+
+
+@pytest.fixture
+def partitioned(postgres_only):
+    with scratch_engine("partitions") as engine:
+        partitions.migrate_to_partitioned(engine)
+        yield engine
+
+
+def _insert(engine, when: datetime) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO attendance (created_at, updated_at, attendance_date) VALUES (:when, :when, :when)"
+        ), {"when": when})
+
+
+def _rows_in(engine, table: str) -> int:
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+
+
+def test_new_partition_takes_rows_from_default(partitioned):
+    future = current_academic_year() + 3
+    start = datetime(future, setting.ACADEMIC_YEAR_START_MONTH, 2)
+    _insert(partitioned, start)
+    assert _rows_in(partitioned, partitions.DEFAULT_PARTITION) == 1
+
+    with partitioned.begin() as conn:
+        assert partitions.create_year_partition(conn, future)
+    assert _rows_in(partitioned, partitions.DEFAULT_PARTITION) == 0
+    assert _rows_in(partitioned, partitions.partition_name(future)) == 1
+    assert _rows_in(partitioned, "attendance") == 1
+
+
+def test_restore_takes_rows_written_while_detached(partitioned):
+    year = current_academic_year() - 1
+    with partitioned.begin() as conn:
+        partitions.create_year_partition(conn, year)
+    _insert(partitioned, datetime(year, setting.ACADEMIC_YEAR_START_MONTH, 3))
+    partitions.archive_year(partitioned, year)
+
+    _insert(partitioned, datetime(year, setting.ACADEMIC_YEAR_START_MONTH, 4))  # backdated, lands in default
+    with pytest.raises(ValueError, match="detached"):
+        with Session(partitioned) as session:
+            cold_storage.export_year(session, "attendance", year)
+
+    partitions.restore_year(partitioned, year)
+    assert _rows_in(partitioned, partitions.DEFAULT_PARTITION) == 0
+    assert _rows_in(partitioned, partitions.partition_name(year)) == 2
+
+
+def test_archive_refuses_year_in_cold_storage(partitioned, tmp_path, monkeypatch):
+    year = current_academic_year() - 1
+    monkeypatch.setattr(setting, "COLD_STORAGE_DIR", str(tmp_path))
+    (tmp_path / "manifest.json").write_text(json.dumps({"attendance": {str(year): {}}}))
+    with pytest.raises(ValueError, match="cold storage"):
+        partitions.archive_year(partitioned, year)
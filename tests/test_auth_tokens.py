@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlmodel import select
+
+from tests.config import engine
+from user import services
+from user.services import bump_token_version, purge_expired_refresh_tokens, remember_token_version
+from user.user_models import RefreshToken, User, UserRole
+
+
+def _login(test_client, username, password):
+    response = test_client.post("/login-swagger", data={"username": username, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_token_claims_authorize_without_user_query(test_client):
+    headers = _login(test_client, "admin", "adminpass123")
+    test_client.get("/admin/all_users/", headers=headers)  # primes the token version cache
+
+    user_queries = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM "user"' in statement and "WHERE" in statement:
+            user_queries.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        assert test_client.get("/class_name/class-names-all/", headers=headers).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert user_queries == []
+
+
+def test_role_change_invalidates_token(test_session, test_client):
+    headers = _login(test_client, "teacher1", "teacherpass123")
+    assert test_client.get("/admin/all_users/", headers=headers).status_code == 403
+
+    teacher = test_session.exec(select(User).where(User.username == "teacher1")).one()
+    teacher.role = UserRole.ADMIN
+    bump_token_version(teacher)
+    test_session.commit()
+    remember_token_version(teacher.id, teacher.token_version)
+
+    # The old token still names TEACHER, but its version is stale so the current role applies
+    assert test_client.get("/admin/all_users/", headers=headers).status_code == 200
+
+
+def test_deleted_user_token_rejected(test_session, test_client):
+    headers = _login(test_client, "user1", "userpass123")
+    user = test_session.exec(select(User).where(User.username == "user1")).one()
+    user_id = user.id
+    test_session.delete(user)
+    test_session.commit()
+    remember_token_version(user_id, None)
+    assert test_client.get("/auth/me", headers=headers).status_code == 401
+
+
+def test_refresh_token_rotation_and_revocation(test_client):
+    response = test_client.post("/login-swagger", data={"username": "admin", "password": "adminpass123"})
+    first = response.json()["refresh_token"]
+
+    test_client.cookies.set("refresh_token", first)
+    response = test_client.post("/auth/refresh")
+    assert response.status_code == 200, response.text
+    second = response.json()["refresh_token"]
+    assert second != first
+
+    # A refresh token works once
+    test_client.cookies.set("refresh_token", first)
+    assert test_client.post("/auth/refresh").status_code == 401
+    test_client.cookies.set("refresh_token", second)
+    assert test_client.post("/auth/refresh").status_code == 200
+
+
+def test_logout_revokes_refresh_token(test_client):
+    response = test_client.post("/login-swagger", data={"username": "admin", "password": "adminpass123"})
+    token = response.json()["refresh_token"]
+    test_client.cookies.set("refresh_token", token)
+    assert test_client.post("/auth/logout").status_code == 200
+    test_client.cookies.set("refresh_token", token)
+    assert test_client.post("/auth/refresh").status_code == 401
+
+
+def test_revoked_tokens_load_lazily_without_purging(test_session, test_client, monkeypatch):
+    expired = RefreshToken(user_id=1, token_hash="expired", expires_at=datetime.now() - timedelta(days=1))
+    revoked = RefreshToken(user_id=1, token_hash="revoked", expires_at=datetime.now() + timedelta(days=1), revoked=True)
+    test_session.add_all([expired, revoked])
+    test_session.commit()
+    monkeypatch.setattr(services, "_revoked_refresh_loaded", False)
+    monkeypatch.setattr(services, "_revoked_refresh_tokens", {})
+
+    response = test_client.post("/login-swagger", data={"username": "admin", "password": "adminpass123"})
+    test_client.cookies.set("refresh_token", response.json()["refresh_token"])
+    assert test_client.post("/auth/refresh").status_code == 200
+
+    # Loaded through the request's (overridden) session; nothing was deleted
+    assert services._revoked_refresh_loaded and services.is_refresh_token_revoked("revoked")
+    assert not services.is_refresh_token_revoked("expired")
+    assert test_session.exec(select(RefreshToken).where(RefreshToken.token_hash == "expired")).first() is not None
+
+
+def test_purge_expired_refresh_tokens(test_session):
+    test_session.add(RefreshToken(user_id=1, token_hash="old", expires_at=datetime.now() - timedelta(minutes=1)))
+    test_session.add(RefreshToken(user_id=1, token_hash="live", expires_at=datetime.now() + timedelta(minutes=1)))
+    test_session.commit()
+    assert purge_expired_refresh_tokens(test_session) == 1
+    assert [t.token_hash for t in test_session.exec(select(RefreshToken)).all()] == ["live"]
@@ -0,0 +1,19 @@
+from scripts.bench_endpoints import compare
+
+
+def _result(p50, queries, errors=0):
+    return {"p50_ms": p50, "p95_ms": p50, "mean_ms": p50, "queries": queries, "errors": errors}
+
+
+def test_compare_flags_slowdowns_extra_queries_and_errors():
+    baseline = {"a": _result(100, 2), "b": _result(100, 2), "c": _result(1.0, 2), "d": _result(10, 2)}
+    results = {
+        "a": _result(120, 2),  # within tolerance
+        "b": _result(140, 2),  # too slow
+        "c": _result(2.0, 2),  # doubled, but below the absolute floor
+        "d": _result(10, 3, errors=1),
+        "new": _result(50, 9),  # no baseline yet
+    }
+    regressions = compare(results, baseline, tolerance=0.25, min_delta_ms=2)
+    assert [line.split(":")[0] for line in regressions] == ["b", "d", "d"]
+    assert "3 SQL statements, baseline 2" in regressions[2]
@@ -0,0 +1,69 @@
+import time
+
+from tests.fake_redis import FakeRedis
+from utils.cache import MISSING, Cache, MemoryBackend, RedisBackend
+from utils.redis_client import RedisClient
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_memory_backend_lru_and_expiry():
+    backend = MemoryBackend(maxsize=2)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    backend.get("a")
+    backend.set("c", 3)
+    assert backend.get("b") is MISSING  # least recently used
+    assert backend.get("a") == 1
+
+    backend.set("d", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert backend.get("d") is MISSING
+
+
+def test_shared_values_and_cross_worker_invalidation():
+    with FakeRedis() as server:
+        workers = []
+        for _ in range(2):
+            cache = Cache(MemoryBackend(), RedisBackend(RedisClient.from_url(server.url)), "test-channel")
+            cache.start_listener(RedisClient.from_url(server.url))
+            workers.append(cache)
+        first, second = workers
+        _wait_for(lambda: server.commands.count("SUBSCRIBE") == 2)
+
+        first.set("class_names", "all", [{"class_name_id": 1, "class_name": "One"}])
+        # Computed once, reused by the other worker
+        assert second.get_or_set("class_names", "all", lambda: 1 / 0) == [{"class_name_id": 1, "class_name": "One"}]
+        assert second.local.get("class_names:all") is not MISSING
+
+        first.invalidate("class_names")
+        _wait_for(lambda: second.local.get("class_names:all") is MISSING)
+        assert second.get("class_names", "all") is MISSING
+
+        for cache in workers:
+            cache.close()
+
+
+def test_unreachable_server_is_a_miss():
+    client = RedisClient("127.0.0.1", 1, timeout=0.2)
+    cache = Cache(MemoryBackend(), RedisBackend(client))
+    assert cache.get_or_set("ns", "key", lambda: 42) == 42
+    # The local copy still serves this worker, and invalidation still applies to it
+    assert cache.get("ns", "key") == 42
+    cache.invalidate("ns")
+    assert cache.get("ns", "key") is MISSING
+
+
+def test_memory_mode_entries_are_bounded_by_local_ttl(monkeypatch):
+    monkeypatch.setattr("setting.CACHE_LOCAL_TTL_SECONDS", 0.01)
+    cache = Cache(MemoryBackend())
+    cache.set("ns", "forever", 1)
+    cache.set("ns", "long", 2, ttl=3600)
+    time.sleep(0.02)
+    assert cache.get("ns", "forever") is MISSING
+    assert cache.get("ns", "long") is MISSING
@@ -0,0 +1,142 @@
+import os
+from datetime import date, datetime
+
+import pytest
+from sqlmodel import func, select
+
+import setting
+from main import app
+from schemas.class_names_model import ClassNames
+from schemas.fee_model import Fee
+from schemas.income_cat_names_model import IncomeCatNames
+from schemas.income_model import Income
+from schemas.students_model import Students
+from user.user_crud import check_admin, check_authenticated_user, get_current_user
+from user.user_models import User, UserRole
+from utils import cold_storage
+from utils.academic_year import academic_year_bounds, current_academic_year
+
+YEAR = current_academic_year() - 2
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(setting, "COLD_STORAGE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _income(session, when: datetime, amount: float) -> None:
+    category = session.exec(select(IncomeCatNames)).first()
+    if category is None:
+        category = IncomeCatNames(income_cat_name="Fees")
+        session.add(category)
+        session.flush()
+    session.add(Income(date=when, category_id=category.income_cat_name_id, source="test", amount=amount))
+    session.commit()
+
+
+def _year_total(table: str = "income"):
+    start, end = academic_year_bounds(YEAR)
+    return cold_storage.aggregate(table, start, end, [("amount", "sum")])
+
+
+def test_export_and_aggregate_round_trip(test_session, archive_dir):
+    start, end = academic_year_bounds(YEAR)
+    _income(test_session, datetime.combine(start, datetime.min.time()), 100)
+    _income(test_session, datetime(start.year, start.month, 20), 50)
+    _income(test_session, datetime.combine(end, datetime.min.time()), 7)  # next year, stays hot
+
+    assert cold_storage.export_year(test_session, "income", YEAR) == 2
+    assert test_session.exec(select(func.count()).select_from(Income)).one() == 1
+    assert _year_total() == [{"amount_sum": 150.0}]
+    by_month = cold_storage.aggregate("income", start, end, [("amount", "sum")], by_month=True)
+    assert by_month == [{"month": start.month, "amount_sum": 150.0}]
+    assert cold_storage.aggregate("income", date(1990, 1, 1), date(1991, 1, 1), [("amount", "sum")]) == []
+
+
+def test_re_export_adds_a_part(test_session, archive_dir):
+    start, _ = academic_year_bounds(YEAR)
+    _income(test_session, datetime(start.year, start.month, 2), 100)
+    cold_storage.export_year(test_session, "income", YEAR)
+    # A backdated entry after the year was archived
+    _income(test_session, datetime(start.year, start.month, 3), 25)
+    assert cold_storage.export_year(test_session, "income", YEAR) == 1
+
+    entry = cold_storage.load_manifest()["income"][str(YEAR)]
+    assert entry["rows"] == 2 and len(entry["files"]) == 2
+    assert all(os.path.exists(os.path.join(archive_dir, name)) for name in entry["files"])
+    assert _year_total() == [{"amount_sum": 125.0}]
+
+
+def test_open_year_is_not_exported(test_session, archive_dir):
+    with pytest.raises(ValueError, match="not closed"):
+        cold_storage.export_year(test_session, "income", current_academic_year())
+
+
+@pytest.fixture
+def admin_client(test_client):
+    admin = User(username="admin", email="admin@example.com", password="x", role=UserRole.ADMIN)
+    for dependency in (check_admin, check_authenticated_user, get_current_user):
+        app.dependency_overrides[dependency] = lambda: admin
+    return test_client
+
+
+def test_archived_income_is_exported_and_queried(test_session, archive_dir, admin_client):
+    start, end = academic_year_bounds(YEAR)
+    _income(test_session, datetime(start.year, start.month, 3), 10)
+    _income(test_session, datetime(start.year, start.month, 1), 20)
+    _income(test_session, datetime.combine(end, datetime.min.time()), 30)
+    cold_storage.export_year(test_session, "income", YEAR)
+
+    response = admin_client.get("/income/export")
+    assert [float(line.split(",")[-2]) for line in response.text.splitlines()[1:]] == [20, 10, 30]
+
+    seen, cursor = [], None
+    while True:
+        params = {"kind": "income", "order": "asc", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = admin_client.get("/finance/query", params=params).json()
+        seen += [item["amount"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [20, 10, 30]
+
+
+def test_archived_fees_are_listed(test_session, archive_dir, admin_client):
+    start, _ = academic_year_bounds(YEAR)
+    school_class = ClassNames(class_name="5A")
+    student = Students(
+        student_name="Ali", student_date_of_birth=datetime(2015, 1, 1), student_gender="Male",
+        student_age="10", student_education="Primary", class_name="5A", student_city="City",
+        student_address="Street", father_name="Ahmed", father_occupation="Farmer",
+        father_cnic="00000-0000000-0", father_cast_name="None", father_contact="0300-0000000",
+    )
+    test_session.add_all([school_class, student])
+    test_session.flush()
+    for month, created_at in (("April", datetime(start.year, start.month, 5)), ("May", datetime.now())):
+        test_session.add(Fee(
+            student_id=student.student_id, class_id=school_class.class_name_id, fee_amount=500,
+            fee_month=month, fee_year=str(start.year), fee_status="Paid", created_at=created_at,
+        ))
+    test_session.commit()
+    assert cold_storage.export_year(test_session, "fee", YEAR) == 1
+
+    fees = admin_client.get("/fee/all").json()
+    assert sorted(fee["fee_month"] for fee in fees) == ["April", "May"]
+    assert all(fee["student_name"] == "Ali" and fee["class_name"] == "5A" for fee in fees)
+    filtered = admin_client.post("/fee/filter/", params={"fee_month": "April"}).json()
+    assert [fee["fee_month"] for fee in filtered] == ["April"]
+    assert len(admin_client.get("/fee/paid-students/").json()) == 2
+
+
+def test_attendance_lists_flag_archived_years(archive_dir, admin_client):
+    start, end = academic_year_bounds(YEAR)
+    cold_storage._save_manifest({"attendance": {str(YEAR): {
+        "start": start.isoformat(), "end": end.isoformat(), "rows": 1, "files": [],
+    }}})
+
+    response = admin_client.get("/mark_attendance/filter_attendance_by_ids", params={"attendance_date": str(start)})
+    assert response.status_code == 410
+    response = admin_client.get("/mark_attendance/filter_attendance_by_ids", params={"attendance_date": str(end)})
+    assert response.status_code == 404
+    assert response.headers["X-Archived-Years"] == str(YEAR)
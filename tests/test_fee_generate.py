@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import pytest
+from sqlmodel import select
+
+from main import app
+from router.class_names import cached_class_names
+from router.dashboard import FEE_SUMMARY_CACHE
+from schemas.class_names_model import ClassNames
+from schemas.fee_model import Fee
+from schemas.students_model import Students
+from user.user_crud import check_admin
+from utils.cache import MISSING, get_cache
+
+
+def _student(name: str, class_name: str) -> Students:
+    return Students(
+        student_name=name, student_date_of_birth=datetime(2015, 1, 1), student_gender="Male",
+        student_age="10", student_education="Primary", class_name=class_name, student_city="City",
+        student_address="Street", father_name="Father", father_occupation="Farmer",
+        father_cnic="00000-0000000-0", father_cast_name="None", father_contact="0300-0000000",
+    )
+
+
+@pytest.fixture
+def school(test_session):
+    """Class 5A with three students (one already billed for January 2025) and 6B with two."""
+    classes = [ClassNames(class_name="5A"), ClassNames(class_name="6B")]
+    test_session.add_all(classes)
+    students = [_student(f"A{i}", "5A") for i in range(3)] + [_student(f"B{i}", "6B") for i in range(2)]
+    test_session.add_all(students)
+    test_session.flush()
+    test_session.add(Fee(
+        student_id=students[0].student_id, class_id=classes[0].class_name_id, fee_amount=500,
+        fee_month="January", fee_year="2025", fee_status="Paid",
+    ))
+    test_session.commit()
+    return {c.class_name: c.class_name_id for c in classes}
+
+
+@pytest.fixture
+def client(test_client):
+    app.dependency_overrides[check_admin] = lambda: None
+    return test_client
+
+
+def _generate(client, **body):
+    return client.post("/fee/generate", json={"fee_month": "January", "fee_year": "2025", "fee_amount": 500, **body})
+
+
+def test_generate_for_one_class_skips_billed_students(client, test_session, school):
+    response = _generate(client, class_id=school["5A"])
+    assert response.status_code == 201
+    body = response.json()
+    assert (body["created"], body["skipped"]) == (2, 1)
+    fees = test_session.exec(select(Fee).where(Fee.fee_id.in_(body["fee_ids"]))).all()
+    assert {fee.class_id for fee in fees} == {school["5A"]}
+    assert {fee.fee_status.value for fee in fees} == {"Unpaid"}
+
+    # Running it again creates nothing
+    again = _generate(client, class_id=school["5A"]).json()
+    assert (again["created"], again["skipped"]) == (0, 3)
+
+
+def test_generate_for_the_whole_school(client, test_session, school):
+    _generate(client, class_id=school["5A"])
+    body = _generate(client).json()
+    assert (body["created"], body["skipped"]) == (2, 3)
+    billed = test_session.exec(
+        select(Fee.class_id).where(Fee.fee_month == "January", Fee.fee_year == "2025")
+    ).all()
+    assert sorted(billed).count(school["6B"]) == 2 and len(billed) == 5
+
+    # Another month is billed independently
+    assert _generate(client, fee_month="February").json()["created"] == 5
+
+
+def test_generate_invalidates_fee_summary(client, school):
+    year = str(datetime.now().year)
+    get_cache().set(FEE_SUMMARY_CACHE, year, {"stale": True})
+    _generate(client, class_id=school["6B"])
+    assert get_cache().get(FEE_SUMMARY_CACHE, year) is MISSING
+
+
+def test_generate_rejects_bad_input(client, school):
+    assert _generate(client, fee_month="Smarch").status_code == 400
+    assert _generate(client, class_id=9999).status_code == 404
+
+
+def test_generate_for_class_missing_from_a_stale_cache(client, test_session, school):
+    cached_class_names(test_session)  # as another worker cached the list before 7C existed
+    new_class = ClassNames(class_name="7C")
+    test_session.add(new_class)
+    test_session.add(_student("C0", "7C"))
+    test_session.commit()
+    assert _generate(client, class_id=new_class.class_name_id).json()["created"] == 1
@@ -0,0 +1,39 @@
+from datetime import date, datetime
+
+import pytest
+
+from schemas.expense_cat_names_model import ExpenseCatNames
+from schemas.expense_model import Expense
+from schemas.income_cat_names_model import IncomeCatNames
+from schemas.income_model import Income
+from utils import finance_analytics
+
+
+def test_parse_period():
+    assert finance_analytics.parse_period("month", "2024-12") == (date(2024, 12, 1), date(2025, 1, 1))
+    assert finance_analytics.parse_period("quarter", "2025-Q2") == (date(2025, 4, 1), date(2025, 7, 1))
+    with pytest.raises(ValueError):
+        finance_analytics.parse_period("month", "2025-13")
+
+
+def test_compare_periods_caches_closed_periods(test_session):
+    session = test_session
+    finance_analytics.invalidate()
+    income_cat, expense_cat = IncomeCatNames(income_cat_name="Fees"), ExpenseCatNames(expense_cat_name="Salaries")
+    session.add_all([income_cat, expense_cat])
+    session.flush()
+    income_id, expense_id = income_cat.income_cat_name_id, expense_cat.expense_cat_name_id
+    session.add(Income(date=datetime(2024, 1, 10), category_id=income_id, source="a", amount=100))
+    session.add(Income(date=datetime(2025, 1, 10), category_id=income_id, source="b", amount=70))
+    session.add(Expense(date=datetime(2025, 1, 11), category_id=expense_id, to_whom="c", amount=20))
+    session.commit()
+
+    periods = finance_analytics.compare_periods(session, "month", ["2024-01", "2025-01"])
+    assert [(p.income, p.expense, p.net) for p in periods] == [(100, 0, 100), (70, 20, 50)]
+
+    # A new row in a closed period is not seen until that period is invalidated
+    session.add(Income(date=datetime(2025, 1, 20), category_id=income_id, source="d", amount=5))
+    session.commit()
+    assert finance_analytics.compare_periods(session, "month", ["2025-01"])[0].income == 70
+    finance_analytics.invalidate(datetime(2025, 1, 20))
+    assert finance_analytics.compare_periods(session, "month", ["2025-01"])[0].income == 75
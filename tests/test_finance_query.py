@@ -0,0 +1,84 @@
+from datetime import datetime
+
+import pytest
+from sqlmodel import select
+
+from main import app
+from schemas.expense_cat_names_model import ExpenseCatNames
+from schemas.expense_model import Expense
+from schemas.income_cat_names_model import IncomeCatNames
+from schemas.income_model import Income
+from user.user_crud import check_admin
+
+
+@pytest.fixture
+def client(test_client):
+    app.dependency_overrides[check_admin] = lambda: None
+    return test_client
+
+
+@pytest.fixture
+def entries(test_session):
+    """Income and expense rows that share dates and amounts, so paging must break ties on kind and id."""
+    income_cat, expense_cat = IncomeCatNames(income_cat_name="Fees"), ExpenseCatNames(expense_cat_name="Salaries")
+    test_session.add_all([income_cat, expense_cat])
+    test_session.flush()
+    rows = []
+    for i in range(7):
+        when, amount = datetime(2025, 3, 1 + i % 2), 100 if i % 3 else 50
+        rows.append(Income(date=when, category_id=income_cat.income_cat_name_id, source=f"in {i}", amount=amount))
+        rows.append(Expense(date=when, category_id=expense_cat.expense_cat_name_id, to_whom=f"out {i}", amount=amount))
+    test_session.add_all(rows)
+    test_session.commit()
+    return [("income" if isinstance(row, Income) else "expense", row.id, row.date, row.amount) for row in rows]
+
+
+def _all_pages(client, **params):
+    seen, cursor = [], None
+    while True:
+        response = client.get("/finance/query", params={**params, "limit": 3, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        seen += [(item["kind"], item["id"]) for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize("sort", ["date", "amount"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_pages_cover_every_row_once_across_ties(client, entries, sort, order):
+    column = 2 if sort == "date" else 3
+    expected = sorted(entries, key=lambda e: (e[column], e[0], e[1]), reverse=order == "desc")
+    assert _all_pages(client, sort=sort, order=order) == [(kind, row_id) for kind, row_id, *_ in expected]
+
+
+def test_paging_with_kind_and_filters(client, entries):
+    expected = sorted(
+        (e for e in entries if e[0] == "expense" and e[3] == 100 and e[2].day == 2),
+        key=lambda e: (e[2], e[1]), reverse=True,
+    )
+    pages = _all_pages(client, kind="expense", min_amount=100, start_date="2025-03-02", end_date="2025-03-02")
+    assert pages == [(kind, row_id) for kind, row_id, *_ in expected]
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_undated_rows_come_last_across_pages(client, entries, test_session, order):
+    income_cat = test_session.exec(select(IncomeCatNames.income_cat_name_id)).one()
+    expense_cat = test_session.exec(select(ExpenseCatNames.expense_cat_name_id)).one()
+    undated = [Income(category_id=income_cat, source=f"undated {i}", amount=10) for i in range(2)]
+    undated += [Expense(category_id=expense_cat, to_whom=f"undated {i}", amount=10) for i in range(2)]
+    test_session.add_all(undated)
+    test_session.commit()
+
+    dated = sorted(entries, key=lambda e: (e[2], e[0], e[1]), reverse=order == "desc")
+    nulls = sorted(
+        (("income" if isinstance(row, Income) else "expense", row.id) for row in undated), reverse=order == "desc"
+    )
+    # limit=3 puts a page boundary on an undated row, so a null cursor gets decoded
+    assert _all_pages(client, sort="date", order=order) == [(kind, row_id) for kind, row_id, *_ in dated] + nulls
+
+
+def test_invalid_cursor(client):
+    assert client.get("/finance/query", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/finance/query", params={"kind": "all", "category_id": 1}).status_code == 400
@@ -0,0 +1,78 @@
+import signal
+import time
+
+import pytest
+import uvicorn
+from sqlalchemy.pool import QueuePool
+from sqlmodel import create_engine
+
+from main import app
+from router.health import probe_engine
+from tests.config import engine
+from utils.graceful import DrainingServer
+from utils.health import Readiness, readiness
+
+
+@pytest.fixture
+def probe_test_db(test_client):
+    # Its own engine: the shared SQLite test connection is inside the test's transaction
+    probe = create_engine(engine.url)
+    app.dependency_overrides[probe_engine] = lambda: probe
+    yield test_client
+    probe.dispose()
+
+
+def test_healthz(test_client):
+    response = test_client.get("/healthz")
+    assert response.status_code == 200 and response.json() == {"status": "ok"}
+
+
+def test_readyz_reports_database_pool_and_cache(probe_test_db):
+    response = probe_test_db.get("/readyz")
+    assert response.status_code == 200
+    report = response.json()
+    assert report["ready"] is True and report["draining"] is False
+    assert report["database"]["ok"] is True and report["database"]["latency_ms"] >= 0
+    assert "saturation" in report["pool"]
+    assert report["cache"] == {"ok": True, "backend": "memory"}
+    # Reused within READY_CACHE_SECONDS; probes are not counted as traffic
+    assert probe_test_db.get("/readyz").json() == report
+    assert 'route="/readyz"' not in probe_test_db.get("/metrics").text
+
+
+def test_readyz_503_while_draining(probe_test_db):
+    readiness.draining = True
+    response = probe_test_db.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["draining"] is True
+    assert probe_test_db.get("/healthz").status_code == 200
+
+
+def test_exhausted_pool_is_not_ready_without_waiting():
+    pooled = create_engine("sqlite://", poolclass=QueuePool, pool_size=1, max_overflow=0, pool_timeout=5)
+    with pooled.connect():
+        report = Readiness(ttl=0).check(pooled)
+    assert report["ready"] is False
+    assert report["pool"]["saturation"] == 1.0
+    assert report["database"] == {"ok": False, "error": "pool exhausted"}
+    assert Readiness(ttl=0).check(pooled)["ready"] is True
+    pooled.dispose()
+
+
+def test_sigterm_drains_before_the_server_exits(monkeypatch):
+    monkeypatch.setattr("setting.WEB_DRAIN_SECONDS", 0.2)
+    readiness.reset()
+    server = DrainingServer(uvicorn.Config(app))
+    server.handle_exit(signal.SIGTERM, None)
+    assert readiness.draining is True and server.should_exit is False
+    deadline = time.monotonic() + 2
+    while not server.should_exit and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert server.should_exit is True
+
+    # Ctrl+C does not wait
+    readiness.reset()
+    server = DrainingServer(uvicorn.Config(app))
+    server.handle_exit(signal.SIGINT, None)
+    assert readiness.draining is True and server.should_exit is True
+    readiness.reset()
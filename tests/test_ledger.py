@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from sqlmodel import select
+
+from schemas.expense_cat_names_model import ExpenseCatNames
+from schemas.expense_model import Expense
+from schemas.income_cat_names_model import IncomeCatNames
+from schemas.income_model import Income
+from schemas.ledger_model import MonthlyLedger
+from utils import finance_analytics, ledger
+
+
+def test_record_change_matches_rebuild(test_session):
+    session = test_session
+    income_cat, expense_cat = IncomeCatNames(income_cat_name="Fees"), ExpenseCatNames(expense_cat_name="Salaries")
+    session.add_all([income_cat, expense_cat])
+    session.flush()
+    income_id, expense_id = income_cat.income_cat_name_id, expense_cat.expense_cat_name_id
+    rows = [
+        Income(date=datetime(2024, 1, 5), category_id=income_id, source="a", amount=100),
+        Income(date=datetime(2024, 1, 20), category_id=income_id, source="b", amount=50),
+        Expense(date=datetime(2024, 2, 1), category_id=expense_id, to_whom="c", amount=30),
+    ]
+    for row in rows:
+        session.add(row)
+        ledger.record_change(session, "income" if isinstance(row, Income) else "expense", None, ledger.entry_of(row))
+    session.commit()
+
+    # Move the second income to March and drop the expense
+    old = ledger.entry_of(rows[1])
+    rows[1].date = datetime(2024, 3, 1)
+    ledger.record_change(session, "income", old, ledger.entry_of(rows[1]))
+    ledger.record_change(session, "expense", ledger.entry_of(rows[2]), None)
+    session.delete(rows[2])
+    session.commit()
+
+    maintained = sorted(
+        (r.year, r.month, r.kind, r.amount, r.entries)
+        for r in session.exec(select(MonthlyLedger)).all() if r.entries
+    )
+    ledger.rebuild(session)
+    rebuilt = sorted(
+        (r.year, r.month, r.kind, r.amount, r.entries) for r in session.exec(select(MonthlyLedger)).all()
+    )
+    assert maintained == rebuilt == [(2024, 1, "income", 100, 1), (2024, 3, "income", 50, 1)]
+
+    result = ledger.monthly_ledger(session, 2024, 2, 2024, 3, by_category=True)
+    assert result.opening_balance == 100
+    assert [m.running_balance for m in result.months] == [100, 150]
+    assert result.months[1].income_by_category == {"Fees": 50}
+
+
+def test_analytics_invalidated_only_on_commit(test_session, monkeypatch):
+    invalidated = []
+    monkeypatch.setattr(finance_analytics, "invalidate", invalidated.append)
+    category = IncomeCatNames(income_cat_name="Fees")
+    test_session.add(category)
+    test_session.flush()
+
+    row = Income(date=datetime(2024, 1, 5), category_id=category.income_cat_name_id, source="a", amount=100)
+    test_session.add(row)
+    ledger.record_change(test_session, "income", None, ledger.entry_of(row))
+    assert invalidated == []
+    test_session.commit()
+    assert invalidated == [datetime(2024, 1, 5)]
+
+    ledger.record_change(test_session, "income", ledger.entry_of(row), None)
+    test_session.rollback()
+    test_session.commit()
+    assert invalidated == [datetime(2024, 1, 5)]
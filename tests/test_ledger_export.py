@@ -0,0 +1,89 @@
+import csv
+import io
+from datetime import datetime
+
+import pytest
+
+from main import app
+from schemas.class_names_model import ClassNames
+from schemas.expense_cat_names_model import ExpenseCatNames
+from schemas.expense_model import Expense
+from schemas.fee_model import Fee
+from schemas.income_cat_names_model import IncomeCatNames
+from schemas.income_model import Income
+from schemas.students_model import Students
+from user.user_crud import check_admin
+from utils import ledger_export
+
+
+@pytest.fixture
+def client(test_client, monkeypatch):
+    app.dependency_overrides[check_admin] = lambda: None
+    monkeypatch.setattr(ledger_export, "BATCH_SIZE", 2)  # several batches per export
+    return test_client
+
+
+@pytest.fixture
+def ledger(test_session):
+    income_cat, expense_cat = IncomeCatNames(income_cat_name="Donations"), ExpenseCatNames(expense_cat_name="Utilities")
+    test_session.add_all([income_cat, expense_cat])
+    test_session.flush()
+    for day in (5, 1, 20, 12, 28):
+        test_session.add(Income(
+            date=datetime(2025, 3, day), category_id=income_cat.income_cat_name_id,
+            source=f"Donor {day}", amount=day * 10, created_at=datetime(2025, 3, day),
+        ))
+    test_session.add(Expense(
+        date=datetime(2025, 3, 2), category_id=expense_cat.expense_cat_name_id, to_whom="WAPDA", amount=75.5,
+    ))
+    test_session.commit()
+
+
+def _csv_rows(response):
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    return list(csv.reader(io.StringIO(response.text)))
+
+
+def test_income_export_streams_rows_in_date_order(client, ledger):
+    rows = _csv_rows(client.get("/income/export"))
+    assert rows[0][:5] == ["id", "date", "recipt_number", "category", "source"]
+    assert [row[4] for row in rows[1:]] == ["Donor 1", "Donor 5", "Donor 12", "Donor 20", "Donor 28"]
+    assert rows[1][3] == "Donations" and float(rows[1][7]) == 10
+
+
+def test_export_date_range_includes_the_end_day(client, ledger):
+    response = client.get("/income/export", params={"start_date": "2025-03-05", "end_date": "2025-03-20"})
+    assert [row[4] for row in _csv_rows(response)[1:]] == ["Donor 5", "Donor 12", "Donor 20"]
+    assert 'filename="income_2025-03-05_2025-03-20.csv"' in response.headers["content-disposition"]
+
+
+def test_expense_and_fee_exports(client, ledger, test_session):
+    assert _csv_rows(client.get("/expenses/export"))[1][3:5] == ["Utilities", "WAPDA"]
+
+    school_class = ClassNames(class_name="5A")
+    student = Students(
+        student_name="Ali", student_date_of_birth=datetime(2015, 1, 1), student_gender="Male",
+        student_age="10", student_education="Primary", class_name="5A", student_city="City",
+        student_address="Street", father_name="Ahmed", father_occupation="Farmer",
+        father_cnic="00000-0000000-0", father_cast_name="None", father_contact="0300-0000000",
+    )
+    test_session.add_all([school_class, student])
+    test_session.flush()
+    test_session.add(Fee(
+        student_id=student.student_id, class_id=school_class.class_name_id, fee_amount=500,
+        fee_month="March", fee_year="2025", fee_status="Paid",
+    ))
+    test_session.commit()
+    rows = _csv_rows(client.get("/fee/export"))
+    assert rows[1][3:9] == ["Ali", "Ahmed", "5A", "March", "2025", "Paid"]
+
+
+def test_xlsx_export(client, ledger):
+    from openpyxl import load_workbook
+
+    response = client.get("/income/export", params={"format": "xlsx"})
+    assert response.status_code == 200
+    sheet = load_workbook(io.BytesIO(response.content), read_only=True).active
+    rows = list(sheet.iter_rows(values_only=True))
+    assert len(rows) == 6 and rows[1][4] == "Donor 1"
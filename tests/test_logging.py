@@ -0,0 +1,46 @@
+import json
+import logging
+import sys
+
+from utils.logging import DebugSampler, JsonFormatter, _QueueHandler, parse_levels
+
+
+def _record(level=logging.INFO, msg="hello %s", args=("world",), exc_info=None, **extra):
+    record = logging.LogRecord("app.test", level, __file__, 1, msg, args, exc_info)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_record_carries_extra_fields_and_exception():
+    try:
+        raise ValueError("bad")
+    except ValueError:
+        exc_info = sys.exc_info()
+    # Records are prepared for the queue before the listener thread formats them
+    record = _QueueHandler(None).prepare(_record(exc_info=exc_info, db_queries=3))
+    data = json.loads(JsonFormatter().format(record))
+    assert data["message"] == "hello world"
+    assert data["level"] == "INFO" and data["logger"] == "app.test"
+    assert data["db_queries"] == 3
+    assert "ValueError: bad" in data["exception"]
+
+
+def test_debug_sampling_only_drops_debug():
+    sampler = DebugSampler(0.0)
+    assert sampler.filter(_record(logging.INFO))
+    assert not sampler.filter(_record(logging.DEBUG))
+    kept = DebugSampler(0.999999).filter(_record(logging.DEBUG))
+    assert kept
+
+
+def test_loggers_with_an_explicit_level_are_not_sampled():
+    assert DebugSampler(0.0, exempt={"app": "DEBUG"}).filter(_record(logging.DEBUG))
+    assert DebugSampler(0.0, exempt=["app.test"]).filter(_record(logging.DEBUG))
+    assert not DebugSampler(0.0, exempt=["app.tes", "other"]).filter(_record(logging.DEBUG))
+
+
+def test_parse_levels():
+    assert parse_levels(" sqlalchemy.engine=info, utils.query_stats=DEBUG ,") == {
+        "sqlalchemy.engine": "INFO",
+        "utils.query_stats": "DEBUG",
+    }
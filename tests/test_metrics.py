@@ -0,0 +1,13 @@
+def test_metrics_by_route_template(test_client):
+    test_client.get("/")
+    test_client.get("/class_name/123")  # unauthenticated -> 401
+    test_client.get("/no/such/path")
+
+    body = test_client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/",status="200"} 1' in body
+    assert 'http_requests_total{method="GET",route="/class_name/{class_name_id}",status="401"} 1' in body
+    assert 'route="unmatched",status="404"' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/",le="+Inf"} 1' in body
+    assert 'http_response_size_bytes_count{method="GET",route="/"} 1' in body
+    assert "http_requests_in_flight 0" in body
+    assert 'route="/metrics"' not in body
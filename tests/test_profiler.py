@@ -0,0 +1,77 @@
+import asyncio
+import threading
+
+from user import services
+from utils.profiler import Sampler
+
+
+def _busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def _login(test_client, username, password):
+    response = test_client.post("/login-swagger", data={"username": username, "password": password})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_sampler_collapsed_and_speedscope():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy")
+    worker.start()
+    sampler = Sampler(interval=0.001).start()
+    try:
+        while sampler.samples < 20:
+            stop.wait(0.01)
+    finally:
+        sampler.stop()
+        stop.set()
+        worker.join()
+
+    assert any(line.startswith("busy;") and "_busy_loop (test_profiler.py:" in line for line in sampler.collapsed().splitlines())
+    profile = sampler.speedscope("test")
+    busy = next(p for p in profile["profiles"] if p["name"] == "busy")
+    names = {profile["shared"]["frames"][i]["name"] for sample in busy["samples"] for i in sample}
+    assert "_busy_loop" in names
+    assert len(busy["samples"]) == len(busy["weights"])
+
+
+def test_request_profile_is_admin_only(test_client):
+    admin = _login(test_client, "admin", "adminpass123")
+    response = test_client.get("/class_name/class-names-all/", headers={**admin, "X-Profile": "speedscope"})
+    assert response.status_code == 200
+    assert response.headers["X-Profiled-Status"] == "200"
+    assert response.json()["$schema"].startswith("https://www.speedscope.app")
+
+    teacher = _login(test_client, "teacher1", "teacherpass123")
+    response = test_client.get("/class_name/class-names-all/?profile=collapsed", headers=teacher)
+    assert response.status_code == 200
+    assert "X-Profiled-Status" not in response.headers
+    assert response.json() == []
+
+
+def test_admin_check_runs_off_the_event_loop(test_client, monkeypatch):
+    admin = _login(test_client, "admin", "adminpass123")
+    on_loop = []
+
+    def get_token_version(session, user_id):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return original(session, user_id)
+
+    original = services.get_token_version
+    monkeypatch.setattr(services, "get_token_version", get_token_version)
+    response = test_client.get("/class_name/class-names-all/", headers={**admin, "X-Profile": "collapsed"})
+    assert response.status_code == 200 and "X-Profiled-Status" in response.headers
+    assert on_loop and not any(on_loop)
+
+
+def test_worker_profile_endpoint(test_client):
+    admin = _login(test_client, "admin", "adminpass123")
+    response = test_client.post("/admin/diagnostics/profile?seconds=0.1&format=collapsed&include_idle=true", headers=admin)
+    assert response.status_code == 200, response.text
+    assert int(response.headers["X-Profile-Samples"]) > 0
+    assert response.text.strip()
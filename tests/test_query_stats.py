@@ -0,0 +1,60 @@
+import logging
+from datetime import datetime
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from main import app
+from schemas.class_names_model import ClassNames
+from schemas.fee_model import Fee
+from schemas.students_model import Students
+from user.user_crud import check_authenticated_user
+from utils.query_stats import QueryStatsMiddleware
+
+
+def _seed_fees(session, count):
+    session.add(ClassNames(class_name_id=1, class_name="5A"))
+    students = [
+        Students(
+            student_name=f"Student {i}", student_date_of_birth=datetime(2015, 1, 1), student_gender="Male",
+            student_age="10", student_education="Primary", class_name="5A", student_city="City",
+            student_address="Street", father_name=f"Father {i}", father_occupation="Farmer",
+            father_cnic="00000-0000000-0", father_cast_name="None", father_contact="0300-0000000",
+        )
+        for i in range(count)
+    ]
+    session.add_all(students)
+    session.flush()
+    session.add_all(
+        Fee(student_id=s.student_id, class_id=1, fee_amount=100, fee_month="January", fee_year="2025", fee_status="Paid")
+        for s in students
+    )
+    session.commit()
+
+
+def test_fee_list_within_query_budget(test_session, test_client, query_budget, caplog):
+    _seed_fees(test_session, 8)
+    app.dependency_overrides[check_authenticated_user] = lambda: None
+    with caplog.at_level(logging.WARNING):
+        response = test_client.get("/fee/all")
+    assert response.status_code == 200, response.text
+    assert {fee["student_name"] for fee in response.json()} == {f"Student {i}" for i in range(8)}
+    query_budget(response, 1)
+    assert "Suspected N+1" not in caplog.text
+
+
+def test_repeated_statement_flagged_as_n_plus_one(caplog):
+    db = create_engine("sqlite://")
+    demo = FastAPI()
+    demo.add_middleware(QueryStatsMiddleware, threshold=3)
+
+    @demo.get("/rows")
+    def rows():
+        with db.connect() as conn:
+            return [conn.execute(text("SELECT :id"), {"id": i}).scalar() for i in range(4)]
+
+    with caplog.at_level(logging.WARNING):
+        response = TestClient(demo).get("/rows")
+    assert response.headers["X-DB-Queries"] == "4"
+    assert "Suspected N+1 on GET /rows: statement executed 4 times: SELECT ?" in caplog.text
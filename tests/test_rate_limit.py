@@ -0,0 +1,101 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from main import app
+from tests.config import engine
+from utils.rate_limit import MemoryBackend, RateLimiter
+
+
+def test_token_bucket_refills():
+    backend = MemoryBackend()
+    assert [backend.take("k", 2, 1.0, now=0)[0] for _ in range(3)] == [True, True, False]
+    allowed, wait = backend.take("k", 2, 1.0, now=0.5)
+    assert not allowed and wait == 0.5
+    assert backend.take("k", 2, 1.0, now=1.0)[0]
+
+
+def test_limiter_keys_are_independent():
+    limiter = RateLimiter(MemoryBackend(), capacity=1, per_minute=1, name="t")
+    assert limiter.hit("a") == (True, 0)
+    assert limiter.hit("a") == (False, 60)
+    assert limiter.hit("b") == (True, 0)
+
+
+def test_login_throttled_before_db(test_client, monkeypatch):
+    import user.services as services
+
+    monkeypatch.setattr(services, "_login_limiters", None)
+    monkeypatch.setattr(services, "LOGIN_USER_BURST", 2)
+    for _ in range(2):
+        response = test_client.post("/login-swagger", data={"username": "admin", "password": "wrong"})
+        assert response.status_code == 401
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = test_client.post("/login-swagger", data={"username": "Admin", "password": "wrong"})
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert statements == []
+
+
+def test_sweep_uses_each_buckets_own_window():
+    backend = MemoryBackend()
+    backend._last_sweep = 0
+    backend.take("slow", 5, 5 / 600, now=0)  # full again after 600 s
+    backend.take("fast", 1, 1.0, now=0)
+    backend.take("fast", 1, 1.0, now=100)  # triggers the sweep with the fast policy
+    assert set(backend._buckets) == {"slow", "fast"}
+    assert backend.take("slow", 5, 5 / 600, now=100)[0]
+    assert backend._buckets["slow"][0] < 4
+
+
+def test_refund_gives_back_one_token():
+    limiter = RateLimiter(MemoryBackend(), capacity=1, per_minute=1, name="t")
+    assert limiter.hit("a") == (True, 0)
+    limiter.refund("a")
+    assert limiter.hit("a") == (True, 0)
+    assert limiter.hit("a")[0] is False
+
+
+def _limit_logins(monkeypatch, **limits):
+    import user.services as services
+
+    monkeypatch.setattr(services, "_login_limiters", None)
+    for name, value in limits.items():
+        monkeypatch.setattr(services, name, value)
+
+
+def test_successful_logins_are_not_charged(test_client, monkeypatch):
+    _limit_logins(monkeypatch, LOGIN_USER_BURST=2)
+    for _ in range(3):
+        assert test_client.post("/login-swagger", data={"username": "admin", "password": "adminpass123"}).status_code == 200
+    for expected in (401, 401, 429):
+        assert test_client.post("/login-swagger", data={"username": "admin", "password": "x"}).status_code == expected
+
+
+def test_ip_bucket_uses_forwarded_for_only_from_trusted_proxy(test_client, monkeypatch):
+    _limit_logins(monkeypatch, LOGIN_IP_BURST=2, LOGIN_USER_BURST=100)
+
+    def attempt(client, forwarded_for):
+        return client.post(
+            "/login-swagger", data={"username": "admin", "password": "x"}, headers={"X-Forwarded-For": forwarded_for},
+        ).status_code
+
+    # The TestClient peer ("testclient") is not trusted: a spoofed header does not get a fresh bucket
+    assert [attempt(test_client, f"10.0.0.{i}") for i in range(3)] == [401, 401, 429]
+
+    async def via_proxy(scope, receive, send):
+        if scope["type"] == "http":
+            scope = {**scope, "client": ("127.0.0.1", 50000)}
+        await app(scope, receive, send)
+
+    proxied = TestClient(via_proxy)
+    assert [attempt(proxied, "203.0.113.7, 127.0.0.1") for _ in range(3)] == [401, 401, 429]
+    assert attempt(proxied, "203.0.113.8") == 401
@@ -0,0 +1,37 @@
+import threading
+
+import pytest
+
+from tests.fake_redis import FakeRedis
+from utils.redis_client import RedisClient, RedisError
+
+
+def test_commands_do_not_wait_on_a_busy_connection():
+    with FakeRedis() as server:
+        client = RedisClient.from_url(server.url, timeout=0.2, max_connections=2)
+        with client._connection():
+            # Another thread gets the second connection instead of waiting for this one
+            replies = []
+            worker = threading.Thread(target=lambda: replies.append(client.execute("SET", "k", "v")))
+            worker.start()
+            worker.join()
+            assert replies == ["OK"]
+
+            with client._connection():
+                with pytest.raises(RedisError, match="No free connection"):
+                    client.execute("PING")
+
+        # Both connections went back to the pool and are reused
+        assert client.execute("GET", "k") == b"v"
+        assert client.pipeline([("PING",), ("GET", "k")]) == ["PONG", b"v"]
+        assert client._open == 2 and len(client._idle) == 2
+        client.close()
+        assert client._open == 0
+
+
+def test_failed_connections_free_their_slot():
+    client = RedisClient("127.0.0.1", 1, timeout=0.2, max_connections=1)
+    for _ in range(3):
+        with pytest.raises(RedisError, match="connection"):
+            client.execute("PING")
+    assert client._open == 0
@@ -1,27 +1,14 @@
 import pytest
-from fastapi.testclient import TestClient
 from datetime import datetime
-from sqlmodel import Session
-from main import app
-from db import get_session
-from tests.config import override_get_session, engine
-from user.user_models import UserRole
 
-# Setup test client with session override
-app.dependency_overrides[get_session] = override_get_session
-client = TestClient(app)
 
-@pytest.fixture(autouse=True)
-def setup_db():
-    """Setup and teardown the database for each test."""
-    from sqlmodel import SQLModel
-    SQLModel.metadata.create_all(engine)  # Create tables
-    yield
-    SQLModel.metadata.drop_all(engine)  # Drop tables after the test
+@pytest.fixture
+def client(test_client):
+    return test_client
 
 # Fixtures
 @pytest.fixture
-def admin_token():
+def admin_token(client):
     """Get admin token."""
     response = client.post("/auth/login", data={
         "username": "admin",
@@ -30,7 +17,7 @@ def admin_token():
     return response.json()["access_token"]
 
 @pytest.fixture
-def teacher_token():
+def teacher_token(client):
     """Get teacher token."""
     response = client.post("/auth/login", data={
         "username": "teacher1",
@@ -39,7 +26,7 @@ def teacher_token():
     return response.json()["access_token"]
 
 # Test Authentication Routes
-def test_user_signup():
+def test_user_signup(client):
     user_data = {
         "username": "testuser",
         "email": "test@example.com",
@@ -51,7 +38,7 @@ def test_user_signup():
     assert response.json()["username"] == user_data["username"]
 
 # Test Student Routes
-def test_create_student(admin_token):
+def test_create_student(client, admin_token):
     headers = {"Authorization": f"Bearer {admin_token}"}
     student_data = {
         "student_name": "Test Student",
@@ -71,14 +58,14 @@ def test_create_student(admin_token):
     assert response.status_code == 200
     assert response.json()["student_name"] == student_data["student_name"]
 
-def test_get_all_students(teacher_token):
+def test_get_all_students(client, teacher_token):
     headers = {"Authorization": f"Bearer {teacher_token}"}
     response = client.get("/students/all_students/", headers=headers)
     assert response.status_code == 200
     assert isinstance(response.json(), list)
 
 # Test Attendance Routes
-def test_mark_attendance(teacher_token):
+def test_mark_attendance(client, teacher_token):
     headers = {"Authorization": f"Bearer {teacher_token}"}
     attendance_data = {
         "attendance_date": datetime.now().date().isoformat(),
@@ -95,7 +82,7 @@ def test_mark_attendance(teacher_token):
     )
     assert response.status_code == 200
 
-def test_get_attendance(teacher_token):
+def test_get_attendance(client, teacher_token):
     headers = {"Authorization": f"Bearer {teacher_token}"}
     response = client.get(
         "/mark_attendance/show_all_attendance",
@@ -105,7 +92,7 @@ def test_get_attendance(teacher_token):
     assert isinstance(response.json(), list)
 
 # Test Class Names Routes
-def test_create_class(admin_token):
+def test_create_class(client, admin_token):
     headers = {"Authorization": f"Bearer {admin_token}"}
     class_data = {"class_name": "Test Class"}
     response = client.post(
@@ -117,7 +104,7 @@ def test_create_class(admin_token):
     assert response.json()["class_name"] == class_data["class_name"]
 
 # Test Teacher Names Routes
-def test_create_teacher(admin_token):
+def test_create_teacher(client, admin_token):
     headers = {"Authorization": f"Bearer {admin_token}"}
     teacher_data = {"teacher_name": "Test Teacher"}
     response = client.post(
@@ -129,7 +116,7 @@ def test_create_teacher(admin_token):
     assert response.json()["teacher_name"] == teacher_data["teacher_name"]
 
 # Test Attendance Value Routes
-def test_create_attendance_value(admin_token):
+def test_create_attendance_value(client, admin_token):
     headers = {"Authorization": f"Bearer {admin_token}"}
     value_data = {"attendance_value": "Present"}
     response = client.post(
@@ -141,11 +128,11 @@ def test_create_attendance_value(admin_token):
     assert response.json()["attendance_value"] == value_data["attendance_value"]
 
 # Test Error Cases
-def test_unauthorized_access():
+def test_unauthorized_access(client):
     response = client.get("/students/all_students/")
     assert response.status_code == 401
 
-def test_forbidden_access():
+def test_forbidden_access(client):
     # Login as regular user
     response = client.post("/auth/login", data={
         "username": "user1",
@@ -0,0 +1,51 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flights = SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def compute():
+        runs.append(1)
+        release.wait(5)
+        return {"total": 42}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(flights.do, ("summary", 2025), compute) for _ in range(8)]
+        while flights.stats().get("summary", {}).get("coalesced", 0) < 7:
+            pass
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert len(runs) == 1
+    assert all(result is results[0] for result in results)
+    assert flights.stats()["summary"] == {"executions": 1, "coalesced": 7, "max_waiters": 7}
+
+    # Nothing is kept once the call finished
+    assert flights.do(("summary", 2025), lambda: "fresh") == "fresh"
+    # Different parameters never share
+    assert flights.do(("summary", 2024), lambda: "other") == "other"
+
+
+def test_waiters_receive_the_error():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(flights.do, ("summary",), fail) for _ in range(3)]
+        while flights.stats().get("summary", {}).get("coalesced", 0) < 2:
+            pass
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result()
@@ -0,0 +1,77 @@
+import time
+
+from sqlalchemy import text
+
+from main import app
+from tests.config import engine
+from user.user_crud import check_admin, check_authenticated_user
+from utils import slow_queries
+from utils.slow_queries import SlowQueryLog
+
+
+def _wait_for_plan(entry, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while entry["plan"] is None and entry["plan_error"] is None:
+        assert time.monotonic() < deadline, "EXPLAIN did not complete"
+        time.sleep(0.01)
+
+
+def test_slow_select_recorded_with_plan(postgres_only):
+    log = SlowQueryLog(threshold_ms=20)
+    log.attach(engine)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": 0.03})
+        [entry] = log.entries()
+        assert "pg_sleep" in entry["statement"]
+        assert "0.03" in entry["parameters"]
+        assert entry["route"] is None
+        _wait_for_plan(entry)
+        assert entry["plan_error"] is None
+        assert "actual time" in entry["plan"]
+        # The EXPLAIN itself is not recorded
+        assert len(log.entries()) == 1
+    finally:
+        log.detach()
+
+
+def test_only_read_only_selects_are_analyzed():
+    assert slow_queries.is_read_only("SELECT fee.fee_id FROM fee WHERE fee.fee_year = %(fee_year)s")
+    assert slow_queries.is_read_only("WITH t AS (SELECT updated_at FROM fee) SELECT * FROM t")
+    assert not slow_queries.is_read_only("SELECT pg_advisory_xact_lock(%(key)s)")
+    assert not slow_queries.is_read_only("SELECT * FROM fee WHERE fee_id = 1 FOR UPDATE")
+    assert not slow_queries.is_read_only("SELECT * FROM fee FOR NO KEY UPDATE SKIP LOCKED")
+    assert not slow_queries.is_read_only("SELECT nextval('fee_fee_id_seq')")
+    assert not slow_queries.is_read_only("WITH gone AS (DELETE FROM fee RETURNING *) SELECT count(*) FROM gone")
+    assert not slow_queries.is_read_only("UPDATE fee SET fee_status = 'Paid'")
+
+
+def test_locking_select_gets_plain_explain(postgres_only):
+    log = SlowQueryLog(threshold_ms=20)
+    log.attach(engine)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_sleep(0.03), pg_advisory_xact_lock(:key)"), {"key": 4242})
+        [entry] = log.entries()
+        _wait_for_plan(entry)
+        assert entry["plan_error"] is None
+        assert "actual time" not in entry["plan"]
+    finally:
+        log.detach()
+
+
+def test_admin_endpoint_lists_route(test_client, monkeypatch):
+    log = SlowQueryLog(threshold_ms=0, explain=False)
+    log.attach(engine)
+    monkeypatch.setattr(slow_queries, "slow_query_log", log)
+    app.dependency_overrides[check_admin] = lambda: None
+    app.dependency_overrides[check_authenticated_user] = lambda: None
+    try:
+        assert test_client.get("/class_name/class-names-all/").status_code == 200
+        body = test_client.get("/admin/diagnostics/slow-queries").json()
+    finally:
+        log.detach()
+    assert body["enabled"] and body["threshold_ms"] == 0
+    assert body["entries"][0]["route"] == "GET /class_name/class-names-all/"
+    assert "classnames" in body["entries"][0]["statement"]
@@ -0,0 +1,106 @@
+import csv
+import io
+import logging
+
+import pytest
+from sqlmodel import select
+
+from main import app
+from router import students as students_router
+from schemas.students_model import Students
+from user.user_crud import check_admin
+
+FIELDS = list(students_router.STUDENT_COLUMNS)
+
+
+def _student(name: str, **overrides) -> dict:
+    row = {
+        "student_name": name, "student_date_of_birth": "2015-01-01", "student_gender": "Male",
+        "student_age": "10", "student_education": "Primary", "class_name": "5A", "student_city": "City",
+        "student_address": "Street", "father_name": "Father", "father_occupation": "Farmer",
+        "father_cnic": "00000-0000000-0", "father_cast_name": "None", "father_contact": "0300-0000000",
+    }
+    row.update(overrides)
+    return row
+
+
+def _csv(rows) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+@pytest.fixture
+def client(test_client):
+    app.dependency_overrides[check_admin] = lambda: None
+    return test_client
+
+
+def _import(client, content: bytes, filename: str = "students.csv"):
+    return client.post("/students/import/", files={"file": (filename, content)})
+
+
+def test_invalid_rows_are_reported_and_skipped(client, test_session):
+    rows = [
+        _student("Ali"),
+        _student("Bad date", student_date_of_birth="not a date"),
+        _student("Sara"),
+        _student("No date", student_date_of_birth=""),
+    ]
+    body = _import(client, _csv(rows)).json()
+    assert (body["total_rows"], body["imported"], body["failed"]) == (4, 2, 2)
+    assert [error["row"] for error in body["errors"]] == [2, 4]
+    assert body["errors"][0]["errors"][0].startswith("student_date_of_birth:")
+    names = test_session.exec(select(Students.student_name).where(Students.student_id.in_(body["student_ids"]))).all()
+    assert sorted(names) == ["Ali", "Sara"]
+
+
+def test_chunk_boundaries(client, test_session, monkeypatch):
+    monkeypatch.setattr(students_router, "IMPORT_CHUNK_SIZE", 2)
+    rows = [_student(f"S{i}") for i in range(5)]
+    rows[2]["student_date_of_birth"] = "2015-13-45"  # invalid row inside the second chunk
+    body = _import(client, _csv(rows)).json()
+    assert (body["imported"], body["failed"]) == (4, 1)
+    # ids come back in file order across chunks
+    stored = {s.student_id: s.student_name for s in test_session.exec(select(Students)).all()}
+    assert [stored[i] for i in body["student_ids"]] == ["S0", "S1", "S3", "S4"]
+
+
+def test_empty_strings_are_kept(client, test_session, caplog):
+    with caplog.at_level(logging.WARNING):
+        body = _import(client, _csv([_student("Ali", student_address="", father_cast_name="")])).json()
+    assert body["imported"] == 1
+    student = test_session.get(Students, body["student_ids"][0])
+    assert (student.student_address, student.father_cast_name) == ("", "")
+    assert "COPY load" not in caplog.text  # empty strings are not NULLs to COPY
+
+
+def test_database_errors_are_isolated_per_row(client, test_session, postgres_only):
+    # PostgreSQL rejects NUL characters in text: the chunk fails and is retried row by row
+    rows = [_student("Ali"), _student("Nul\x00name"), _student("Sara")]
+    body = _import(client, _csv(rows)).json()
+    assert (body["imported"], body["failed"]) == (2, 1)
+    assert body["errors"][0]["row"] == 2
+
+
+def test_xlsx_import(client, test_session):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(FIELDS)
+    sheet.append(list(_student("Ali").values()))
+    sheet.append([None] * len(FIELDS))  # blank rows are skipped
+    sheet.append(list(_student("Sara", student_age=11).values()))
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    body = _import(client, buffer.getvalue(), "students.xlsx").json()
+    assert (body["total_rows"], body["imported"], body["failed"]) == (2, 2, 0)
+    assert test_session.get(Students, body["student_ids"][1]).student_age == "11"
+
+
+def test_unsupported_file_type(client):
+    response = _import(client, b"{}", "students.json")
+    assert response.status_code == 400
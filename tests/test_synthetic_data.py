@@ -0,0 +1,45 @@
+from datetime import date
+
+from sqlalchemy import func
+from sqlmodel import select
+
+from schemas.attendance_model import Attendance
+from schemas.fee_model import Fee, FeeStatus
+from schemas.students_model import Students
+from utils import synthetic_data
+from utils.academic_year import academic_year_bounds, academic_year_of
+
+TODAY = date(2024, 11, 15)
+
+
+def _generate(session, seed=7):
+    return synthetic_data.generate(session, seed=seed, today=TODAY, progress=lambda message: None,
+                                   **synthetic_data.PRESETS["tiny"])
+
+
+def test_generate_is_deterministic(test_session):
+    names = select(Students.student_name).order_by(Students.student_id)
+    counts = _generate(test_session)
+    first = test_session.exec(names).all()
+    synthetic_data.reset(test_session)
+    again = _generate(test_session)
+    assert counts == again
+    assert counts["students"] == 60 and counts["classnames"] == 3
+    assert test_session.exec(names).all() == first
+
+
+def test_generated_rows_are_consistent(test_session):
+    session = test_session
+    counts = _generate(session)
+
+    start = academic_year_bounds(academic_year_of(TODAY))[0]
+    days = session.exec(select(Attendance.attendance_date).distinct()).all()
+    assert days and all(d.date() <= TODAY for d in days)
+    assert {d.date() for d in days} <= set(synthetic_data.school_days(start, TODAY.replace(day=16)))
+    assert session.exec(select(func.count()).select_from(Attendance)).one() == counts["attendance"]
+
+    statuses = session.exec(select(Fee.fee_status, func.count()).group_by(Fee.fee_status)).all()
+    assert {status for status, _ in statuses} == {FeeStatus.PAID, FeeStatus.UNPAID}
+
+    synthetic_data.reset(session)
+    assert session.exec(select(func.count()).select_from(Students)).one() == 0
@@ -1,12 +1,16 @@
+import hashlib
+import threading
+import uuid
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from typing import Annotated, Optional
+from typing import Annotated, Dict, Optional, Tuple
 from fastapi.openapi.models import OAuthFlows
 from fastapi.openapi.models import OAuthFlowPassword
 from fastapi.security import OAuth2PasswordBearer
 from setting import *
 from user.settings import *
 from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, update
 from sqlmodel import Session, select
 from fastapi import HTTPException, status, Depends
 from db import get_session
@@ -14,7 +18,17 @@ from typing import Annotated
 
 from pydantic import EmailStr
 from typing import Union, Any
-from user.user_models import User  # Import the User model
+from user.user_models import RefreshToken, User  # Import the User model
+from utils.cache import get_cache
+
+# Cache namespace: user id -> current token version, or None if the user is gone
+TOKEN_VERSION_CACHE = "token_version"
+
+# sha256 of revoked, unexpired refresh tokens -> expiry; lets /auth/refresh reject them without a query.
+# Filled from the database by the first refresh of the worker (see load_revoked_refresh_tokens).
+_revoked_refresh_tokens: Dict[str, datetime] = {}
+_revoked_refresh_lock = threading.Lock()
+_revoked_refresh_loaded = False
 
 
 credentials_exception = HTTPException(
@@ -46,6 +60,44 @@ def get_password_hash(password):
     """
     return pwd_context.hash(password)
 
+_login_limiters = None
+
+def _login_buckets(client_ip: Optional[str], username: Optional[str]):
+    global _login_limiters
+    if _login_limiters is None:
+        from utils.rate_limit import RateLimiter, get_backend
+        backend = get_backend()
+        _login_limiters = (
+            RateLimiter(backend, LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE, "login-ip"),
+            RateLimiter(backend, LOGIN_USER_BURST, LOGIN_USER_PER_MINUTE, "login-user"),
+        )
+    ip_limiter, user_limiter = _login_limiters
+    return ((ip_limiter, client_ip or "unknown"), (user_limiter, (username or "").strip().lower()))
+
+def throttle_login(client_ip: Optional[str], username: Optional[str]) -> None:
+    """
+    Spend one login attempt from the caller's IP bucket and the target
+    username's bucket. Raises 429 before any password hashing or DB work
+    when either is exhausted. Call `login_succeeded` after a successful
+    login so only failed attempts stay charged.
+
+    `client_ip` is request.client.host, which ProxyHeadersMiddleware (main.py)
+    resolves from X-Forwarded-For for peers listed in TRUSTED_PROXIES.
+    """
+    for limiter, key in _login_buckets(client_ip, username):
+        allowed, retry_after = limiter.hit(key)
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, please try again later",
+                headers={"Retry-After": str(retry_after)},
+            )
+
+def login_succeeded(client_ip: Optional[str], username: Optional[str]) -> None:
+    """Give back the attempts `throttle_login` took for a login that succeeded."""
+    for limiter, key in _login_buckets(client_ip, username):
+        limiter.refund(key)
+
 def get_user_by_username(db: Session, username: str) -> User:
     """Get the user by username."""
     if not username:
@@ -166,54 +218,169 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
             detail=f"Error creating access token: {str(e)}"
         )
 
-def create_refresh_token(data: Union[str, Any], expires_delta: int = None) -> str:
+def create_user_access_token(user: User, expires_delta: Optional[timedelta] = None) -> str:
+    """
+    Create an access token carrying the user's id, role and token version, so
+    requests can be authorized without loading the user row.
+    """
+    return create_access_token(
+        data={
+            "sub": user.username,
+            "uid": user.id,
+            "role": user.role.value if hasattr(user.role, "value") else str(user.role),
+            "ver": user.token_version or 0,
+        },
+        expires_delta=expires_delta,
+    )
+
+def get_token_version(db: Session, user_id: int) -> Optional[int]:
+    """
+    Current token version of a user, or None if the user no longer exists.
+    Served from the shared cache and re-read from the database at most once
+    every TOKEN_VERSION_TTL_SECONDS per user.
+    """
+    return get_cache().get_or_set(
+        TOKEN_VERSION_CACHE,
+        str(user_id),
+        lambda: db.exec(select(User.token_version).where(User.id == user_id)).first(),
+        ttl=TOKEN_VERSION_TTL_SECONDS,
+    )
+
+def bump_token_version(user: User) -> None:
+    """Invalidate every access token issued to `user`. Call before committing."""
+    user.token_version = (user.token_version or 0) + 1
+
+def remember_token_version(user_id: int, version: Optional[int]) -> None:
+    """Record a committed token version change (None for a deleted user) in every worker."""
+    cache = get_cache()
+    cache.invalidate(TOKEN_VERSION_CACHE, str(user_id))
+    cache.set(TOKEN_VERSION_CACHE, str(user_id), version, ttl=TOKEN_VERSION_TTL_SECONDS)
+
+def create_refresh_token(data: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
 
     """
     Create a refresh token.
     Args:
         data (Union[str, Any]): The data to encode in the token.
-        expires_delta (int): The time delta for the token to expire.
+        expires_delta (timedelta): The time delta for the token to expire.
     Returns:
         str: The refresh token.
     """
-    if expires_delta is not None:
-        expires_delta = datetime.now() + expires_delta
-    else:
-        expires_delta = datetime.now() + timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES)
-    
-    to_encode = {"exp": expires_delta, "sub": str(data)}
+    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES))
+    # jti makes every token unique, so two tokens issued in the same second hash differently
+    to_encode = {"exp": expire, "sub": str(data), "jti": uuid.uuid4().hex}
     encoded_jwt = jwt.encode(to_encode, JWT_REFRESH_SECRET_KEY, ALGORITHM)
     return encoded_jwt
 
-def verify_refresh_token(db: Session, token: str) -> User:
+def hash_refresh_token(token: str) -> str:
+    """Refresh tokens are stored and compared by their SHA-256 digest only."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _remember_revoked(token_hash: str, expires_at: datetime) -> None:
+    with _revoked_refresh_lock:
+        _revoked_refresh_tokens[token_hash] = expires_at
+
+def is_refresh_token_revoked(token_hash: str) -> bool:
+    """In-memory revocation check; expired entries are dropped as they are seen."""
+    with _revoked_refresh_lock:
+        expires_at = _revoked_refresh_tokens.get(token_hash)
+        if expires_at is None:
+            return False
+        if expires_at < datetime.now():
+            del _revoked_refresh_tokens[token_hash]
+            return False
+        return True
+
+def load_revoked_refresh_tokens(db: Session) -> int:
+    """
+    Add the revoked, unexpired tokens in the database to the in-memory
+    revocation set. Read only; returns the number of tokens loaded.
+    """
+    global _revoked_refresh_loaded
+    rows = db.exec(
+        select(RefreshToken.token_hash, RefreshToken.expires_at)
+        .where(RefreshToken.revoked == True, RefreshToken.expires_at >= datetime.now())  # noqa: E712
+    ).all()
+    with _revoked_refresh_lock:
+        _revoked_refresh_tokens.update({token_hash: expires_at for token_hash, expires_at in rows})
+        _revoked_refresh_loaded = True
+    return len(rows)
+
+def purge_expired_refresh_tokens(db: Session) -> int:
+    """Delete expired refresh tokens (revoked or not) and commit. Returns the number deleted."""
+    deleted = db.execute(delete(RefreshToken).where(RefreshToken.expires_at < datetime.now())).rowcount
+    db.commit()
+    return deleted
+
+def issue_refresh_token(db: Session, user: User) -> str:
+    """Create a refresh token for `user` and persist its hash. Does not commit."""
+    expires_delta = timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES)
+    token = create_refresh_token(user.username, expires_delta)
+    db.add(RefreshToken(
+        user_id=user.id,
+        token_hash=hash_refresh_token(token),
+        expires_at=datetime.now() + expires_delta,
+    ))
+    return token
+
+def rotate_refresh_token(db: Session, token: str) -> Tuple[User, str]:
     """
-    Validates the refresh token and returns the associated user if valid.
+    Exchange a refresh token for a new one. The presented token is revoked in
+    the same transaction, so each refresh token works exactly once.
     """
+    invalid = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token expired or invalid")
     try:
         payload = jwt.decode(token, JWT_REFRESH_SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
+    except JWTError:
+        raise invalid
+    if not payload.get("sub"):
+        raise invalid
 
-        if not user_id:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    token_hash = hash_refresh_token(token)
+    if not _revoked_refresh_loaded:
+        # Through the request's session, so dependency overrides (tests) apply
+        load_revoked_refresh_tokens(db)
+    if is_refresh_token_revoked(token_hash):
+        raise invalid
 
-        # Check if the token exists in the database
-        stored_token = db.exec(select(RefreshToken).where(RefreshToken.token == token)).first()
-        if not stored_token or stored_token.expires_at < datetime.now():
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token expired or invalid")
+    # Conditional update: only one concurrent refresh can win the token
+    stored = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.token_hash == token_hash, RefreshToken.revoked == False)  # noqa: E712
+        .values(revoked=True)
+        .returning(RefreshToken.user_id, RefreshToken.expires_at)
+    ).first()
+    if stored is None:
+        # Unknown, or already used/revoked (possibly by another worker)
+        db.rollback()
+        raise invalid
 
-        return get_user_by_username(db, user_id)
+    user_id, expires_at = stored
+    user = db.get(User, user_id)
+    if user is None or expires_at < datetime.now():
+        db.commit()
+        _remember_revoked(token_hash, expires_at)
+        raise invalid
 
-    except JWTError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    new_token = issue_refresh_token(db, user)
+    db.commit()
+    _remember_revoked(token_hash, expires_at)
+    return user, new_token
 
-def revoke_refresh_token(db: Session, token: str):
+def revoke_refresh_token(db: Session, token: str) -> None:
     """
     Revokes a refresh token (used for logout).
     """
-    stored_token = db.exec(select(RefreshToken).where(RefreshToken.token == token)).first()
-    if stored_token:
-        db.delete(stored_token)
-        db.commit()
+    token_hash = hash_refresh_token(token)
+    stored = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.token_hash == token_hash)
+        .values(revoked=True)
+        .returning(RefreshToken.expires_at)
+    ).first()
+    db.commit()
+    if stored:
+        _remember_revoked(token_hash, stored[0])
 
 def verify_token(token: str):
     try:
@@ -12,3 +12,5 @@ ALGORITHM = config("ALGORITHM", cast=str)
 ACCESS_TOKEN_EXPIRE_MINUTES = config("ACCESS_TOKEN_EXPIRE_MINUTES", cast=int)
 REFRESH_TOKEN_EXPIRE_MINUTES = config("REFRESH_TOKEN_EXPIRE_MINUTES", cast=int)
 JWT_REFRESH_SECRET_KEY = config("JWT_REFRESH_SECRET_KEY", cast=str)
+# How long a worker trusts its cached copy of a user's token version before re-reading it
+TOKEN_VERSION_TTL_SECONDS = config("TOKEN_VERSION_TTL_SECONDS", cast=int, default=30)
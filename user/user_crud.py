@@ -6,7 +6,10 @@ from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from sqlmodel import Session, select
 from db import get_session
 from user.settings import ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, REFRESH_TOKEN_EXPIRE_MINUTES, SECRET_KEY
-from user.services import create_access_token, get_password_hash, get_user_by_username, verify_password, pwd_context, oauth2_scheme
+from user.services import (
+    bump_token_version, create_access_token, create_user_access_token, get_password_hash, get_token_version,
+    get_user_by_username, issue_refresh_token, remember_token_version, verify_password, pwd_context, oauth2_scheme
+)
 from user.user_models import (
     LoginResponse, 
     TokenData, 
@@ -35,14 +38,10 @@ def user_login(db: Session, form_data: UserLogin | OAuth2PasswordRequestForm) ->
         )
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
+    access_token = create_user_access_token(user, expires_delta=access_token_expires)
 
-    refresh_token_expires = timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES)
-    refresh_token = create_access_token(
-        data={"sub": user.username}, expires_delta=refresh_token_expires
-    )
+    refresh_token = issue_refresh_token(db, user)
+    db.commit()
 
     user_response = UserResponse(
         username=user.username,
@@ -89,11 +88,17 @@ def update_user(user: UserUpdate, session: Session, current_user: User) -> User:
     if not updated_user:
         raise HTTPException(status_code=404, detail="User not found")
     update_data = user.model_dump(exclude_unset=True)
+    # Access tokens carry the username, so a rename invalidates them
+    renamed = "username" in update_data and update_data["username"] != updated_user.username
     for key, value in update_data.items():
         value = value if key != "password" else pwd_context.hash(value)
         setattr(updated_user, key, value)
+    if renamed:
+        bump_token_version(updated_user)
     session.commit()
     session.refresh(updated_user)
+    if renamed:
+        remember_token_version(updated_user.id, updated_user.token_version)
     return updated_user
 
 def delete_user(session: Session, username: str) -> dict[str, str]:
@@ -102,6 +107,7 @@ def delete_user(session: Session, username: str) -> dict[str, str]:
         raise HTTPException(status_code=404, detail="User not found")
     session.delete(user)
     session.commit()
+    remember_token_version(user.id, None)
     return {"message": f"User {username} deleted successfully"}
 
 async def get_current_user(
@@ -121,7 +127,27 @@ async def get_current_user(
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-        
+
+    # Tokens carrying id, role and version are trusted as long as the version
+    # is still current; the returned User is built from the claims and is not
+    # attached to the session (it has no email or password loaded).
+    user_id, role, version = payload.get("uid"), payload.get("role"), payload.get("ver")
+    if user_id is not None and role is not None and version is not None:
+        current_version = get_token_version(db, user_id)
+        if current_version is None:
+            raise credentials_exception
+        if current_version == version:
+            try:
+                return User(id=user_id, username=username, role=UserRole(role), token_version=version)
+            except ValueError:
+                raise credentials_exception
+        # Stale token (role changed or user renamed): authorize from the current row
+        user = db.get(User, user_id)
+        if user is None:
+            raise credentials_exception
+        return user
+
+    # Tokens issued before role claims existed
     user = get_user_by_username(db, username=token_data.username)
     if user is None:
         raise credentials_exception
@@ -193,10 +219,12 @@ async def admin_update_user(
         else:
             new_role = user_update.role
 
-        # Update the user's role
+        # Update the user's role; tokens carrying the old role stop being trusted
         user_to_update.role = new_role
+        bump_token_version(user_to_update)
         db.commit()
         db.refresh(user_to_update)
+        remember_token_version(user_to_update.id, user_to_update.token_version)
         return user_to_update
         
     except Exception as e:
@@ -45,6 +45,8 @@ class User(UserBase, table=True):
     email: str = Field(index=True, unique=True, nullable=False)
     password: str = Field(nullable=False)
     role: UserRole = Field(default=UserRole.USER)
+    # Bumped whenever issued access tokens must stop being trusted (role change, deletion)
+    token_version: int = Field(default=0, nullable=False)
 
 class UserCreate(SQLModel):
     username: str
@@ -66,7 +68,8 @@ class LoginResponse(SQLModel):
     user: UserResponse
 
 class RefreshToken(SQLModel, table=True):
-    id: int = Field(primary_key=True)
+    id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(index=True, nullable=False)
-    token: str = Field(nullable=False, unique=True)
-    expires_at: datetime = Field(nullable=False)
\ No newline at end of file
+    token_hash: str = Field(nullable=False, unique=True)  # sha256 of the token, never the token itself
+    expires_at: datetime = Field(nullable=False)
+    revoked: bool = Field(default=False, nullable=False)
\ No newline at end of file
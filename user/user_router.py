@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Cookie, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Cookie, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlmodel import Session, select
 from datetime import timedelta
@@ -12,8 +12,8 @@ from .user_crud import (
     get_current_user, check_admin, update_user
 )
 from .services import (
-    verify_token, create_access_token,
-    revoke_refresh_token, ACCESS_TOKEN_EXPIRE_MINUTES
+    create_user_access_token, login_succeeded, revoke_refresh_token, rotate_refresh_token, throttle_login,
+    ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_MINUTES
 )
 from db import get_session
 from typing import Annotated, List
@@ -36,33 +36,46 @@ admin_router = APIRouter(
 # Update tokenUrl to remove auth prefix
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login-swagger")
 
+
+def _set_refresh_cookie(response: Response, token: str) -> None:
+    response.set_cookie(
+        key="refresh_token",
+        value=token,
+        httponly=True,
+        secure=True,  # Enable in production
+        samesite="lax",
+        max_age=REFRESH_TOKEN_EXPIRE_MINUTES * 60
+    )
+
 # Public routes (no auth prefix)
 @public_router.post("/login-swagger", response_model=LoginResponse)
 async def login_for_swagger(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_session)
 ):
-    return user_login(db, form_data)
+    client_ip = request.client.host if request.client else None
+    throttle_login(client_ip, form_data.username)
+    login_response = user_login(db, form_data)
+    login_succeeded(client_ip, form_data.username)
+    return login_response
 
 @public_router.post("/login", response_model=LoginResponse)
 async def login_for_frontend(
+    request: Request,
     response: Response,
     login_data: UserLogin,
     db: Session = Depends(get_session)
 ):
     """Login endpoint for frontend clients"""
+    client_ip = request.client.host if request.client else None
+    throttle_login(client_ip, login_data.username)
     try:
         login_response = user_login(db, login_data)
+        login_succeeded(client_ip, login_data.username)
         
         # Set HTTP-only cookies for tokens
-        response.set_cookie(
-            key="refresh_token",
-            value=login_response.refresh_token,
-            httponly=True,
-            secure=True,  # Enable in production
-            samesite="lax",
-            max_age=60 * 60 * 24 * 7  # 7 days
-        )
+        _set_refresh_cookie(response, login_response.refresh_token)
 
         return login_response
 
@@ -115,9 +128,14 @@ async def signup(
 # Protected routes (keep auth prefix)
 @user_router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Session = Depends(get_session)
 ):
-    return current_user
+    # The authenticated user comes from token claims; load the row for the email
+    user = db.get(User, current_user.id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return user
 
 @user_router.post("/logout")
 async def logout(
@@ -128,7 +146,7 @@ async def logout(
     """Logout user and clear tokens"""
     try:
         if refresh_token:
-            await revoke_refresh_token(db, refresh_token)
+            revoke_refresh_token(db, refresh_token)
         
         # Clear cookies
         response.delete_cookie(key="refresh_token")
@@ -191,65 +209,36 @@ async def bulk_signup(
 
 @user_router.post("/refresh", response_model=LoginResponse)
 async def refresh_token(
+    response: Response,
     refresh_token: str = Cookie(None),
-    response: Response = None,
     db: Session = Depends(get_session)
 ):
-    """Refresh access token using refresh token"""
+    """Exchange the refresh token cookie for a new access token and a new refresh token"""
     if not refresh_token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="No refresh token provided"
         )
 
-    try:
-        # Verify the refresh token
-        payload = verify_token(refresh_token)
-        if not payload:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid refresh token"
-            )
-
-        # Get username from token
-        username = payload.get("sub")
-        if not username:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token payload"
-            )
-
-        # Get user from database
-        user = get_user_by_username(db, username)
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found"
-            )
-
-        # Create new access token
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": user.username},
-            expires_delta=access_token_expires
-        )
-
-        return {
-            "access_token": access_token,
-            "token_type": "bearer",
-            "user": UserResponse(
-                id=user.id,
-                username=user.username,
-                email=user.email,
-                role=user.role
-            )
-        }
-
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"Could not refresh token: {str(e)}"
+    # Revoked tokens are rejected from memory; the presented token is single-use
+    user, new_refresh_token = rotate_refresh_token(db, refresh_token)
+
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_user_access_token(user, expires_delta=access_token_expires)
+    _set_refresh_cookie(response, new_refresh_token)
+
+    return LoginResponse(
+        access_token=access_token,
+        refresh_token=new_refresh_token,
+        token_type="bearer",
+        expires_in=int(access_token_expires.total_seconds()),
+        user=UserResponse(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            role=user.role
         )
+    )
 
 # Admin routes
 @admin_router.get("/", response_model=list[User])
@@ -0,0 +1,21 @@
+from datetime import date, datetime
+from typing import Tuple, Union
+
+import setting
+
+
+def academic_year_of(value: Union[date, datetime]) -> int:
+    """Return the academic year (labelled by its starting calendar year) containing `value`."""
+    start_month = setting.ACADEMIC_YEAR_START_MONTH
+    return value.year if value.month >= start_month else value.year - 1
+
+
+def academic_year_bounds(year: int) -> Tuple[date, date]:
+    """Return the [start, end) date range of the academic year starting in `year`."""
+    start_month = setting.ACADEMIC_YEAR_START_MONTH
+    return date(year, start_month, 1), date(year + 1, start_month, 1)
+
+
+def current_academic_year() -> int:
+    """Return the academic year containing today."""
+    return academic_year_of(date.today())
@@ -0,0 +1,135 @@
+"""
+Fast multi-row inserts.
+
+`insert_rows` loads a list of column dicts into a table and returns the new
+primary keys in input order. On PostgreSQL it streams the rows through COPY
+into a temporary staging table and moves them with a single
+INSERT ... SELECT ... RETURNING; elsewhere (or if COPY is unavailable on the
+driver) it falls back to an executemany INSERT ... RETURNING.
+
+`append_rows` is for large loads that don't need the new keys back: rows
+are consumed from an iterable in chunks and COPied straight into the table.
+"""
+import csv
+import enum
+import io
+from datetime import date, datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Sequence
+
+from sqlalchemy import insert, text
+from sqlmodel import Session
+
+from utils.logging import logger
+
+# COPY's CSV format reads an unquoted empty field as NULL, which would turn
+# empty strings into NULLs; None is written as this marker instead
+COPY_NULL = "\\N"
+COPY_OPTIONS = f"FORMAT csv, NULL '{COPY_NULL}'"
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, str) and value == COPY_NULL:
+        raise ValueError(f"{COPY_NULL!r} cannot be loaded through COPY")
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.name  # SQLAlchemy stores enums by name
+    return value
+
+
+def _copy_supported(session: Session) -> bool:
+    conn = session.connection()
+    return conn.dialect.name == "postgresql" and conn.dialect.driver in ("psycopg2", "psycopg")
+
+
+def _copy(session: Session, sql: str, buffer: io.StringIO) -> None:
+    conn = session.connection()
+    raw = conn.connection.driver_connection
+    with raw.cursor() as cursor:
+        if conn.dialect.driver == "psycopg2":
+            cursor.copy_expert(sql, buffer)
+        else:
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def copy_insert(session: Session, model, columns: Sequence[str], rows: List[Dict[str, Any]]) -> List[int]:
+    """Insert `rows` via COPY into a staging table. Returns primary keys in input order."""
+    table = model.__table__
+    pk = table.primary_key.columns.values()[0].name
+    staging = f"_stage_{table.name}"
+    column_list = ", ".join(columns)
+
+    # The staging table draws ids from the target's sequence, so each row's id
+    # is known before it is moved and can be mapped back to its input position.
+    session.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {staging} "
+        f"(LIKE {table.name} INCLUDING DEFAULTS, _row_no integer) ON COMMIT DROP"
+    ))
+    session.execute(text(f"TRUNCATE {staging}"))
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row_no, row in enumerate(rows):
+        writer.writerow([_csv_value(row.get(column)) for column in columns] + [row_no])
+    buffer.seek(0)
+    _copy(session, f"COPY {staging} ({column_list}, _row_no) FROM STDIN WITH ({COPY_OPTIONS})", buffer)
+
+    inserted = session.execute(text(
+        f"INSERT INTO {table.name} ({pk}, {column_list}) "
+        f"SELECT {pk}, {column_list} FROM {staging} RETURNING {pk}"
+    )).scalars().all()
+    ids = session.execute(text(f"SELECT {pk} FROM {staging} ORDER BY _row_no")).scalars().all()
+    if len(inserted) != len(ids):
+        raise RuntimeError(f"COPY load inserted {len(inserted)} of {len(ids)} staged rows")
+    return list(ids)
+
+
+def executemany_insert(session: Session, model, rows: List[Dict[str, Any]]) -> List[int]:
+    """Insert `rows` with a single executemany INSERT ... RETURNING. Returns primary keys in input order."""
+    pk = model.__table__.primary_key.columns.values()[0]
+    stmt = insert(model.__table__).returning(pk, sort_by_parameter_order=True)
+    return list(session.execute(stmt, rows).scalars().all())
+
+
+def insert_rows(session: Session, model, columns: Sequence[str], rows: List[Dict[str, Any]]) -> List[int]:
+    """Insert `rows` using COPY when available, otherwise executemany. Does not commit."""
+    if not rows:
+        return []
+    if _copy_supported(session):
+        try:
+            with session.begin_nested():
+                return copy_insert(session, model, columns, rows)
+        except Exception as e:
+            logger.warning(f"COPY load into {model.__tablename__} failed, using executemany: {e}")
+    return executemany_insert(session, model, rows)
+
+
+def append_rows(session: Session, model, columns: Sequence[str], rows: Iterable[Dict[str, Any]], chunk_size: int = 50_000) -> int:
+    """
+    Insert rows from an iterable in chunks without returning keys: COPY on
+    PostgreSQL, executemany INSERT elsewhere. Does not commit. Returns the
+    number of rows inserted.
+    """
+    table = model.__table__
+    use_copy = _copy_supported(session)
+    sql = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH ({COPY_OPTIONS})"
+    rows = iter(rows)
+    total = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return total
+        if use_copy:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in chunk:
+                writer.writerow([_csv_value(row.get(column)) for column in columns])
+            buffer.seek(0)
+            _copy(session, sql, buffer)
+        else:
+            session.execute(insert(table), chunk)
+        total += len(chunk)
@@ -0,0 +1,242 @@
+"""
+Cache shared by the dashboard, reference-data and auth layers.
+
+Values are grouped into namespaces ("class_names", "finance_periods", ...)
+and must be JSON-serializable; treat what `get` returns as read-only.
+
+Every worker keeps an in-process LRU. With CACHE_BACKEND=redis values are
+also stored on a Redis-compatible server, so a value computed by one worker
+is reused by the others, and each invalidation is published on
+CACHE_CHANNEL. Every worker listens on that channel and drops its local
+copies, so a write handled by one worker is seen by all of them.
+
+Local entries live at most CACHE_LOCAL_TTL_SECONDS whatever `ttl` asks
+for. Without Redis an invalidation only reaches the worker that made the
+write, so this bounds how long the other workers serve a stale copy (and,
+with Redis, covers a missed invalidation message).
+
+    cache = get_cache()
+    names = cache.get_or_set("class_names", "all", load_names, ttl=300)
+    cache.invalidate("class_names")   # after a write
+
+Redis failures are logged and treated as misses: the cache never makes a
+request fail.
+"""
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+import setting
+from utils.logging import logger
+from utils.redis_client import RedisClient, RedisError
+
+MISSING = object()
+
+
+class MemoryBackend:
+    """In-process LRU with per-entry expiry."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            if entry[0] is not None and entry[0] <= time.monotonic():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend:
+    """
+    Values as JSON strings on a Redis-compatible server. Each namespace keeps
+    a set of its keys so the whole namespace can be dropped at once.
+    """
+
+    def __init__(self, client: RedisClient, prefix: str = "cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    def _index(self, namespace: str) -> str:
+        return f"{self.prefix}ns:{namespace}"
+
+    def get(self, key: str) -> Any:
+        raw = self.client.execute("GET", self.prefix + key)
+        return MISSING if raw is None else json.loads(raw)
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        full_key = self.prefix + key
+        command = ("SET", full_key, json.dumps(value, default=str))
+        if ttl:
+            command += ("EX", max(1, int(ttl)))
+        replies = self.client.pipeline([command, ("SADD", self._index(namespace), full_key)])
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+
+    def delete(self, key: str) -> None:
+        self.client.execute("DEL", self.prefix + key)
+
+    def delete_namespace(self, namespace: str) -> None:
+        index = self._index(namespace)
+        keys = self.client.execute("SMEMBERS", index) or []
+        self.client.execute("DEL", index, *keys)
+
+
+class Cache:
+    """Local LRU, optionally backed by a shared server and kept coherent over pub/sub."""
+
+    def __init__(self, local: MemoryBackend, remote: Optional[RedisBackend] = None, channel: str = "cache-invalidate"):
+        self.local = local
+        self.remote = remote
+        self.channel = channel
+        self.origin = uuid.uuid4().hex  # ignore our own invalidation messages
+        self._listener: Optional[threading.Thread] = None
+        self._subscriber: Optional[RedisClient] = None
+
+    @staticmethod
+    def _key(namespace: str, key: str) -> str:
+        return f"{namespace}:{key}"
+
+    def get(self, namespace: str, key: str) -> Any:
+        """Cached value, or MISSING."""
+        full_key = self._key(namespace, key)
+        value = self.local.get(full_key)
+        if value is not MISSING or self.remote is None:
+            return value
+        try:
+            value = self.remote.get(full_key)
+        except RedisError as e:
+            logger.warning(f"Cache read from shared backend failed: {e}")
+            return MISSING
+        if value is not MISSING:
+            self.local.set(full_key, value, setting.CACHE_LOCAL_TTL_SECONDS)
+        return value
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        full_key = self._key(namespace, key)
+        # Local copies are bounded by the local TTL: other workers' invalidations may never reach us
+        local_ttl = min(ttl, setting.CACHE_LOCAL_TTL_SECONDS) if ttl else setting.CACHE_LOCAL_TTL_SECONDS
+        self.local.set(full_key, value, local_ttl)
+        if self.remote is None:
+            return
+        try:
+            self.remote.set(namespace, full_key, value, ttl)
+        except RedisError as e:
+            logger.warning(f"Cache write to shared backend failed: {e}")
+
+    def get_or_set(self, namespace: str, key: str, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        value = self.get(namespace, key)
+        if value is MISSING:
+            value = loader()
+            self.set(namespace, key, value, ttl)
+        return value
+
+    def invalidate(self, namespace: str, key: Optional[str] = None) -> None:
+        """Drop one key, or the whole namespace, in every worker. Call after the write commits."""
+        self._drop_local(namespace, key)
+        if self.remote is None:
+            return
+        try:
+            if key is None:
+                self.remote.delete_namespace(namespace)
+            else:
+                self.remote.delete(self._key(namespace, key))
+            message = json.dumps({"origin": self.origin, "namespace": namespace, "key": key})
+            self.remote.client.execute("PUBLISH", self.channel, message)
+        except RedisError as e:
+            logger.warning(f"Cache invalidation of '{namespace}' not shared with other workers: {e}")
+
+    def _drop_local(self, namespace: str, key: Optional[str]) -> None:
+        if key is None:
+            self.local.delete_prefix(namespace + ":")
+        else:
+            self.local.delete(self._key(namespace, key))
+
+    # -- cross-worker invalidation ------------------------------------------
+
+    def start_listener(self, subscriber: RedisClient) -> None:
+        """Apply invalidations published by other workers, from a daemon thread."""
+        if self._listener is not None:
+            return
+        self._subscriber = subscriber
+        self._listener = threading.Thread(target=self._listen, name="cache-invalidation", daemon=True)
+        self._listener.start()
+
+    def _listen(self) -> None:
+        delay = 0.5
+        while self._subscriber is not None:
+            try:
+                for _, raw in self._subscriber.subscribe(self.channel):
+                    delay = 0.5
+                    self._apply(raw)
+            except RedisError as e:
+                if self._subscriber is None:
+                    return
+                logger.warning(f"Cache invalidation channel lost, retrying in {delay}s: {e}")
+            # Invalidations may have been missed while disconnected
+            self.local.clear()
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    def _apply(self, raw: bytes) -> None:
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            return
+        if message.get("origin") != self.origin:
+            self._drop_local(message["namespace"], message.get("key"))
+
+    def close(self) -> None:
+        subscriber, self._subscriber = self._subscriber, None
+        if subscriber is not None:
+            subscriber.shutdown()
+        self._listener = None
+
+
+_cache: Optional[Cache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Cache:
+    """Process-wide cache chosen by CACHE_BACKEND ("memory" or "redis")."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            local = MemoryBackend(setting.CACHE_LOCAL_SIZE)
+            if setting.CACHE_BACKEND == "redis":
+                _cache = Cache(local, RedisBackend(RedisClient.from_url(setting.REDIS_URL)), setting.CACHE_CHANNEL)
+                _cache.start_listener(RedisClient.from_url(setting.REDIS_URL))
+            else:
+                _cache = Cache(local)
+        return _cache
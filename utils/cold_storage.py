@@ -0,0 +1,311 @@
+"""
+Cold storage for closed academic years.
+
+Closed-year rows of the high-volume tables are written to zstd-compressed
+Parquet files under COLD_STORAGE_DIR and removed from the hot tables. Read
+paths add archived data to what the hot tables return, and only touch the
+files when the requested date range overlaps an archived year:
+
+- `aggregate` for totals (dashboard summaries, ledger, finance analytics);
+- `scan` for the rows themselves (fee lists, /finance/query, ledger exports).
+
+Attendance lists do not read archived rows (a year is millions of them);
+they reject dates in an archived year and flag archived years otherwise
+(see `archived_years`).
+
+Layout (one part per export of the year):
+    <COLD_STORAGE_DIR>/<table>/academic_year=<year>/part-<n>.parquet
+    <COLD_STORAGE_DIR>/manifest.json
+"""
+import enum
+import json
+import os
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, delete, func, select, text
+from sqlmodel import Session
+
+import setting
+from schemas.attendance_model import Attendance
+from schemas.expense_model import Expense
+from schemas.fee_model import Fee
+from schemas.income_model import Income
+from utils.academic_year import academic_year_bounds, current_academic_year
+from utils.logging import logger
+
+# table name -> (model, date column used to assign rows to a year)
+ARCHIVABLE = {
+    "attendance": (Attendance, "attendance_date"),
+    "fee": (Fee, "created_at"),
+    "income": (Income, "date"),
+    "expense": (Expense, "date"),
+}
+
+BATCH_SIZE = 10_000
+
+_manifest_cache: Tuple[str, float, dict] = ("", 0.0, {})
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise RuntimeError("Cold storage requires the 'pyarrow' package")
+    return pyarrow
+
+
+def _manifest_path() -> str:
+    return os.path.join(setting.COLD_STORAGE_DIR, "manifest.json")
+
+
+def load_manifest() -> dict:
+    """Return the archive manifest, re-reading it only when the file changes."""
+    global _manifest_cache
+    path = _manifest_path()
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    if (path, mtime) != _manifest_cache[:2]:
+        with open(path, encoding="utf-8") as f:
+            _manifest_cache = (path, mtime, json.load(f))
+    return _manifest_cache[2]
+
+
+def _save_manifest(manifest: dict) -> None:
+    os.makedirs(setting.COLD_STORAGE_DIR, exist_ok=True)
+    tmp = _manifest_path() + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, _manifest_path())
+
+
+def _arrow_schema(model):
+    pa = _pyarrow()
+    fields = []
+    for column in model.__table__.columns:
+        if isinstance(column.type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+def _plain(value):
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+def _require_partition_attached(session: Session, year: int) -> None:
+    # A year detached by scripts/attendance_partitions.py is not in the live table; exporting
+    # would archive only the rows written since and hide the detached ones from `aggregate`
+    from scripts.attendance_partitions import ARCHIVE_SCHEMA, partition_name
+
+    detached = session.execute(
+        text("SELECT to_regclass(:name)"), {"name": f"{ARCHIVE_SCHEMA}.{partition_name(year)}"}
+    ).scalar()
+    if detached:
+        raise ValueError(f"Attendance for academic year {year} is detached; restore it before exporting")
+
+
+def _entry_files(entry: dict) -> List[str]:
+    return entry.get("files") or [entry["file"]]  # "file": manifests written before re-exports
+
+
+def _next_part(target_dir: str) -> int:
+    parts = [name for name in os.listdir(target_dir) if name.startswith("part-") and name.endswith(".parquet")]
+    return max((int(name[5:-8]) for name in parts), default=-1) + 1
+
+
+def export_year(session: Session, table: str, year: int) -> int:
+    """
+    Move one closed academic year of `table` to Parquet and delete it from the
+    hot table. Returns the number of rows archived.
+
+    A year can be exported again (rows backdated into it after the first
+    export): each export adds a new part file and the manifest entry lists
+    them all, so earlier parts are never overwritten.
+    """
+    pa = _pyarrow()
+    if year >= current_academic_year():
+        raise ValueError(f"Academic year {year} is not closed yet")
+    model, date_column = ARCHIVABLE[table]
+    if table == "attendance" and session.get_bind().dialect.name == "postgresql":
+        _require_partition_attached(session, year)
+    start, end = academic_year_bounds(year)
+    column = getattr(model, date_column)
+    in_year = (column >= start, column < end)
+    schema = _arrow_schema(model)
+    names = schema.names
+
+    target_dir = os.path.join(setting.COLD_STORAGE_DIR, table, f"academic_year={year}")
+    os.makedirs(target_dir, exist_ok=True)
+    target = os.path.join(target_dir, f"part-{_next_part(target_dir)}.parquet")
+    tmp = target + ".tmp"
+
+    written = 0
+    result = session.execute(
+        select(model.__table__).where(*in_year), execution_options={"stream_results": True, "yield_per": BATCH_SIZE}
+    )
+    with pa.parquet.ParquetWriter(tmp, schema, compression="zstd") as writer:
+        for rows in result.partitions():
+            batch = {name: [_plain(row[i]) for row in rows] for i, name in enumerate(names)}
+            writer.write_table(pa.table(batch, schema=schema))
+            written += len(rows)
+
+    if written == 0:
+        os.remove(tmp)
+        logger.info(f"No {table} rows to archive for academic year {year}")
+        return 0
+
+    if pa.parquet.ParquetFile(tmp).metadata.num_rows != written:
+        os.remove(tmp)
+        raise RuntimeError(f"Parquet row count mismatch while archiving {table} {year}")
+    os.replace(tmp, target)
+
+    # Rows are only removed once the file is safely in place; a failure
+    # here rolls the delete back and leaves the data in both places.
+    try:
+        deleted = session.execute(delete(model.__table__).where(*in_year)).rowcount
+        if deleted != written:
+            raise RuntimeError(f"Deleted {deleted} {table} rows but archived {written}")
+        session.commit()
+    except Exception:
+        session.rollback()
+        os.remove(target)
+        raise
+
+    manifest = load_manifest()
+    previous = manifest.get(table, {}).get(str(year))
+    files = (_entry_files(previous) if previous else []) + [os.path.relpath(target, setting.COLD_STORAGE_DIR)]
+    manifest.setdefault(table, {})[str(year)] = {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "rows": (previous["rows"] if previous else 0) + written,
+        "files": files,
+        "archived_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    _save_manifest(manifest)
+    logger.info(f"Archived {written} {table} rows for academic year {year}")
+    return written
+
+
+def archived_years(table: str, start: Optional[date] = None, end: Optional[date] = None) -> List[int]:
+    """Archived academic years of `table` overlapping [start, end); every archived year when unbounded."""
+    years = []
+    for year, entry in load_manifest().get(table, {}).items():
+        if (end is None or date.fromisoformat(entry["start"]) < end) and (
+            start is None or start < date.fromisoformat(entry["end"])
+        ):
+            years.append(int(year))
+    return sorted(years)
+
+
+def _dataset(table: str, years: Sequence[int]):
+    import pyarrow.dataset as ds
+
+    entries = load_manifest()[table]
+    return ds.dataset(
+        [os.path.join(setting.COLD_STORAGE_DIR, name) for y in years for name in _entry_files(entries[str(y)])],
+        format="parquet",
+    )
+
+
+def _date_filter(pa, date_column: str, start: Optional[date], end: Optional[date]):
+    import pyarrow.dataset as ds
+
+    field, condition = ds.field(date_column), None
+    for bound, op in ((start, "__ge__"), (end, "__lt__")):
+        if bound is not None:
+            term = getattr(field, op)(pa.scalar(datetime.combine(bound, datetime.min.time()), pa.timestamp("us")))
+            condition = term if condition is None else condition & term
+    return condition
+
+
+def scan(
+    table: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    equals: Optional[Dict[str, object]] = None,
+) -> List[Dict]:
+    """
+    Archived rows of `table` whose date falls in [start, end) (unbounded
+    sides cover every archived year) and whose columns equal `equals`
+    (None values are ignored), ordered by date then primary key. Returns []
+    without touching disk when nothing in the range is archived.
+    """
+    years = archived_years(table, start, end)
+    if not years:
+        return []
+    pa = _pyarrow()
+    import pyarrow.dataset as ds
+
+    model, date_column = ARCHIVABLE[table]
+    schema = _arrow_schema(model)
+    condition = _date_filter(pa, date_column, start, end)
+    for column, value in (equals or {}).items():
+        if value is None:
+            continue
+        term = ds.field(column) == pa.scalar(_plain(value), schema.field(column).type)
+        condition = term if condition is None else condition & term
+    data = _dataset(table, years).to_table(filter=condition)
+    key = model.__table__.primary_key.columns[0].name
+    return data.sort_by([(date_column, "ascending"), (key, "ascending")]).to_pylist()
+
+
+def aggregate(
+    table: str,
+    start: date,
+    end: date,
+    aggregations: Sequence[Tuple[str, str]],
+    group_by: Sequence[str] = (),
+    by_month: bool = False,
+) -> List[Dict]:
+    """
+    Aggregate archived rows of `table` whose date falls in [start, end).
+
+    `aggregations` are pyarrow (column, function) pairs such as
+    ("amount", "sum") or ("student_id", "count_distinct"); result keys follow
+    pyarrow's "<column>_<function>" naming. With `by_month`, rows are also
+    grouped by calendar month under the "month" key. Returns [] without
+    touching disk when nothing in the range is archived.
+    """
+    years = archived_years(table, start, end)
+    if not years:
+        return []
+    pa = _pyarrow()
+    import pyarrow.compute as pc
+
+    _, date_column = ARCHIVABLE[table]
+    columns = {date_column, *group_by, *(column for column, _ in aggregations)}
+    data = _dataset(table, years).to_table(columns=sorted(columns), filter=_date_filter(pa, date_column, start, end))
+    if data.num_rows == 0:
+        return []
+
+    keys = list(group_by)
+    if by_month:
+        data = data.append_column("month", pc.month(data[date_column]))
+        keys.append("month")
+    if not keys:
+        return [{
+            f"{column}_{function}": getattr(pc, function)(data[column]).as_py()
+            for column, function in aggregations
+        }]
+    return data.group_by(keys).aggregate(list(aggregations)).to_pylist()
+
+
+def hot_date_range(table: str, session) -> Optional[Tuple[datetime, datetime]]:
+    """Oldest and newest dates still held in the hot table (for the `list` command)."""
+    model, date_column = ARCHIVABLE[table]
+    column = getattr(model, date_column)
+    row = session.execute(select(func.min(column), func.max(column))).first()
+    return (row[0], row[1]) if row and row[0] else None
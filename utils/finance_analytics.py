@@ -0,0 +1,190 @@
+"""
+Side-by-side income, expense and fee collection totals for sets of periods.
+
+A request names one granularity (month, quarter or academic year) and any
+number of periods. Totals for every uncached period are computed in a single
+grouped query: the three source tables are combined with UNION ALL, each row
+is bucketed to the start of its period with `date_trunc` (academic years are
+truncated after shifting by the start month), and the result is grouped by
+(kind, bucket). Archived years are added from cold storage.
+
+Closed periods, those that ended before today, are kept in the shared cache
+(utils.cache) under the "finance_periods" namespace. Writes that can touch a
+past period call `invalidate` with the affected date, which drops the cached
+periods containing it in every worker.
+"""
+import re
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, literal, literal_column, or_, select, union_all
+from sqlmodel import Session
+
+import setting
+from schemas.expense_model import Expense
+from schemas.fee_model import Fee, FeeStatus
+from schemas.finance_model import PeriodTotals
+from schemas.income_model import Income
+from utils import cold_storage
+from utils.academic_year import academic_year_bounds, academic_year_of
+from utils.cache import MISSING, get_cache
+
+GRANULARITIES = ("month", "quarter", "academic_year")
+MAX_PERIODS = 60
+CACHE_NAMESPACE = "finance_periods"
+
+# kind -> (model, date column, amount column, extra filter)
+SOURCES = {
+    "income": (Income, Income.date, Income.amount, None),
+    "expense": (Expense, Expense.date, Expense.amount, None),
+    "fee_collected": (Fee, Fee.created_at, Fee.fee_amount, Fee.fee_status == FeeStatus.PAID),
+}
+# cold storage table and amount column for each kind
+ARCHIVED = {
+    "income": ("income", "amount"),
+    "expense": ("expense", "amount"),
+    "fee_collected": ("fee", "fee_amount"),
+}
+
+
+def parse_period(granularity: str, label: str) -> Tuple[date, date]:
+    """
+    [start, end) of a period label: "2025-03" for a month, "2025-Q2" for a
+    quarter, "2024" for the academic year starting in 2024.
+    """
+    if granularity == "month":
+        match = re.fullmatch(r"(\d{4})-(\d{1,2})", label)
+        if not match or not 1 <= int(match.group(2)) <= 12:
+            raise ValueError(f"Invalid month '{label}', expected YYYY-MM")
+        year, month = int(match.group(1)), int(match.group(2))
+        end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        return date(year, month, 1), end
+    if granularity == "quarter":
+        match = re.fullmatch(r"(\d{4})-Q([1-4])", label, re.IGNORECASE)
+        if not match:
+            raise ValueError(f"Invalid quarter '{label}', expected YYYY-Qn")
+        year, quarter = int(match.group(1)), int(match.group(2))
+        start = date(year, 3 * quarter - 2, 1)
+        end = date(year + 1, 1, 1) if quarter == 4 else date(year, 3 * quarter + 1, 1)
+        return start, end
+    if granularity == "academic_year":
+        if not re.fullmatch(r"\d{4}", label):
+            raise ValueError(f"Invalid academic year '{label}', expected YYYY")
+        return academic_year_bounds(int(label))
+    raise ValueError(f"Unknown granularity '{granularity}'")
+
+
+def _bucket(column, granularity: str, dialect: str, periods: List[Tuple[date, date]]):
+    """Expression mapping a date column to the start of its period."""
+    if dialect == "postgresql":
+        if granularity != "academic_year":
+            return func.date_trunc(granularity, column)
+        shift = literal_column(f"interval '{setting.ACADEMIC_YEAR_START_MONTH - 1} months'")
+        return func.date_trunc("year", column - shift) + shift
+    # No date_trunc elsewhere: label rows with the requested period they fall in
+    return case(*[(and_(column >= start, column < end), literal(start)) for start, end in periods])
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def _compute(session: Session, granularity: str, periods: List[Tuple[date, date]]) -> Dict[date, Dict[str, float]]:
+    dialect = session.get_bind().dialect.name
+    totals = {start: {kind: 0.0 for kind in SOURCES} for start, _ in periods}
+
+    branches = []
+    for kind, (model, column, amount, extra) in SOURCES.items():
+        stmt = select(
+            literal(kind).label("kind"),
+            _bucket(column, granularity, dialect, periods).label("bucket"),
+            amount.label("amount"),
+        ).where(or_(*[and_(column >= start, column < end) for start, end in periods]))
+        if extra is not None:
+            stmt = stmt.where(extra)
+        branches.append(stmt)
+    combined = union_all(*branches).subquery()
+    rows = session.execute(
+        select(combined.c.kind, combined.c.bucket, func.sum(combined.c.amount))
+        .group_by(combined.c.kind, combined.c.bucket)
+    ).all()
+    for kind, bucket, amount in rows:
+        start = _as_date(bucket)
+        if start in totals:
+            totals[start][kind] += float(amount or 0)
+
+    for kind, (table, amount_column) in ARCHIVED.items():
+        group_by = ["fee_status"] if kind == "fee_collected" else []
+        for start, end in periods:
+            for row in cold_storage.aggregate(table, start, end, [(amount_column, "sum")], group_by=group_by):
+                if kind == "fee_collected" and row["fee_status"] != FeeStatus.PAID.value:
+                    continue
+                totals[start][kind] += float(row[f"{amount_column}_sum"] or 0)
+    return totals
+
+
+def compare_periods(session: Session, granularity: str, labels: List[str]) -> List[PeriodTotals]:
+    """Totals for each labelled period, in the order given."""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}'")
+    if not labels:
+        raise ValueError("At least one period is required")
+    if len(labels) > MAX_PERIODS:
+        raise ValueError(f"At most {MAX_PERIODS} periods can be compared at once")
+
+    bounds = {label: parse_period(granularity, label) for label in labels}
+    today = date.today()
+    cache = get_cache()
+    cached: Dict[date, Dict[str, float]] = {}
+    for start, end in bounds.values():
+        if end <= today and start not in cached:
+            hit = cache.get(CACHE_NAMESPACE, _cache_key(granularity, start))
+            if hit is not MISSING:
+                cached[start] = hit
+
+    missing = sorted({b for b in bounds.values() if b[0] not in cached})
+    if missing:
+        computed = _compute(session, granularity, missing)
+        for start, end in missing:
+            if end <= today:
+                cache.set(CACHE_NAMESPACE, _cache_key(granularity, start), computed[start])
+        cached.update(computed)
+
+    result = []
+    for label, (start, end) in bounds.items():
+        values = cached[start]
+        result.append(PeriodTotals(
+            period=label,
+            start=start,
+            end=end,
+            income=values["income"],
+            expense=values["expense"],
+            net=values["income"] - values["expense"],
+            fee_collected=values["fee_collected"],
+            closed=end <= today,
+        ))
+    return result
+
+
+def _cache_key(granularity: str, start: date) -> str:
+    return f"{granularity}:{start.isoformat()}"
+
+
+def invalidate(when: Optional[datetime] = None) -> None:
+    """Drop cached periods containing `when`, or every cached period when it is None."""
+    cache = get_cache()
+    if when is None:
+        cache.invalidate(CACHE_NAMESPACE)
+        return
+    day = _as_date(when)
+    starts = {
+        "month": date(day.year, day.month, 1),
+        "quarter": date(day.year, 3 * ((day.month - 1) // 3) + 1, 1),
+        "academic_year": academic_year_bounds(academic_year_of(day))[0],
+    }
+    for granularity, start in starts.items():
+        cache.invalidate(CACHE_NAMESPACE, _cache_key(granularity, start))
@@ -0,0 +1,40 @@
+"""
+SIGTERM handling that lets load balancers notice before the worker goes.
+
+uvicorn closes its listening sockets as soon as it is asked to exit and
+runs the lifespan shutdown only after in-flight requests are done, so a
+flag set during lifespan shutdown is never seen by a /readyz poller.
+`DrainingServer` splits SIGTERM in two steps instead:
+
+1. mark the worker draining: /readyz answers 503 (see utils/health.py)
+   while requests, probes included, are still served;
+2. WEB_DRAIN_SECONDS later, run uvicorn's usual shutdown: stop accepting,
+   let in-flight requests finish, then the lifespan shutdown.
+
+SIGINT (Ctrl+C) or a second SIGTERM skips the wait. `python -m server
+--single` serves through it directly and the gunicorn workers through
+utils/gunicorn_worker.py.
+"""
+import signal
+import threading
+from types import FrameType
+from typing import Optional
+
+import uvicorn
+
+import setting
+from utils.health import readiness
+from utils.logging import logger
+
+
+class DrainingServer(uvicorn.Server):
+    def handle_exit(self, sig: int, frame: Optional[FrameType]) -> None:
+        if sig != signal.SIGTERM or readiness.draining or self.should_exit or setting.WEB_DRAIN_SECONDS <= 0:
+            readiness.draining = True
+            super().handle_exit(sig, frame)
+            return
+        readiness.draining = True
+        logger.info(f"Draining for {setting.WEB_DRAIN_SECONDS}s before shutting down")
+        timer = threading.Timer(setting.WEB_DRAIN_SECONDS, super().handle_exit, (sig, frame))
+        timer.daemon = True
+        timer.start()
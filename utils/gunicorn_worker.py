@@ -0,0 +1,23 @@
+"""
+gunicorn worker class for `python -m server`: uvicorn's worker serving
+through `DrainingServer` (utils/graceful.py), so SIGTERM from the master
+first turns /readyz 503 and only then stops accepting. Kept apart from
+utils/graceful.py because gunicorn does not import on Windows.
+"""
+import sys
+
+from gunicorn.arbiter import Arbiter
+from uvicorn.workers import UvicornWorker
+
+from utils.graceful import DrainingServer
+
+
+class DrainingUvicornWorker(UvicornWorker):
+    async def _serve(self) -> None:
+        # UvicornWorker._serve with DrainingServer in place of uvicorn.Server
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
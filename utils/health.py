@@ -0,0 +1,118 @@
+"""
+Liveness and readiness of one worker.
+
+/healthz only shows that the worker answers. /readyz checks what requests
+need and answers 503 when the worker should get no traffic:
+
+- database: a SELECT 1 round trip; not ready when it fails or takes longer
+  than READY_DB_MAX_LATENCY_MS. When the probe hits a dead connection (e.g.
+  after a database restart) SQLAlchemy invalidates the whole pool, so the
+  next probe and the next requests reconnect instead of failing.
+- pool: checked-out connections / (pool size + max overflow). At
+  READY_MAX_POOL_SATURATION the worker is not ready and the database probe
+  is skipped, since it would queue for a connection like any request.
+- cache: PING to the Redis backend. The cache treats Redis failures as
+  misses, so an unreachable Redis is reported but keeps the worker ready.
+- draining: set on SIGTERM, WEB_DRAIN_SECONDS before the worker stops
+  accepting connections (utils/graceful.py).
+
+A report is reused for READY_CACHE_SECONDS and concurrent probes wait for
+the same check, so polling every second from several places costs at most
+one round trip per interval.
+"""
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import QueuePool
+
+import setting
+from utils.cache import get_cache
+from utils.logging import logger
+from utils.redis_client import RedisError
+
+
+def _ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def pool_status(engine: Engine) -> dict:
+    """Pool usage; `saturation` is None for pools without a fixed capacity (SQLite, NullPool)."""
+    pool = engine.pool
+    status = {"class": type(pool).__name__, "saturation": None}
+    if isinstance(pool, QueuePool):
+        max_overflow = pool._max_overflow  # -1 = unlimited
+        status.update(size=pool.size(), max_overflow=max_overflow, checked_out=pool.checkedout())
+        if max_overflow >= 0:
+            status["saturation"] = round(status["checked_out"] / (pool.size() + max_overflow), 3)
+    return status
+
+
+def check_database(engine: Engine) -> dict:
+    started = time.perf_counter()
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except SQLAlchemyError as e:
+        return {"ok": False, "latency_ms": _ms(started), "error": str(e).splitlines()[0]}
+    latency_ms = _ms(started)
+    return {"ok": latency_ms <= setting.READY_DB_MAX_LATENCY_MS, "latency_ms": latency_ms}
+
+
+def check_cache() -> dict:
+    remote = get_cache().remote
+    if remote is None:
+        return {"ok": True, "backend": "memory"}
+    started = time.perf_counter()
+    try:
+        ok = remote.client.ping()
+    except RedisError as e:
+        return {"ok": False, "backend": "redis", "latency_ms": _ms(started), "error": str(e)}
+    return {"ok": ok, "backend": "redis", "latency_ms": _ms(started)}
+
+
+class Readiness:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.draining = False
+        self._lock = threading.Lock()
+        self._report: Optional[dict] = None
+        self._expires = 0.0
+
+    def check(self, engine: Engine) -> dict:
+        with self._lock:
+            if self._report is None or time.monotonic() >= self._expires:
+                report = self._run(engine)
+                if self._report is not None and report["ready"] != self._report["ready"]:
+                    logger.warning(f"Readiness changed to {report['ready']}", extra={"readiness": report})
+                self._report = report
+                self._expires = time.monotonic() + self.ttl
+            report = self._report
+        if self.draining:
+            return {**report, "ready": False, "draining": True}
+        return report
+
+    @staticmethod
+    def _run(engine: Engine) -> dict:
+        pool = pool_status(engine)
+        saturated = pool["saturation"] is not None and pool["saturation"] >= setting.READY_MAX_POOL_SATURATION
+        database = {"ok": False, "error": "pool exhausted"} if saturated else check_database(engine)
+        return {
+            "ready": database["ok"],
+            "draining": False,
+            "database": database,
+            "pool": pool,
+            "cache": check_cache(),
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._report = None
+        self.draining = False
+
+
+readiness = Readiness(setting.READY_CACHE_SECONDS)
+
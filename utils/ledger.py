@@ -0,0 +1,223 @@
+"""
+Maintained monthly ledger of Income and Expense totals.
+
+`MonthlyLedger` holds one row per (year, month, kind, category). The income
+and expense routers call `record_change` inside the same transaction as the
+row they create, update or delete, so the ledger always matches the source
+tables and reads cost O(months) instead of a scan over every record.
+Archiving rows to cold storage leaves the ledger untouched, so archived
+years keep showing up in balances.
+
+The cached finance analytics periods a change touches are invalidated when
+the transaction commits and forgotten if it rolls back, so another request
+cannot re-cache a period before the change is visible to it.
+
+`rebuild` recomputes the whole ledger (hot tables plus archived Parquet
+years) and is used to backfill an existing database or repair drift:
+
+    python -m scripts.ledger rebuild
+"""
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import case, delete, event, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session
+
+from schemas.expense_cat_names_model import ExpenseCatNames
+from schemas.expense_model import Expense
+from schemas.income_cat_names_model import IncomeCatNames
+from schemas.income_model import Income
+from schemas.ledger_model import LedgerMonth, LedgerResponse, MonthlyLedger
+from utils import cold_storage, finance_analytics
+from utils.academic_year import academic_year_bounds
+from utils.logging import logger
+
+SOURCES = {"income": Income, "expense": Expense}
+
+# (category_id, date, amount) of a source row, or None if it does not exist
+Entry = Optional[Tuple[int, Optional[datetime], float]]
+
+_KEY = ("year", "month", "kind", "category_id")
+
+# session.info key: dates whose analytics periods are dropped on commit
+_PENDING_INVALIDATIONS = "ledger_pending_invalidations"
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _invalidate_committed(session: OrmSession) -> None:
+    for when in session.info.pop(_PENDING_INVALIDATIONS, ()):
+        finance_analytics.invalidate(when)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _forget_rolled_back(session: OrmSession) -> None:
+    session.info.pop(_PENDING_INVALIDATIONS, None)
+
+
+def _upsert(session: Session, year: int, month: int, kind: str, category_id: int, amount: float, entries: int) -> None:
+    table = MonthlyLedger.__table__
+    values = dict(year=year, month=month, kind=kind, category_id=category_id, amount=amount, entries=entries)
+    dialect = session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(_KEY),
+            set_={
+                "amount": table.c.amount + stmt.excluded.amount,
+                "entries": table.c.entries + stmt.excluded.entries,
+            },
+        )
+        session.execute(stmt)
+        return
+
+    match = [table.c[key] == values[key] for key in _KEY]
+    updated = session.execute(
+        update(table).where(*match).values(amount=table.c.amount + amount, entries=table.c.entries + entries)
+    ).rowcount
+    if not updated:
+        session.execute(table.insert().values(**values))
+
+
+def record_change(session: Session, kind: str, old: Entry, new: Entry) -> None:
+    """
+    Apply the difference between the old and new state of one income/expense
+    row to the ledger. Pass old=None for a create and new=None for a delete.
+    Does not commit; the cached analytics periods are invalidated when the
+    caller does.
+    """
+    pending = session.info.setdefault(_PENDING_INVALIDATIONS, set())
+    if old and old[1] is not None:
+        category_id, when, amount = old
+        _upsert(session, when.year, when.month, kind, category_id, -amount, -1)
+        pending.add(when)
+    if new and new[1] is not None:
+        category_id, when, amount = new
+        _upsert(session, when.year, when.month, kind, category_id, amount, 1)
+        pending.add(when)
+
+
+def entry_of(row) -> Entry:
+    """Ledger-relevant state of an Income or Expense row."""
+    return (row.category_id, row.date, row.amount)
+
+
+def rebuild(session: Session) -> int:
+    """Recompute the ledger from the hot tables and archived years. Returns the number of ledger rows."""
+    totals: Dict[Tuple[int, int, str, int], list] = {}
+
+    def add(year, month, kind, category_id, amount, entries):
+        key = (int(year), int(month), kind, int(category_id))
+        bucket = totals.setdefault(key, [0.0, 0])
+        bucket[0] += float(amount or 0)
+        bucket[1] += int(entries or 0)
+
+    for kind, model in SOURCES.items():
+        year = func.extract("year", model.date)
+        month = func.extract("month", model.date)
+        rows = session.execute(
+            select(year, month, model.category_id, func.sum(model.amount), func.count())
+            .where(model.date.is_not(None))
+            .group_by(year, month, model.category_id)
+        ).all()
+        for row in rows:
+            add(row[0], row[1], kind, row[2], row[3], row[4])
+
+        for academic_year in cold_storage.load_manifest().get(kind, {}):
+            start, end = academic_year_bounds(int(academic_year))
+            for row in cold_storage.aggregate(
+                kind, start, end, [("amount", "sum"), ("amount", "count")],
+                group_by=["category_id"], by_month=True,
+            ):
+                # An academic year spans twelve months, so the month alone fixes the calendar year
+                calendar_year = start.year if row["month"] >= start.month else start.year + 1
+                add(calendar_year, row["month"], kind, row["category_id"], row["amount_sum"], row["amount_count"])
+
+    session.execute(delete(MonthlyLedger))
+    if totals:
+        session.execute(
+            MonthlyLedger.__table__.insert(),
+            [
+                dict(zip(_KEY, key), amount=amount, entries=entries)
+                for key, (amount, entries) in sorted(totals.items())
+            ],
+        )
+    session.commit()
+    logger.info(f"Rebuilt monthly ledger with {len(totals)} rows")
+    return len(totals)
+
+
+def _period_index(year, month):
+    return year * 12 + month - 1
+
+
+def monthly_ledger(
+    session: Session,
+    start_year: int,
+    start_month: int,
+    end_year: int,
+    end_month: int,
+    by_category: bool = False,
+) -> LedgerResponse:
+    """Income, expense, net and running balance for each month from start to end (inclusive)."""
+    first = _period_index(start_year, start_month)
+    last = _period_index(end_year, end_month)
+    if last < first:
+        raise ValueError("End month is before start month")
+    index = _period_index(MonthlyLedger.year, MonthlyLedger.month)
+    signed = case((MonthlyLedger.kind == "income", MonthlyLedger.amount), else_=-MonthlyLedger.amount)
+
+    opening = session.execute(select(func.sum(signed)).where(index < first)).scalar() or 0.0
+    rows = session.execute(
+        select(MonthlyLedger.year, MonthlyLedger.month, MonthlyLedger.kind,
+               MonthlyLedger.category_id, MonthlyLedger.amount)
+        .where(index >= first, index <= last, MonthlyLedger.entries != 0)
+    ).all()
+
+    names = {}
+    if by_category:
+        names["income"] = dict(session.execute(
+            select(IncomeCatNames.income_cat_name_id, IncomeCatNames.income_cat_name)
+        ).all())
+        names["expense"] = dict(session.execute(
+            select(ExpenseCatNames.expense_cat_name_id, ExpenseCatNames.expense_cat_name)
+        ).all())
+
+    per_month: Dict[int, Dict[str, Dict[int, float]]] = {}
+    for row in rows:
+        kinds = per_month.setdefault(_period_index(row.year, row.month), {"income": {}, "expense": {}})
+        kinds[row.kind][row.category_id] = kinds[row.kind].get(row.category_id, 0.0) + row.amount
+
+    months = []
+    balance = float(opening)
+    for i in range(first, last + 1):
+        kinds = per_month.get(i, {"income": {}, "expense": {}})
+        income = sum(kinds["income"].values())
+        expense = sum(kinds["expense"].values())
+        balance += income - expense
+        month = LedgerMonth(
+            year=i // 12,
+            month=i % 12 + 1,
+            income=income,
+            expense=expense,
+            net=income - expense,
+            running_balance=balance,
+        )
+        if by_category:
+            for kind in ("income", "expense"):
+                setattr(month, f"{kind}_by_category", {
+                    names[kind].get(category_id, f"Unknown-{category_id}"): amount
+                    for category_id, amount in kinds[kind].items()
+                })
+        months.append(month)
+
+    return LedgerResponse(
+        opening_balance=float(opening),
+        closing_balance=balance,
+        total_income=sum(m.income for m in months),
+        total_expense=sum(m.expense for m in months),
+        months=months,
+    )
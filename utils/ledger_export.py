@@ -0,0 +1,129 @@
+"""
+Streaming CSV/XLSX export of ledger queries.
+
+Rows are read through a server-side cursor (`stream_results`) and written to
+the response in batches, so memory stays flat regardless of ledger size.
+
+The rows come through the request's session (`get_session`, so dependency
+overrides apply). FastAPI closes that session when the endpoint returns,
+before the body is streamed; a closed Session reconnects on first use, so the
+stream reads through it and a background task closes it again once the
+response is finished (or the client has gone).
+
+Rows of archived years (utils/cold_storage.py) are passed in by the router,
+already in (date, id) order, and merged into the stream; the statement must
+order by date (NULLs last) then id as well.
+"""
+import csv
+import enum
+import heapq
+import io
+import os
+import tempfile
+from datetime import date, datetime
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.sql import Select
+from sqlmodel import Session
+from starlette.background import BackgroundTask
+
+BATCH_SIZE = 2000
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _cell(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _date_order(row):
+    # Export rows start with (id, date)
+    return row[1] is None, row[1] or datetime.min, row[0]
+
+
+def _rows(session: Session, stmt: Select, archived: Sequence[Sequence]) -> Iterator[list]:
+    result = session.execute(stmt, execution_options={"stream_results": True, "yield_per": BATCH_SIZE})
+    if not archived:
+        for batch in result.partitions():
+            yield [[_cell(value) for value in row] for row in batch]
+        return
+    batch = []
+    for row in heapq.merge(result, archived, key=_date_order):
+        batch.append([_cell(value) for value in row])
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _csv_stream(session: Session, stmt: Select, headers: List[str], archived: Sequence[Sequence]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for batch in _rows(session, stmt, archived):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _xlsx_stream(
+    session: Session, stmt: Select, headers: List[str], sheet_title: str, archived: Sequence[Sequence]
+) -> Iterator[bytes]:
+    from openpyxl import Workbook
+
+    # write_only workbooks spool rows to disk instead of keeping them in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title[:31])
+    sheet.append(headers)
+    for batch in _rows(session, stmt, archived):
+        for row in batch:
+            sheet.append(row)
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        workbook.save(path)
+        with open(path, "rb") as f:
+            while chunk := f.read(64 * 1024):
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+def export_ledger(
+    session: Session,
+    stmt: Select,
+    headers: List[str],
+    name: str,
+    file_format: str = "csv",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    archived: Iterable[Sequence] = (),
+) -> StreamingResponse:
+    """
+    Build a streaming download response for `stmt` in CSV or XLSX format,
+    read through `session`, with the `archived` rows merged in.
+    """
+    archived = list(archived)
+    period = "_".join(d.isoformat() for d in (start_date, end_date) if d) or "all"
+    filename = f"{name}_{period}.{file_format}"
+    disposition = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    close = BackgroundTask(session.close)
+
+    if file_format == "csv":
+        return StreamingResponse(
+            _csv_stream(session, stmt, headers, archived), media_type="text/csv", headers=disposition, background=close
+        )
+    if file_format == "xlsx":
+        return StreamingResponse(
+            _xlsx_stream(session, stmt, headers, name, archived), media_type=XLSX_MEDIA_TYPE, headers=disposition, background=close
+        )
+    raise HTTPException(status_code=400, detail="Unsupported export format, expected csv or xlsx")
@@ -1,34 +1,160 @@
+"""
+Application logging.
+
+Nothing is configured at import: entry points (the app's lifespan, the
+scripts) call `configure_logging()`. Loggers never write to disk or the
+console themselves: the root logger has a single QueueHandler that puts
+records on an in-memory queue, and a QueueListener thread formats them and
+does the blocking writes (rotating file + stderr). A request thread only pays for building the record.
+
+Settings:
+- LOG_LEVEL: root level (default INFO)
+- LOG_LEVELS: per-module overrides, e.g. "sqlalchemy.engine=INFO,utils.query_stats=DEBUG"
+- LOG_FORMAT: "json" (one object per line) or "text"
+- LOG_DEBUG_SAMPLE_RATE: fraction of DEBUG records kept (kept ones carry
+  `sample_rate`); loggers given a level in LOG_LEVELS are never sampled
+
+Extra fields passed with `logger.info(..., extra={...})` become keys of the
+JSON record.
+"""
+import atexit
+import json
 import logging
-from datetime import datetime
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import random
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Iterable, Optional
+
+import setting
 
-# Create logs directory if it doesn't exist
 logs_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
-os.makedirs(logs_dir, exist_ok=True)
 
-# Configure logging with rotation
-log_file = os.path.join(logs_dir, f'app_{datetime.now().strftime("%Y%m%d")}.log')
+# Rotation
 max_bytes = 10 * 1024 * 1024  # 10MB per file
 backup_count = 5  # Keep 5 backup files
 
-# Create rotating file handler
-file_handler = RotatingFileHandler(
-    log_file,
-    maxBytes=max_bytes,
-    backupCount=backup_count,
-    encoding='utf-8'
-)
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        file_handler,
-        logging.StreamHandler()
-    ]
-)
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, extra fields, exception."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """
+    Keep only a fraction of DEBUG records; other levels always pass, and so
+    does everything from `exempt` loggers (and their children).
+    """
+
+    def __init__(self, rate: float, exempt: Iterable[str] = ()):
+        super().__init__()
+        self.rate = rate
+        self.exempt = tuple(exempt)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        if any(record.name == name or record.name.startswith(name + ".") for name in self.exempt):
+            return True
+        if random.random() >= self.rate:
+            return False
+        record.sample_rate = self.rate
+        return True
+
+
+class _QueueHandler(QueueHandler):
+    """Like QueueHandler, but keeps the exception text separate from the message."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """Parse "a.b=DEBUG, c=WARNING" into {"a.b": "DEBUG", "c": "WARNING"}."""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging() -> None:
+    """Install the queue pipeline on the root logger (idempotent)."""
+    global _listener
+    if _listener is not None:
+        return
+
+    os.makedirs(logs_dir, exist_ok=True)
+    log_file = os.path.join(logs_dir, f'app_{datetime.now().strftime("%Y%m%d")}.log')
+    formatter = JsonFormatter() if setting.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+    file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    stream_handler = logging.StreamHandler()
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    levels = parse_levels(setting.LOG_LEVELS)
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    # A module turned up explicitly is being debugged: keep all of its records
+    queue_handler.addFilter(DebugSampler(setting.LOG_DEBUG_SAMPLE_RATE, exempt=levels))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(setting.LOG_LEVEL.upper())
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def reset_after_fork() -> None:
+    """Rebuild the pipeline in a forked worker, where the parent's writer thread does not exist."""
+    global _listener
+    _listener = None
+    configure_logging()
+
 
 logger = logging.getLogger(__name__)
 
@@ -38,25 +164,22 @@ def cleanup_old_logs(max_files=5):
     try:
         log_files = [f for f in os.listdir(logs_dir) if f.startswith('app_') and f.endswith('.log')]
         log_files.sort(reverse=True)  # Sort newest first
-        
+
         # Count files to be deleted
         files_to_delete = log_files[max_files:]
         if files_to_delete:
             logger.info(f"Found {len(files_to_delete)} old log files to clean up")
-            
+
             # Remove excess files
             for old_file in files_to_delete:
                 file_path = os.path.join(logs_dir, old_file)
                 os.remove(file_path)
                 logger.info(f"Deleted old log file: {old_file}")
-                
+
             logger.info("Log cleanup completed successfully")
         else:
             logger.info("No old log files to clean up")
-            
+
     except Exception as e:
         logger.error(f"Error during log cleanup: {str(e)}")
         raise
-
-# Call cleanup on startup
-cleanup_old_logs()
\ No newline at end of file
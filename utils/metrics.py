@@ -0,0 +1,155 @@
+"""
+Per-route request metrics in the Prometheus text exposition format.
+
+`MetricsMiddleware` is a plain ASGI middleware (no per-request task or
+Request object) that records, per method and route template:
+
+- http_requests_total{method,route,status}
+- http_request_duration_seconds histogram
+- http_response_size_bytes histogram
+- http_requests_in_flight gauge
+
+Routes are labelled by their template ("/fee/delete_fee/{fee_id}"), never
+the raw path, so label cardinality stays bounded; requests that match no
+route share the "unmatched" label. `render()` produces the /metrics body.
+Other modules can append their own series with `add_collector`.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str) -> List[str]:
+        out = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            out.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        cumulative += self.counts[-1]
+        out.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        out.append(f"{name}_sum{{{labels}}} {self.sum}")
+        out.append(f"{name}_count{{{labels}}} {cumulative}")
+        return out
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RequestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._status: Dict[Tuple[str, str, int], int] = {}
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._size: Dict[Tuple[str, str], Histogram] = {}
+        self._collectors: List[Callable[[], List[str]]] = []
+        self.in_flight = 0
+
+    def observe(self, method: str, route: str, status: int, duration: float, size: int) -> None:
+        key = (method, route)
+        with self._lock:
+            self._status[(method, route, status)] = self._status.get((method, route, status), 0) + 1
+            latency = self._latency.get(key)
+            if latency is None:
+                latency = self._latency[key] = Histogram(LATENCY_BUCKETS)
+                self._size[key] = Histogram(SIZE_BUCKETS)
+            latency.observe(duration)
+            self._size[key].observe(size)
+
+    def add_collector(self, collector: Callable[[], List[str]]) -> None:
+        """Register a callable returning extra exposition lines (with their # TYPE headers)."""
+        self._collectors.append(collector)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._status.clear()
+            self._latency.clear()
+            self._size.clear()
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP http_requests_total Requests handled, by route and status code.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route, status), count in sorted(self._status.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+            lines += [
+                "# HELP http_request_duration_seconds Time from request start to the last response byte.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route), histogram in sorted(self._latency.items()):
+                lines += histogram.lines("http_request_duration_seconds", f'method="{method}",route="{_escape(route)}"')
+            lines += [
+                "# HELP http_response_size_bytes Response body size.",
+                "# TYPE http_response_size_bytes histogram",
+            ]
+            for (method, route), histogram in sorted(self._size.items()):
+                lines += histogram.lines("http_response_size_bytes", f'method="{method}",route="{_escape(route)}"')
+            lines += [
+                "# HELP http_requests_in_flight Requests currently being handled.",
+                "# TYPE http_requests_in_flight gauge",
+                f"http_requests_in_flight {self.in_flight}",
+            ]
+        for collector in self._collectors:
+            lines += collector()
+        return "\n".join(lines) + "\n"
+
+
+metrics = RequestMetrics()
+
+
+class MetricsMiddleware:
+    def __init__(self, app, registry: RequestMetrics = metrics, exclude: Tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.registry = registry
+        self.exclude = exclude
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        registry.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.in_flight -= 1
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            registry.observe(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status,
+                time.perf_counter() - start,
+                size,
+            )
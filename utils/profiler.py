@@ -0,0 +1,241 @@
+"""
+Sampling profiler for a live worker.
+
+A background thread snapshots the Python stack of every thread
+(`sys._current_frames`) at a fixed interval and counts identical stacks.
+Nothing is instrumented, so the profiled code runs at full speed apart
+from the GIL time the sampler itself takes (a few microseconds per sample
+per thread).
+
+Two ways to use it, both admin-only:
+
+- One request: send `X-Profile: speedscope|collapsed` or `?profile=...`
+  with an admin bearer token. `ProfilingMiddleware` samples while the
+  request runs, keeps only stacks executing the matched endpoint, and
+  returns the profile instead of the normal response (the original status
+  is in `X-Profiled-Status`).
+- The whole worker for N seconds: POST /admin/diagnostics/profile.
+
+Output is either speedscope JSON (open at https://www.speedscope.app) or
+collapsed stacks ("a;b;c 12" lines) for flamegraph.pl / inferno.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi.responses import PlainTextResponse, Response
+from starlette.concurrency import run_in_threadpool
+
+FORMATS = ("speedscope", "collapsed")
+
+Frame = Tuple[str, str, int]  # (function, file, first line)
+
+# Leaf frames of threads that are blocked waiting for work, not doing it
+_IDLE = {
+    ("wait", "threading.py"),
+    ("select", "selectors.py"),
+    ("get", "queue.py"),
+    ("_worker", "thread.py"),
+    ("accept", "socket.py"),
+    ("run", "base_events.py"),
+}
+
+
+def _is_idle(frame: Frame) -> bool:
+    return (frame[0], os.path.basename(frame[1])) in _IDLE
+
+
+class Sampler:
+    def __init__(self, interval: float = 0.005, accept: Optional[Callable[[list], bool]] = None, include_idle: bool = False):
+        self.interval = interval
+        self.accept = accept  # called with the code objects of a stack, innermost first
+        self.include_idle = include_idle
+        self.counts: Counter = Counter()  # (thread name, stack outermost first) -> samples
+        self.samples = 0
+        self.started = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "Sampler":
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "Sampler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == me:
+                continue
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            if self.accept is not None and not self.accept(codes):
+                continue
+            stack = tuple((c.co_name, c.co_filename, c.co_firstlineno) for c in reversed(codes))
+            if not self.include_idle and stack and _is_idle(stack[-1]):
+                continue
+            self.counts[(names.get(thread_id, str(thread_id)), stack)] += 1
+        self.samples += 1
+
+    # -- output ------------------------------------------------------------
+
+    def collapsed(self) -> str:
+        """One line per distinct stack: "thread;outer;...;inner count"."""
+        lines = []
+        for (thread, stack), count in self.counts.most_common():
+            frames = [thread] + [f"{name} ({os.path.basename(path)}:{line})" for name, path, line in stack]
+            lines.append(f"{';'.join(frames)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str = "profile") -> dict:
+        """Speedscope file format: one sampled profile per thread."""
+        frame_index: Dict[Frame, int] = {}
+        frames: List[dict] = []
+        profiles: Dict[str, dict] = {}
+        for (thread, stack), count in self.counts.items():
+            indexes = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indexes.append(frame_index[frame])
+            profile = profiles.setdefault(thread, {
+                "type": "sampled",
+                "name": thread,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": 0,
+                "samples": [],
+                "weights": [],
+            })
+            profile["samples"].append(indexes)
+            profile["weights"].append(count * self.interval)
+            profile["endValue"] += count * self.interval
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "mms-general profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": list(profiles.values()),
+        }
+
+    def response(self, file_format: str, name: str, headers: Optional[dict] = None) -> Response:
+        headers = {
+            **(headers or {}),
+            "X-Profile-Samples": str(self.samples),
+            "X-Profile-Duration-Ms": f"{self.duration * 1000:.1f}",
+        }
+        if file_format == "collapsed":
+            return PlainTextResponse(self.collapsed(), headers=headers)
+        headers["Content-Disposition"] = f'attachment; filename="{name}.speedscope.json"'
+        return Response(json.dumps(self.speedscope(name)), media_type="application/json", headers=headers)
+
+
+# Only one profile at a time per worker: samplers would skew each other
+profile_lock = threading.Lock()
+
+
+def _is_admin_request(scope) -> bool:
+    """
+    Bearer token signed by us, carrying the ADMIN role at its current token
+    version. Blocking (the version is read from the database): call it from
+    a worker thread.
+    """
+    from jose import JWTError, jwt
+
+    import setting
+    from user.user_models import UserRole
+
+    auth = dict(scope["headers"]).get(b"authorization", b"").decode()
+    scheme, _, token = auth.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        payload = jwt.decode(token, setting.SECRET_KEY, algorithms=[setting.ALGORITHM])
+    except JWTError:
+        return False
+    if payload.get("role") != UserRole.ADMIN.value or payload.get("uid") is None:
+        return False
+
+    from db import get_session
+    from user.services import get_token_version
+
+    # Same session provider the endpoints get, overrides included
+    provider = scope["app"].dependency_overrides.get(get_session, get_session)
+    sessions = provider()
+    try:
+        return get_token_version(next(sessions), payload["uid"]) == payload.get("ver")
+    finally:
+        sessions.close()
+
+
+def _requested_format(scope) -> Optional[str]:
+    value = dict(scope["headers"]).get(b"x-profile", b"").decode().lower()
+    if not value:
+        from urllib.parse import parse_qs
+        value = (parse_qs(scope.get("query_string", b"").decode()).get("profile") or [""])[0].lower()
+    if not value:
+        return None
+    return value if value in FORMATS else "speedscope"
+
+
+class ProfilingMiddleware:
+    def __init__(self, app, interval: float = 0.001):
+        self.app = app
+        self.interval = interval
+
+    async def __call__(self, scope, receive, send):
+        file_format = _requested_format(scope) if scope["type"] == "http" else None
+        if (
+            file_format is None
+            or not await run_in_threadpool(_is_admin_request, scope)
+            or not profile_lock.acquire(blocking=False)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def discard(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        def in_endpoint(codes) -> bool:
+            # The router puts the matched endpoint in the scope before calling it
+            endpoint = scope.get("endpoint")
+            code = getattr(endpoint, "__code__", None)
+            return code is not None and code in codes
+
+        try:
+            sampler = Sampler(self.interval, accept=in_endpoint).start()
+            try:
+                await self.app(scope, receive, discard)
+            finally:
+                sampler.stop()
+        finally:
+            profile_lock.release()
+
+        route = getattr(scope.get("route"), "path", scope["path"])
+        response = sampler.response(file_format, f"{scope['method']} {route}", {"X-Profiled-Status": str(status)})
+        await response(scope, receive, send)
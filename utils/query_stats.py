@@ -0,0 +1,148 @@
+"""
+Per-request SQL statement counting and N+1 detection.
+
+`install()` hooks the cursor events of every SQLAlchemy engine. While a
+request is being handled by `QueryStatsMiddleware`, each statement adds to
+that request's `QueryStats`: the number of statements, total time spent in
+the database, and how often each statement shape was executed. Statements
+are compared after compilation, when literal values are already bind
+parameters, so "SELECT ... WHERE student_id = %(id)s" issued once per fee
+row is a single shape repeated N times.
+
+On every response the middleware adds:
+
+- X-DB-Queries: statements executed
+- X-DB-Time-Ms: time spent executing them
+
+It also logs them as `db_queries` / `db_time_ms` record fields (DEBUG), and
+logs a WARNING naming the route and statement when any shape repeats
+N_PLUS_ONE_THRESHOLD times or more in one request.
+
+The stats object lives in a context variable, which Starlette copies into
+the worker thread of sync endpoints and dependencies, so statements run
+there are counted too. For streaming responses the headers cover the work
+done before the body started.
+"""
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import setting
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    __slots__ = ("count", "db_time", "shapes", "scope")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.count = 0
+        self.db_time = 0.0
+        self.shapes: Counter = Counter()
+        self.scope = scope
+
+    @property
+    def route(self) -> Optional[str]:
+        """Request route as "METHOD /template", once routing has happened."""
+        if self.scope is None:
+            return None
+        return f'{self.scope["method"]} {getattr(self.scope.get("route"), "path", self.scope["path"])}'
+
+    def suspected_n_plus_one(self, threshold: int):
+        """(statement, times) for shapes repeated at least `threshold` times, most repeated first."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current() -> Optional[QueryStats]:
+    return _current.get()
+
+
+# Savepoint bookkeeping around nested transactions (and around every commit
+# under the tests' rolled-back outer transaction) is not work a request asked for
+_SAVEPOINT_PREFIXES = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+def is_savepoint(statement: str) -> bool:
+    return statement.lstrip()[:21].upper().startswith(_SAVEPOINT_PREFIXES)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None and not is_savepoint(statement):
+        conn.info.setdefault("query_stats_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None or is_savepoint(statement):
+        return
+    starts = conn.info.get("query_stats_start")
+    if starts:
+        stats.db_time += time.perf_counter() - starts.pop()
+    stats.count += 1
+    stats.shapes[statement] += 1
+
+
+_installed = False
+
+
+def install() -> None:
+    """Hook statement counting into all engines (idempotent)."""
+    global _installed
+    if not _installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _installed = True
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app, threshold: Optional[int] = None):
+        self.app = app
+        self.threshold = threshold or setting.N_PLUS_ONE_THRESHOLD
+        install()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope)
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.count).encode()))
+                headers.append((b"x-db-time-ms", f"{stats.db_time * 1000:.2f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            self._report(scope, stats)
+
+    def _report(self, scope, stats: QueryStats) -> None:
+        if not stats.count:
+            return
+        route = getattr(scope.get("route"), "path", scope["path"])
+        fields = {
+            "method": scope["method"],
+            "route": route,
+            "db_queries": stats.count,
+            "db_time_ms": round(stats.db_time * 1000, 2),
+        }
+        logger.debug(f"{scope['method']} {route}: {stats.count} SQL statements in {fields['db_time_ms']} ms", extra=fields)
+        for shape, times in stats.suspected_n_plus_one(self.threshold):
+            logger.warning(
+                f"Suspected N+1 on {scope['method']} {route}: statement executed {times} times: {' '.join(shape.split())[:300]}",
+                extra={**fields, "repeated": times},
+            )
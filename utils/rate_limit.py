@@ -0,0 +1,164 @@
+"""
+Token-bucket rate limiting with pluggable storage.
+
+A bucket holds up to `capacity` tokens and refills at `rate` tokens per
+second; each attempt takes one token and is refused when the bucket is
+empty. `refund` gives a token back, for callers that only want to charge
+some outcomes (e.g. failed logins). Buckets live in a backend:
+
+- MemoryBackend keeps them in this process (single worker, tests).
+- RedisBackend keeps them on a Redis-compatible server so every worker
+  shares the same limits; the refill-and-take step runs as one Lua script.
+
+`get_backend()` picks the backend from RATE_LIMIT_BACKEND / REDIS_URL.
+"""
+import math
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import setting
+from utils.logging import logger
+from utils.redis_client import RedisClient, RedisError
+
+
+class MemoryBackend:
+    """
+    Per-process buckets. Idle buckets are dropped once they would be full
+    again; each bucket keeps its own idle window since limiters with
+    different policies share the backend.
+    """
+
+    def __init__(self):
+        # key -> (tokens, updated, seconds until full again)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def take(self, key: str, capacity: int, rate: float, now: Optional[float] = None) -> Tuple[bool, float]:
+        """Take one token. Returns (allowed, seconds until a token is available)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens = self._refill(key, capacity, rate, now)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now, capacity / rate)
+            if now - self._last_sweep > 60:
+                self._sweep(now)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    def refund(self, key: str, capacity: int, rate: float, now: Optional[float] = None) -> None:
+        """Give back one token taken by `take`."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if key in self._buckets:
+                tokens = min(capacity, self._refill(key, capacity, rate, now) + 1)
+                self._buckets[key] = (tokens, now, capacity / rate)
+
+    def _refill(self, key: str, capacity: int, rate: float, now: float) -> float:
+        tokens, updated, _ = self._buckets.get(key, (capacity, now, 0))
+        return min(capacity, tokens + (now - updated) * rate)
+
+    def _sweep(self, now: float) -> None:
+        self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < v[2]}
+        self._last_sweep = now
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+# KEYS[1] bucket; ARGV capacity, rate per second, now (seconds)
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+# KEYS[1] bucket; ARGV capacity, rate per second, now (seconds)
+_REFUND_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+if not state[1] then
+    return 0
+end
+local tokens = math.min(capacity, tonumber(state[1]) + math.max(0, now - tonumber(state[2])) * rate + 1)
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+return 1
+"""
+
+
+class RedisBackend:
+    """Buckets shared by all workers through a Redis-compatible server."""
+
+    def __init__(self, client: RedisClient, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    def take(self, key: str, capacity: int, rate: float, now: Optional[float] = None) -> Tuple[bool, float]:
+        now = time.time() if now is None else now
+        allowed, tokens = self.client.execute("EVAL", _TAKE_SCRIPT, 1, self.prefix + key, capacity, rate, now)
+        tokens = float(tokens)
+        return bool(allowed), 0.0 if allowed else (1 - tokens) / rate
+
+    def refund(self, key: str, capacity: int, rate: float, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        self.client.execute("EVAL", _REFUND_SCRIPT, 1, self.prefix + key, capacity, rate, now)
+
+
+class RateLimiter:
+    """Applies one bucket policy (capacity, refill per minute) on top of a backend."""
+
+    def __init__(self, backend, capacity: int, per_minute: float, name: str):
+        self.backend = backend
+        self.capacity = capacity
+        self.rate = per_minute / 60.0
+        self.name = name
+
+    def hit(self, key: str) -> Tuple[bool, int]:
+        """Consume one attempt for `key`. Returns (allowed, retry_after_seconds)."""
+        try:
+            allowed, wait = self.backend.take(f"{self.name}:{key}", self.capacity, self.rate)
+        except RedisError as e:
+            # Fail open: an unreachable limiter must not lock everybody out
+            logger.warning(f"Rate limiter '{self.name}' unavailable, allowing request: {e}")
+            return True, 0
+        return allowed, 0 if allowed else max(1, math.ceil(wait))
+
+    def refund(self, key: str) -> None:
+        """Give back the attempt taken by `hit` for `key`."""
+        try:
+            self.backend.refund(f"{self.name}:{key}", self.capacity, self.rate)
+        except RedisError as e:
+            logger.warning(f"Rate limiter '{self.name}' unavailable, attempt not refunded: {e}")
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Process-wide backend chosen by RATE_LIMIT_BACKEND ("memory" or "redis")."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if setting.RATE_LIMIT_BACKEND == "redis":
+                _backend = RedisBackend(RedisClient.from_url(setting.REDIS_URL))
+            else:
+                _backend = MemoryBackend()
+        return _backend
@@ -0,0 +1,248 @@
+"""
+Minimal client for the Redis wire protocol (RESP2).
+
+Shared backends (login throttling, caching) only need a handful of
+commands, so this speaks the protocol directly over a socket instead of
+adding a client library. It works against Redis, Valkey, KeyDB or any
+other RESP-compatible server.
+
+    client = RedisClient.from_url("redis://localhost:6379/0")
+    client.execute("SET", "key", "value", "EX", 60)
+
+A client is shared by every request thread of a worker. It keeps a small
+pool of connections (up to `max_connections`), and each command or
+pipeline has one connection to itself, so threads only wait on each
+other when the pool is exhausted.
+"""
+import socket
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+
+class RedisError(Exception):
+    """Error reply from the server, or a connection failure."""
+
+
+class _Connection:
+    """One socket to the server, used by one thread at a time."""
+
+    def __init__(self, client: "RedisClient"):
+        sock = socket.create_connection((client.host, client.port), timeout=client.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        self.reader = sock.makefile("rb")
+        try:
+            if client.password:
+                auth = ("AUTH", client.username, client.password) if client.username else ("AUTH", client.password)
+                self.roundtrip(auth)
+            if client.db:
+                self.roundtrip(("SELECT", client.db))
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+    def shutdown(self) -> None:
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def read_reply(self) -> Any:
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            return RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self.reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(payload)
+            if count == -1:
+                return None
+            return [self.read_reply() for _ in range(count)]
+        raise RedisError(f"Unexpected reply type {kind!r}")
+
+    def roundtrip(self, args) -> Any:
+        self.sock.sendall(RedisClient.encode(args))
+        reply = self.read_reply()
+        if isinstance(reply, RedisError):
+            raise reply
+        return reply
+
+
+class RedisClient:
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        password: Optional[str] = None,
+        username: Optional[str] = None,
+        timeout: float = 2.0,
+        max_connections: int = 10,
+    ):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.username = username
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._idle: List[_Connection] = []
+        self._open = 0  # idle + checked out
+        self._available = threading.Condition()
+        self._subscription: Optional[_Connection] = None
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 2.0, max_connections: int = 10) -> "RedisClient":
+        parsed = urlparse(url)
+        if parsed.scheme not in ("redis", ""):
+            raise ValueError(f"Unsupported Redis URL scheme '{parsed.scheme}'")
+        db = int(parsed.path.lstrip("/") or 0)
+        return cls(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=db,
+            password=unquote(parsed.password) if parsed.password else None,
+            username=unquote(parsed.username) if parsed.username else None,
+            timeout=timeout,
+            max_connections=max_connections,
+        )
+
+    # -- connection pool --------------------------------------------------
+
+    @contextmanager
+    def _connection(self) -> Iterator[_Connection]:
+        """
+        Check out a connection, opening one if the pool is not full and
+        waiting up to `timeout` for one otherwise. It goes back to the pool
+        afterwards unless it failed mid-command, in which case it is closed.
+        """
+        with self._available:
+            while not self._idle and self._open >= self.max_connections:
+                if not self._available.wait(self.timeout):
+                    raise RedisError(f"No free connection to {self.host}:{self.port} (max {self.max_connections})")
+            conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                self._open += 1
+        if conn is None:
+            try:
+                conn = _Connection(self)
+            except BaseException:
+                with self._available:
+                    self._open -= 1
+                    self._available.notify()
+                raise
+        broken = True
+        try:
+            yield conn
+            broken = False
+        except RedisError:
+            # An error reply: the connection itself is fine
+            broken = False
+            raise
+        finally:
+            with self._available:
+                if broken:
+                    conn.close()
+                    self._open -= 1
+                else:
+                    self._idle.append(conn)
+                self._available.notify()
+
+    def close(self) -> None:
+        """Close the idle connections; ones in use are kept until they are returned."""
+        with self._available:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn in idle:
+            conn.close()
+
+    def shutdown(self) -> None:
+        """Interrupt a blocking read (e.g. `subscribe`) from another thread."""
+        conn = self._subscription
+        if conn is not None:
+            conn.shutdown()
+
+    # -- protocol ---------------------------------------------------------
+
+    @staticmethod
+    def encode(args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if isinstance(arg, bytes):
+                data = arg
+            elif isinstance(arg, float):
+                data = repr(arg).encode()
+            else:
+                data = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def execute(self, *args) -> Any:
+        """Send one command and return its reply. Retries once on a broken connection."""
+        for attempt in (1, 2):
+            try:
+                with self._connection() as conn:
+                    return conn.roundtrip(args)
+            except RedisError:
+                raise
+            except OSError as e:
+                if attempt == 2:
+                    raise RedisError(f"Redis connection to {self.host}:{self.port} failed: {e}")
+
+    def pipeline(self, commands: List[tuple]) -> List[Any]:
+        """Send several commands in one write and return their replies (errors included, not raised)."""
+        try:
+            with self._connection() as conn:
+                conn.sock.sendall(b"".join(self.encode(args) for args in commands))
+                return [conn.read_reply() for _ in commands]
+        except OSError as e:
+            raise RedisError(f"Redis connection to {self.host}:{self.port} failed: {e}")
+
+    def ping(self) -> bool:
+        return self.execute("PING") == "PONG"
+
+    def subscribe(self, *channels: str) -> Iterator[Tuple[str, bytes]]:
+        """
+        Subscribe to `channels` and yield (channel, message) as they are
+        published. Uses a connection of its own, outside the pool, for as
+        long as the iteration runs; `shutdown` interrupts it.
+        Raises RedisError when the connection drops.
+        """
+        conn = None
+        try:
+            conn = self._subscription = _Connection(self)
+            conn.sock.sendall(self.encode(("SUBSCRIBE",) + channels))
+            for _ in channels:
+                conn.read_reply()  # subscribe confirmations
+            # Block until something is published
+            conn.sock.settimeout(None)
+            while True:
+                reply = conn.read_reply()
+                if isinstance(reply, list) and len(reply) == 3 and reply[0] == b"message":
+                    yield reply[1].decode(), reply[2]
+        except OSError as e:
+            raise RedisError(f"Redis subscription to {self.host}:{self.port} failed: {e}")
+        finally:
+            if conn is not None:
+                self._subscription = None
+                conn.close()
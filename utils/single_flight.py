@@ -0,0 +1,74 @@
+"""
+Request coalescing ("single flight") for expensive read endpoints.
+
+When several requests ask for the same computation at the same time, only
+the first one runs it; the others wait for it to finish and receive the
+same result (or the same exception). Nothing is kept once the computation
+completes, so this never serves stale data: a request arriving after the
+result was delivered starts a new computation.
+
+    flights = SingleFlight()
+    flights.do(("attendance-summary", today), lambda: compute(session, today))
+
+Keys are tuples whose first element names the operation; counters are kept
+per name and returned by `stats()`.
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _counters(self, name: str) -> Dict[str, int]:
+        return self._stats.setdefault(name, {"executions": 0, "coalesced": 0, "max_waiters": 0})
+
+    def do(self, key: Tuple, fn: Callable[[], Any]) -> Any:
+        """Run `fn` for `key`, or wait for the identical call already in flight."""
+        name = str(key[0])
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._counters(name)["executions"] += 1
+            else:
+                call.waiters += 1
+                counters = self._counters(name)
+                counters["coalesced"] += 1
+                counters["max_waiters"] = max(counters["max_waiters"], call.waiters)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-operation counters: executions run, requests coalesced, largest wait queue."""
+        with self._lock:
+            return {name: dict(counters) for name, counters in self._stats.items()}
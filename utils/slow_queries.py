@@ -0,0 +1,190 @@
+"""
+Opt-in slow query log (SLOW_QUERY_LOG_ENABLED).
+
+`attach(engine)` times every statement on that engine. Statements slower
+than SLOW_QUERY_THRESHOLD_MS are kept in a fixed-size ring buffer with
+their bound parameters and the route of the request that issued them (see
+utils.query_stats).
+
+On PostgreSQL, read-only SELECTs are then re-run as
+`EXPLAIN (ANALYZE, BUFFERS)` on a background thread, so the request that
+was slow does not wait for its own plan. The EXPLAIN runs in a transaction
+that is rolled back, under SLOW_QUERY_EXPLAIN_TIMEOUT_MS, and each distinct
+statement is explained at most once per SLOW_QUERY_EXPLAIN_INTERVAL seconds.
+
+ANALYZE executes the statement, and a rollback does not undo everything:
+sequence increments and session-level advisory locks survive it, and row
+locks or transaction-level advisory locks are held (and waited on) while
+it runs. Queries that lock rows, call such functions or modify data in a
+CTE therefore get a plain EXPLAIN, which only plans them.
+"""
+import itertools
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+import setting
+from utils import query_stats
+from utils.logging import logger
+
+MAX_PARAMETERS_LENGTH = 1000
+# Statements that are explained at all
+_EXPLAINABLE = ("select", "with")
+# Anything in an explainable statement that makes re-executing it unsafe
+_NOT_READ_ONLY = re.compile(
+    r"\bfor\s+(no\s+key\s+)?(update|share|key\s+share)\b"  # row locks
+    r"|\b(insert|update|delete|merge)\b"  # data-modifying CTEs
+    r"|\binto\b"  # SELECT INTO creates a table
+    r"|\b(nextval|setval|pg_(try_)?advisory_\w+|pg_notify|set_config|lo_\w+)\s*\("
+)
+
+
+class SlowQueryLog:
+    def __init__(
+        self,
+        threshold_ms: float,
+        size: int = 200,
+        explain: bool = True,
+        explain_interval: float = 300,
+        explain_timeout_ms: int = 10000,
+    ):
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.explain_timeout_ms = explain_timeout_ms
+        self._entries: deque = deque(maxlen=size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._explained: Dict[str, float] = {}  # statement -> last time it was explained
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._engine: Optional[Engine] = None
+
+    # -- engine hooks ---------------------------------------------------------
+
+    def attach(self, engine: Engine) -> None:
+        self._engine = engine
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+    def detach(self) -> None:
+        if self._engine is not None:
+            event.remove(self._engine, "before_cursor_execute", self._before)
+            event.remove(self._engine, "after_cursor_execute", self._after)
+            self._engine = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("slow_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if elapsed < self.threshold or conn.get_execution_options().get("slow_query_log") is False:
+            return
+        if query_stats.is_savepoint(statement):
+            return
+        self.record(statement, parameters, elapsed, executemany, conn.dialect.name)
+
+    # -- recording ------------------------------------------------------------
+
+    def record(self, statement: str, parameters, elapsed: float, executemany: bool = False, dialect: str = "") -> dict:
+        stats = query_stats.current()
+        params = repr(parameters)
+        entry = {
+            "id": next(self._ids),
+            "recorded_at": datetime.now(),
+            "duration_ms": round(elapsed * 1000, 2),
+            "statement": statement,
+            "parameters": params if len(params) <= MAX_PARAMETERS_LENGTH else params[:MAX_PARAMETERS_LENGTH] + "...",
+            "route": stats.route if stats is not None else None,
+            "plan": None,
+            "plan_error": None,
+        }
+        with self._lock:
+            self._entries.append(entry)
+        logger.warning(
+            f"Slow query ({entry['duration_ms']} ms) from {entry['route'] or 'no request'}: {' '.join(statement.split())[:300]}",
+            extra={"duration_ms": entry["duration_ms"], "route": entry["route"]},
+        )
+        if self._should_explain(statement, executemany, dialect):
+            self._explain_later(entry, statement, parameters, analyze=is_read_only(statement))
+        return entry
+
+    def _should_explain(self, statement: str, executemany: bool, dialect: str) -> bool:
+        if not self.explain or executemany or dialect != "postgresql" or self._engine is None:
+            return False
+        if not statement.lstrip().lower().startswith(_EXPLAINABLE):
+            return False
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained.get(statement)
+            if last is not None and now - last < self.explain_interval:
+                return False
+            self._explained[statement] = now
+            if len(self._explained) > 10 * (self._entries.maxlen or 1):
+                self._explained = {s: t for s, t in self._explained.items() if now - t < self.explain_interval}
+        return True
+
+    def _explain_later(self, entry: dict, statement: str, parameters, analyze: bool) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+        self._executor.submit(self._explain, entry, statement, parameters, analyze)
+
+    def _explain(self, entry: dict, statement: str, parameters, analyze: bool) -> None:
+        try:
+            with self._engine.connect() as conn:
+                conn = conn.execution_options(slow_query_log=False)
+                conn.execute(text(f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}"))
+                prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+                result = conn.exec_driver_sql(prefix + statement, parameters)
+                entry["plan"] = "\n".join(row[0] for row in result)
+                conn.rollback()
+        except Exception as e:
+            entry["plan_error"] = str(e)
+
+    # -- browsing -------------------------------------------------------------
+
+    def entries(self, limit: int = 50) -> List[dict]:
+        """Most recent first."""
+        with self._lock:
+            return list(itertools.islice(reversed(self._entries), limit))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._explained.clear()
+
+
+def is_read_only(statement: str) -> bool:
+    """Whether `statement` can be re-run under EXPLAIN ANALYZE without side effects or row locks."""
+    statement = statement.lstrip().lower()
+    return statement.startswith(_EXPLAINABLE) and not _NOT_READ_ONLY.search(statement)
+
+
+slow_query_log: Optional[SlowQueryLog] = None
+
+
+def enable(engine: Engine) -> SlowQueryLog:
+    """Attach a recorder configured from settings to `engine` (idempotent)."""
+    global slow_query_log
+    if slow_query_log is None:
+        slow_query_log = SlowQueryLog(
+            threshold_ms=setting.SLOW_QUERY_THRESHOLD_MS,
+            size=setting.SLOW_QUERY_BUFFER_SIZE,
+            explain=setting.SLOW_QUERY_EXPLAIN,
+            explain_interval=setting.SLOW_QUERY_EXPLAIN_INTERVAL,
+            explain_timeout_ms=setting.SLOW_QUERY_EXPLAIN_TIMEOUT_MS,
+        )
+        slow_query_log.attach(engine)
+    return slow_query_log
@@ -0,0 +1,354 @@
+"""
+Seeded synthetic school data for load tests, benchmarks and query-plan work.
+
+`generate` fills an empty database with a school of the requested size:
+classes (grades x sections), one teacher per section, students with
+admission dates spread over the period, one attendance mark per student
+per school day, monthly fees, and income/expense entries. The same seed
+and `today` always produce the same data; `today` defaults to the current
+date, so pin it (scripts.generate_data --today) to reproduce a dataset.
+
+Distributions are meant to look like a real school:
+
+- Attendance: each student has their own absence rate (mean about 6%,
+  long tail of chronic absentees); absences split into Absent/Sick/Leave;
+  about 3% of present marks are Late. School days are Monday to Friday,
+  outside the summer (June, July) and winter (22 Dec - 2 Jan) breaks.
+- Fees: one row per student per month since admission; the amount grows
+  with grade; recent months are more likely to still be unpaid.
+- Income and expense: fixed monthly items (salaries, utilities) plus
+  irregular entries with log-normal amounts.
+
+Reference rows are inserted with `insert_rows` (keys are needed); the
+large tables stream through `append_rows` (COPY on PostgreSQL), so the
+"large" preset (5,000 students x 5 academic years, ~4M attendance rows)
+loads in a few minutes.
+"""
+import math
+import random
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import delete, func, select, text
+from sqlmodel import Session
+
+from schemas.admission_model import Admission
+from schemas.attendance_model import Attendance
+from schemas.attendance_time_model import AttendanceTime
+from schemas.attendance_value_model import AttendanceValue
+from schemas.class_names_model import ClassNames
+from schemas.expense_cat_names_model import ExpenseCatNames
+from schemas.expense_model import Expense
+from schemas.fee_model import MONTHS, Fee, FeeStatus
+from schemas.income_cat_names_model import IncomeCatNames
+from schemas.income_model import Income
+from schemas.ledger_model import MonthlyLedger
+from schemas.students_model import Students
+from schemas.teacher_names_model import TeacherNames
+from utils import finance_analytics, ledger
+from utils.academic_year import academic_year_bounds, academic_year_of
+from utils.bulk_load import append_rows, insert_rows
+from utils.logging import logger
+
+PRESETS = {
+    "tiny": {"students": 60, "years": 1, "grades": 3, "sections": 1},
+    "small": {"students": 300, "years": 1, "grades": 10, "sections": 1},
+    "medium": {"students": 1500, "years": 3, "grades": 10, "sections": 2},
+    "large": {"students": 5000, "years": 5, "grades": 10, "sections": 3},
+}
+
+# Tables written by `generate`, children before parents
+TABLES = [
+    Admission, Attendance, Fee, Income, Expense, MonthlyLedger, Students, TeacherNames,
+    ClassNames, AttendanceValue, AttendanceTime, IncomeCatNames, ExpenseCatNames,
+]
+
+ATTENDANCE_VALUES = ["Present", "Absent", "Late", "Sick", "Leave"]
+# How an absence is recorded
+ABSENCE_SPLIT = [("Absent", 0.6), ("Sick", 0.25), ("Leave", 0.15)]
+LATE_RATE = 0.03
+
+# category -> (entries per month, median amount)
+INCOME_CATEGORIES = {
+    "Admission Fee": (6, 5000),
+    "Donation": (2, 20000),
+    "Canteen": (20, 1500),
+    "Events": (1, 15000),
+    "Government Grant": (0.25, 250000),
+}
+EXPENSE_CATEGORIES = {
+    "Maintenance": (4, 8000),
+    "Stationery": (6, 3000),
+    "Transport": (8, 2500),
+    "Events": (1, 12000),
+}
+TEACHER_SALARY = 45000
+UTILITIES = 35000
+
+FIRST_NAMES = [
+    "Ahmed", "Ali", "Ayesha", "Bilal", "Fatima", "Hamza", "Hina", "Imran", "Maryam", "Omar",
+    "Sana", "Usman", "Zainab", "Hassan", "Amna", "Farhan", "Iqra", "Kashif", "Laiba", "Noman",
+    "Rabia", "Saad", "Tooba", "Waqas", "Yusuf", "Zara", "Danish", "Esha", "Fahad", "Mahnoor",
+]
+LAST_NAMES = [
+    "Khan", "Ahmed", "Malik", "Qureshi", "Sheikh", "Butt", "Chaudhry", "Siddiqui", "Raza", "Mirza",
+    "Hussain", "Javed", "Iqbal", "Aslam", "Shah", "Abbasi", "Anwar", "Baig", "Hashmi", "Rana",
+]
+CITIES = ["Lahore", "Karachi", "Islamabad", "Multan", "Faisalabad", "Peshawar"]
+OCCUPATIONS = ["Teacher", "Shopkeeper", "Engineer", "Farmer", "Doctor", "Driver", "Clerk", "Tailor"]
+
+
+def school_days(start: date, end: date) -> Iterator[date]:
+    """Weekdays in [start, end) outside the summer and winter breaks."""
+    day = start
+    while day < end:
+        in_break = day.month in (6, 7) or (day.month == 12 and day.day >= 22) or (day.month == 1 and day.day <= 2)
+        if day.weekday() < 5 and not in_break:
+            yield day
+        day += timedelta(days=1)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + (month.month == 12), month.month % 12 + 1, 1)
+
+
+def _months(start: date, end: date) -> Iterator[date]:
+    """First day of every month overlapping [start, end)."""
+    month = date(start.year, start.month, 1)
+    while month < end:
+        yield month
+        month = _next_month(month)
+
+
+def _at(day: date, rng: random.Random, hour_from: int = 8, hour_to: int = 16) -> datetime:
+    return datetime.combine(day, time(rng.randint(hour_from, hour_to - 1), rng.randint(0, 59)))
+
+
+def _lognormal(rng: random.Random, median: float) -> float:
+    return round(rng.lognormvariate(math.log(median), 0.5), 2)
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    # Knuth; means here are small
+    limit, k, p = math.exp(-mean), 0, rng.random()
+    while p > limit:
+        k += 1
+        p *= rng.random()
+    return k
+
+
+def reset(session: Session) -> None:
+    """Empty every table `generate` writes to. Does not commit."""
+    if session.get_bind().dialect.name == "postgresql":
+        names = ", ".join(f'"{model.__tablename__}"' for model in TABLES)
+        session.execute(text(f"TRUNCATE {names} RESTART IDENTITY CASCADE"))
+    else:
+        for model in TABLES:
+            session.execute(delete(model))
+
+
+def generate(
+    session: Session,
+    students: int = 300,
+    years: int = 1,
+    grades: int = 10,
+    sections: int = 1,
+    seed: int = 42,
+    today: Optional[date] = None,
+    progress: Callable[[str], None] = logger.info,
+) -> Dict[str, int]:
+    """
+    Fill an empty database with a school of `students` pupils over the last
+    `years` academic years (the current one included, up to `today`).
+    Commits at the end and returns the number of rows per table.
+    """
+    if session.execute(select(func.count()).select_from(Students)).scalar():
+        raise RuntimeError("Students already exist; reset the database before generating data")
+
+    rng = random.Random(seed)
+    today = today or date.today()
+    current_year = academic_year_of(today)
+    period_start = academic_year_bounds(current_year - years + 1)[0]
+    period_end = today + timedelta(days=1)
+    created = datetime.combine(period_start, time(8))
+    counts: Dict[str, int] = {}
+
+    # Reference data
+    value_ids = dict(zip(ATTENDANCE_VALUES, insert_rows(
+        session, AttendanceValue, ["attendance_value", "created_at"],
+        [{"attendance_value": v, "created_at": created} for v in ATTENDANCE_VALUES],
+    )))
+    [time_id] = insert_rows(session, AttendanceTime, ["attendance_time", "created_at"],
+                            [{"attendance_time": "Morning", "created_at": created}])
+    class_names = [f"Grade {g}-{chr(ord('A') + s)}" for g in range(1, grades + 1) for s in range(sections)]
+    class_ids = insert_rows(session, ClassNames, ["class_name", "created_at"],
+                            [{"class_name": name, "created_at": created} for name in class_names])
+    teachers = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} ({name})" for name in class_names]
+    teacher_ids = insert_rows(session, TeacherNames, ["teacher_name", "created_at"],
+                              [{"teacher_name": name, "created_at": created} for name in teachers])
+    income_cats = dict(zip(INCOME_CATEGORIES, insert_rows(
+        session, IncomeCatNames, ["income_cat_name", "created_at"],
+        [{"income_cat_name": name, "created_at": created} for name in INCOME_CATEGORIES],
+    )))
+    expense_names = ["Salaries", "Utilities"] + list(EXPENSE_CATEGORIES)
+    expense_cats = dict(zip(expense_names, insert_rows(
+        session, ExpenseCatNames, ["expense_cat_name", "created_at"],
+        [{"expense_cat_name": name, "created_at": created} for name in expense_names],
+    )))
+    counts.update(classnames=len(class_ids), teachernames=len(teacher_ids))
+
+    # Students: most enrolled before the period starts, the rest join during it
+    span = (today - period_start).days
+    pupils = []
+    for i in range(students):
+        section = i % len(class_ids)
+        grade = section // sections + 1
+        joined = period_start if rng.random() < 0.7 else period_start + timedelta(days=rng.randint(0, max(span, 0)))
+        born = date(today.year - grade - 5, rng.randint(1, 12), rng.randint(1, 28))
+        pupils.append({
+            "row": {
+                "student_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "student_date_of_birth": datetime.combine(born, time()),
+                "student_gender": rng.choice(["Male", "Female"]),
+                "student_age": str(grade + 5),
+                "student_education": f"Grade {grade}",
+                "class_name": class_names[section],
+                "student_city": rng.choice(CITIES),
+                "student_address": f"House {rng.randint(1, 999)}, Street {rng.randint(1, 60)}",
+                "father_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "father_occupation": rng.choice(OCCUPATIONS),
+                "father_cnic": f"{rng.randint(10000, 99999)}-{rng.randint(1000000, 9999999)}-{rng.randint(0, 9)}",
+                "father_cast_name": rng.choice(LAST_NAMES),
+                "father_contact": f"03{rng.randint(0, 49):02d}-{rng.randint(1000000, 9999999)}",
+            },
+            "section": section,
+            "grade": grade,
+            "joined": joined,
+            "absence_rate": rng.betavariate(1.5, 22),
+        })
+    student_columns = list(pupils[0]["row"]) if pupils else []
+    student_ids = insert_rows(session, Students, student_columns, [p["row"] for p in pupils])
+    for pupil, student_id in zip(pupils, student_ids):
+        pupil["id"] = student_id
+    counts["students"] = len(student_ids)
+    progress(f"{len(class_ids)} classes, {len(student_ids)} students")
+
+    # Attendance: one mark per student per school day since they joined
+    absent_values = [value_ids[name] for name, _ in ABSENCE_SPLIT]
+    absent_weights = [weight for _, weight in ABSENCE_SPLIT]
+    present, late = value_ids["Present"], value_ids["Late"]
+
+    def attendance_rows():
+        days = 0
+        for day in school_days(period_start, period_end):
+            # The attendance endpoints store the bare date
+            attendance_date, marked = datetime.combine(day, time()), datetime.combine(day, time(8, 30))
+            for pupil in pupils:
+                if pupil["joined"] > day:
+                    continue
+                roll = rng.random()
+                if roll < pupil["absence_rate"]:
+                    value = rng.choices(absent_values, absent_weights)[0]
+                else:
+                    value = late if roll > 1 - LATE_RATE else present
+                yield {
+                    "attendance_date": attendance_date,
+                    "attendance_time_id": time_id,
+                    "class_name_id": class_ids[pupil["section"]],
+                    "teacher_name_id": teacher_ids[pupil["section"]],
+                    "student_id": pupil["id"],
+                    "attendance_value_id": value,
+                    "created_at": marked,
+                    "updated_at": marked,
+                }
+            days += 1
+            if days % 100 == 0:
+                progress(f"attendance: {days} school days generated")
+
+    counts["attendance"] = append_rows(session, Attendance, [
+        "attendance_date", "attendance_time_id", "class_name_id", "teacher_name_id",
+        "student_id", "attendance_value_id", "created_at", "updated_at",
+    ], attendance_rows())
+    progress(f"{counts['attendance']} attendance rows")
+
+    # Fees: monthly per student; unpaid becomes likelier towards the present
+    months = list(_months(period_start, period_end))
+
+    def fee_rows():
+        for pupil in pupils:
+            amount = 1500 + 250 * pupil["grade"]
+            for month in months:
+                if month < date(pupil["joined"].year, pupil["joined"].month, 1):
+                    continue
+                months_ago = (today.year - month.year) * 12 + today.month - month.month
+                paid = rng.random() < (0.97 if months_ago > 2 else 0.6 + 0.1 * months_ago)
+                yield {
+                    "student_id": pupil["id"],
+                    "class_id": class_ids[pupil["section"]],
+                    "fee_amount": amount if paid else 0,
+                    "fee_month": MONTHS[month.month - 1],
+                    "fee_year": str(month.year),
+                    "fee_status": FeeStatus.PAID if paid else FeeStatus.UNPAID,
+                    "created_at": _at(min(month + timedelta(days=rng.randint(0, 27)), today), rng),
+                }
+
+    counts["fee"] = append_rows(session, Fee, [
+        "student_id", "class_id", "fee_amount", "fee_month", "fee_year", "fee_status", "created_at",
+    ], fee_rows())
+
+    # Income and expense
+    def in_period(month: date) -> List[date]:
+        last = min(_next_month(month), period_end)
+        return [month + timedelta(days=d) for d in range((last - month).days)]
+
+    def income_rows():
+        receipt = 1000
+        for month in months:
+            days = in_period(month)
+            for category, (per_month, median) in INCOME_CATEGORIES.items():
+                for _ in range(_poisson(rng, per_month)):
+                    receipt += 1
+                    when = _at(rng.choice(days), rng)
+                    yield {
+                        "recipt_number": receipt,
+                        "date": when,
+                        "category_id": income_cats[category],
+                        "source": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                        "description": category,
+                        "amount": _lognormal(rng, median),
+                        "created_at": when,
+                    }
+
+    def expense_rows():
+        receipt = 5000
+        for month in months:
+            days = in_period(month)
+            fixed = [("Salaries", teacher, TEACHER_SALARY) for teacher in teachers]
+            fixed.append(("Utilities", "Utility company", _lognormal(rng, UTILITIES)))
+            entries = [(category, to_whom, amount, days[0]) for category, to_whom, amount in fixed]
+            for category, (per_month, median) in EXPENSE_CATEGORIES.items():
+                for _ in range(_poisson(rng, per_month)):
+                    entries.append((category, f"{rng.choice(LAST_NAMES)} Traders", _lognormal(rng, median), rng.choice(days)))
+            for category, to_whom, amount, day in entries:
+                receipt += 1
+                when = _at(day, rng)
+                yield {
+                    "recipt_number": receipt,
+                    "date": when,
+                    "category_id": expense_cats[category],
+                    "to_whom": to_whom,
+                    "description": category,
+                    "amount": amount,
+                    "created_at": when,
+                }
+
+    counts["income"] = append_rows(session, Income, [
+        "recipt_number", "date", "category_id", "source", "description", "amount", "created_at",
+    ], income_rows())
+    counts["expense"] = append_rows(session, Expense, [
+        "recipt_number", "date", "category_id", "to_whom", "description", "amount", "created_at",
+    ], expense_rows())
+    counts["monthlyledger"] = ledger.rebuild(session)  # commits
+    finance_analytics.invalidate()
+    progress(", ".join(f"{table} {n}" for table, n in counts.items()))
+    return counts